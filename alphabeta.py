@@ -0,0 +1,295 @@
+import ast
+import copy
+import time
+import random
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from cwm import CWM, CHANCE_PLAYER, TERMINAL_PLAYER
+from game_tree import TranspositionTable, canonical_key
+
+INF = float("inf")
+EXACT, LOWER, UPPER = 0, 1, 2
+MASK64 = (1 << 64) - 1
+
+
+class ZobristHasher:
+    """
+    Zobrist hashing over state[board_key]: every (square, piece) pair gets a
+    random 64-bit key and a position hashes to the XOR of its squares' keys,
+    mixed with a hash of the remaining state fields (side to move, ...).
+    update() only re-hashes the squares that changed between parent and child.
+    """
+
+    def __init__(self, board_key: str = "board", seed: int = 0):
+        self.board_key = board_key
+        self.rng = random.Random(seed)
+        self.keys: Dict[Tuple[int, Hashable], int] = {}
+
+    def _square(self, index: int, piece: Hashable) -> int:
+        key = self.keys.get((index, piece))
+        if key is None:
+            key = self.keys[(index, piece)] = self.rng.getrandbits(64)
+        return key
+
+    def _rest(self, state: Dict[str, Any]) -> int:
+        rest = {k: v for k, v in state.items() if k != self.board_key}
+        return hash(canonical_key(rest)) & MASK64
+
+    def board_hash(self, board: List[Any]) -> int:
+        h = 0
+        for i, piece in enumerate(board):
+            h ^= self._square(i, canonical_key(piece))
+        return h
+
+    def hash(self, state: Dict[str, Any]) -> Tuple[int, int]:
+        """Returns (board hash, full hash); the board part is what update() carries forward."""
+        board = self.board_hash(state[self.board_key])
+        return board, board ^ self._rest(state)
+
+    def update(self, board_hash: int, parent: Dict[str, Any], child: Dict[str, Any]) -> Tuple[int, int]:
+        old, new = parent[self.board_key], child[self.board_key]
+        if len(old) != len(new):
+            return self.hash(child)
+        h = board_hash
+        for i, (a, b) in enumerate(zip(old, new)):
+            if a != b:
+                h ^= self._square(i, canonical_key(a)) ^ self._square(i, canonical_key(b))
+        return h, h ^ self._rest(child)
+
+
+@dataclass
+class SearchResult:
+    value: float  # Game value for player 0 (exact if solved, else the depth-limited estimate)
+    best_action: Optional[str]
+    depth: int  # Deepest fully completed iteration
+    solved: bool
+    nodes: int
+    elapsed: float
+    tt_hit_rate: float
+
+    @property
+    def nodes_per_sec(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"value {self.value:+.3f}, best {self.best_action}, depth {self.depth}"
+            f"{' (solved)' if self.solved else ''}, {self.nodes} nodes in {self.elapsed:.2f}s "
+            f"({self.nodes_per_sec:.0f} nodes/s), TT hit rate {self.tt_hit_rate:.1%}"
+        )
+
+
+class _Timeout(Exception):
+    pass
+
+
+class AlphaBetaSolver:
+    """
+    Minimax with alpha-beta pruning for two-player perfect-information CWMs,
+    valued from player 0's point of view (get_rewards(state)[0] at terminals).
+
+    Iterative deepening drives the search; each iteration orders moves by the
+    transposition table's best move, then by the history heuristic. Entries
+    of fully resolved subtrees are stored with infinite depth, so once the
+    root is resolved the game is solved and deepening stops. Positions at the
+    depth horizon are scored with evaluate (0.0 by default). CWMs with the
+    in-place API are searched with apply_action_inplace/undo_action on one
+    copy of the root state instead of allocating a state per node.
+    """
+
+    def __init__(
+        self,
+        cwm: CWM,
+        tt_size: Optional[int] = 1_000_000,
+        evaluate: Optional[Callable[[Dict[str, Any]], float]] = None,
+        board_key: str = "board",
+    ):
+        self.cwm = cwm
+        self.table = TranspositionTable(max_entries=tt_size)
+        self.evaluate = evaluate or (lambda state: 0.0)
+        self.hasher = ZobristHasher(board_key)
+        self.history: Dict[str, int] = {}
+        self.nodes = 0
+        self.inplace = cwm.has_inplace
+        self._deadline: Optional[float] = None
+
+    def solve(self, state: Dict[str, Any], max_depth: Optional[int] = None, time_limit: Optional[float] = None) -> SearchResult:
+        start = time.perf_counter()
+        self.nodes = 0
+        hits_before, misses_before = self.table.hits, self.table.misses
+        self._deadline = start + time_limit if time_limit else None
+
+        if self.inplace:
+            state = copy.deepcopy(state)  # The search applies and undoes moves on its own copy
+        result = SearchResult(self.evaluate(state), None, 0, False, 0, 0.0, 0.0)
+        board_hash, full_hash = self.hasher.hash(state)
+        depth = 0
+        while max_depth is None or depth < max_depth:
+            depth += 1
+            try:
+                value, complete = self._search(state, board_hash, full_hash, depth, -INF, INF)
+            except _Timeout:
+                logging.info(f"Alpha-beta stopped by the time limit during depth {depth}.")
+                break
+            entry = self.table.get(full_hash)
+            result.value = value
+            result.best_action = entry[3] if entry else None
+            result.depth = depth
+            result.solved = complete
+            if complete:
+                break
+
+        lookups = (self.table.hits - hits_before) + (self.table.misses - misses_before)
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - start
+        result.tt_hit_rate = (self.table.hits - hits_before) / lookups if lookups else 0.0
+        return result
+
+    def _ordered(self, actions: List[str], tt_move: Optional[str]) -> List[str]:
+        ordered = sorted(actions, key=lambda a: -self.history.get(a, 0))
+        if tt_move in actions:
+            ordered.remove(tt_move)
+            ordered.insert(0, tt_move)
+        return ordered
+
+    def _search(self, state, board_hash: int, full_hash: int, depth: int, alpha: float, beta: float) -> Tuple[float, bool]:
+        """Returns (value, complete), where complete means no horizon was reached below this node."""
+        self.nodes += 1
+        if self._deadline is not None and self.nodes % 1024 == 0 and time.perf_counter() > self._deadline:
+            raise _Timeout()
+
+        player = self.cwm.get_current_player(state)
+        if player == TERMINAL_PLAYER:
+            return float(self.cwm.get_rewards(state)[0]), True
+        if player == CHANCE_PLAYER:
+            raise ValueError("AlphaBetaSolver only supports games without chance nodes.")
+
+        entry = self.table.get(full_hash)
+        tt_move = None
+        if entry is not None:
+            entry_depth, value, flag, tt_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                    return value, entry_depth == INF
+        if depth == 0:
+            return self.evaluate(state), False
+
+        actions = self.cwm.get_legal_actions(state)
+        if not actions:
+            return float(self.cwm.get_rewards(state)[0]), True
+
+        maximizing = player == 0
+        alpha_in, beta_in = alpha, beta
+        best_value = -INF if maximizing else INF
+        best_action = None
+        complete = True
+        for action in self._ordered(actions, tt_move):
+            if self.inplace:
+                # Only the board is needed to update the hash, so keep a shallow copy of it.
+                parent = {self.hasher.board_key: list(state[self.hasher.board_key])}
+                undo = self.cwm.apply_action_inplace(state, action)
+                child_board, child_full = self.hasher.update(board_hash, parent, state)
+                try:
+                    value, child_complete = self._search(state, child_board, child_full, depth - 1, alpha, beta)
+                finally:
+                    self.cwm.undo_action(state, undo)
+            else:
+                child = self.cwm.apply_action(state, action)
+                child_board, child_full = self.hasher.update(board_hash, state, child)
+                value, child_complete = self._search(child, child_board, child_full, depth - 1, alpha, beta)
+            complete = complete and child_complete
+            if maximizing and value > best_value or not maximizing and value < best_value:
+                best_value, best_action = value, action
+            if maximizing:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                self.history[action] = self.history.get(action, 0) + depth * depth
+                break
+
+        if best_value <= alpha_in:
+            flag = UPPER
+        elif best_value >= beta_in:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.put(full_hash, (INF if complete else depth, best_value, flag, best_action))
+        return best_value, complete
+
+
+def positions_from_tests(test_code: str, board_key: str = "board") -> List[Dict[str, Any]]:
+    """
+    Distinct state dicts written out in a test file (dict displays with a board
+    entry). Displays that refer to names cannot be evaluated and are skipped;
+    positions built by mutating a literal in the test body are not recovered.
+    """
+    states: List[Dict[str, Any]] = []
+    found = skipped = 0
+    for node in ast.walk(ast.parse(test_code)):
+        if not isinstance(node, ast.Dict):
+            continue
+        if not any(isinstance(k, ast.Constant) and k.value == board_key for k in node.keys):
+            continue
+        found += 1
+        try:
+            state = eval(compile(ast.Expression(node), "<positions_from_tests>", "eval"), {"__builtins__": {}})
+        except Exception:
+            skipped += 1  # Refers to local variables of the test
+            continue
+        if state not in states:
+            states.append(state)
+    logging.info(
+        f"Found {found} state literals in the tests: {len(states)} distinct positions, "
+        f"{found - skipped - len(states)} duplicates, {skipped} skipped."
+    )
+    return states
+
+
+def validate_positions(cwm: CWM, states: List[Dict[str, Any]], time_limit: float = 10.0) -> List[str]:
+    """
+    Solves each position and checks it against the CWM: the best move must be
+    legal, terminal values must match get_rewards, and a solved value must
+    equal the value of the position after the best move. Positions whose first
+    iteration does not finish within time_limit are skipped with a warning.
+    """
+    problems = []
+    for i, state in enumerate(states):
+        solver = AlphaBetaSolver(cwm)
+        result = solver.solve(state, time_limit=time_limit)
+        if cwm.get_current_player(state) == TERMINAL_PLAYER:
+            if result.value != cwm.get_rewards(state)[0]:
+                problems.append(f"position {i}: terminal value {result.value} != reward {cwm.get_rewards(state)[0]}")
+            continue
+        if result.depth == 0:
+            # Not a CWM problem: no iteration finished, so there is no best move to check.
+            logging.warning(f"Position {i}: timed out after {time_limit}s before depth 1 completed; skipped.")
+            continue
+        if result.best_action not in cwm.get_legal_actions(state):
+            problems.append(f"position {i}: best action {result.best_action!r} is not legal")
+            continue
+        if result.solved:
+            after = AlphaBetaSolver(cwm).solve(cwm.apply_action(state, result.best_action), time_limit=time_limit)
+            if after.solved and after.value != result.value:
+                problems.append(f"position {i}: value {result.value} but {after.value} after the best move")
+        logging.info(f"Position {i}: {result.summary()}")
+    return problems
+
+
+if __name__ == "__main__":
+    from cwm import load_cwm
+    from games import GAMES
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    for game_name in ("tic_tac_toe", "isolation", "breakthrough"):
+        cwm = load_cwm(game_name)
+        with open(GAMES[game_name].tests_path, "r") as f:
+            states = positions_from_tests(f.read())
+        problems = validate_positions(cwm, states)
+        print(f"{game_name}: {len(states)} distinct test positions, {len(problems)} problems")
+        for problem in problems:
+            print(f"  {problem}")
+        result = AlphaBetaSolver(cwm).solve(GAMES[game_name].initial_state(), time_limit=10.0)
+        print(f"  initial state: {result.summary()}")
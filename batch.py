@@ -0,0 +1,174 @@
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from tqdm import tqdm
+
+from games import GAMES
+from main import load_file, save_file, setup_logging
+from llm_client import LLMClient
+from llm_cache import ResponseCache
+from manifest import build_manifest, reuse_verified, save_manifest
+from rate_limit import RateLimiter, CostBudget, BudgetExceededError
+from sandbox import SandboxedExecutor
+from synthesizer import CWMSynthesizer
+
+
+@dataclass
+class BatchJob:
+    game: str
+    seed: int = 0
+
+
+@dataclass
+class JobResult:
+    game: str
+    seed: int
+    passed: bool
+    attempts: int
+    latency: float
+    prompt_tokens: int
+    completion_tokens: int
+    cost_usd: float
+    error: str = ""
+    reused: bool = False  # The stored artifact was re-verified instead of synthesized
+
+
+async def run_job(
+    job: BatchJob,
+    scheduler: asyncio.Semaphore,
+    executor: SandboxedExecutor,
+    cache: Optional[ResponseCache],
+    rate_limiter: RateLimiter,
+    budget: CostBudget,
+    num_candidates: int,
+    max_retries: int,
+    reuse: bool = True,
+    base_url: Optional[str] = None,
+    perf_gate: bool = False,
+) -> Tuple[JobResult, str, Dict[str, Any]]:
+    """Runs one synthesis job; returns its result, the verified code ("" on failure) and its manifest."""
+    spec = GAMES[job.game]
+    rules = load_file(spec.rules_path)
+    tests = load_file(spec.tests_path)
+    # Same floor and manifest as main.run_pipeline, so artifacts are interchangeable between the two.
+    perf_floor = spec.min_rollouts_per_sec if perf_gate else None
+
+    # Each job gets its own client (for per-job usage) but shares the limiter and budget.
+    llm = LLMClient(cache=cache, rate_limiter=rate_limiter, budget=budget, seed=job.seed, base_url=base_url)
+    synthesizer = CWMSynthesizer(llm=llm, executor=executor)
+    manifest = build_manifest(rules, tests, synthesizer.prompt_template(spec.info_type), llm.model, perf_floor)
+
+    code, error, reused = "", "", False
+    async with scheduler:
+        start = time.perf_counter()
+        if reuse:
+            code = await asyncio.to_thread(
+                reuse_verified, spec.output_path, manifest, executor, tests, spec.initial_state()
+            ) or ""
+            reused = bool(code)
+        try:
+            if not reused:
+                code = await synthesizer.asynthesize(
+                    job.game, rules, tests, spec.info_type, max_retries, num_candidates,
+                    perf_floor, spec.initial_state(),
+                )
+        except BudgetExceededError as e:
+            error = str(e)
+        latency = time.perf_counter() - start
+
+    return JobResult(
+        game=job.game,
+        seed=job.seed,
+        passed=bool(code),
+        attempts=1 if reused else synthesizer.attempts,
+        latency=latency,
+        prompt_tokens=llm.usage["prompt_tokens"],
+        completion_tokens=llm.usage["completion_tokens"],
+        cost_usd=llm.usage["cost_usd"],
+        error=error or ("" if code else "synthesis failed"),
+        reused=reused,
+    ), code, manifest
+
+
+async def run_batch(
+    games: List[str],
+    seeds: int = 1,
+    concurrency: int = 4,
+    requests_per_minute: float = 500,
+    tokens_per_minute: float = 30000,
+    max_cost_usd: float = 5.0,
+    num_candidates: int = 1,
+    max_retries: int = 2,
+    use_cache: bool = True,
+    reuse: bool = True,
+    perf_gate: bool = False,
+) -> List[JobResult]:
+    """
+    Synthesizes every (game, seed) pair concurrently. A shared semaphore bounds the
+    number of jobs in flight, one RateLimiter enforces RPM/TPM across all of them,
+    and one CostBudget stops new LLM calls once the spend limit is reached.
+    The first passing seed of each game is saved to its results/ file with a
+    manifest; with reuse, games whose manifest still matches are only re-verified.
+    perf_gate applies each game's throughput floor, as in main.run_pipeline.
+    """
+    jobs = [BatchJob(game, seed) for game in games for seed in range(seeds)]
+    scheduler = asyncio.Semaphore(concurrency)
+    rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    budget = CostBudget(max_cost_usd)
+    cache = ResponseCache("cache/llm") if use_cache else None
+    os.makedirs("results", exist_ok=True)
+
+    results = []
+    saved = set()
+    with SandboxedExecutor(timeout=30.0) as executor, tqdm(total=len(jobs), desc="Synthesizing") as progress:
+        tasks = [
+            asyncio.create_task(run_job(
+                job, scheduler, executor, cache, rate_limiter, budget, num_candidates, max_retries, reuse,
+                perf_gate=perf_gate,
+            ))
+            for job in jobs
+        ]
+        for next_done in asyncio.as_completed(tasks):
+            result, code, manifest = await next_done
+            results.append(result)
+            if result.passed and not result.reused and result.game not in saved:
+                output_path = GAMES[result.game].output_path
+                save_file(output_path, code)
+                save_manifest(output_path, manifest, code)
+                saved.add(result.game)
+            progress.set_postfix(cost=f"${budget.spent_usd:.3f}")
+            progress.update(1)
+
+    results.sort(key=lambda r: (r.game, r.seed))
+    return results
+
+
+def format_summary(results: List[JobResult]) -> str:
+    header = f"{'game':<14}{'seed':>5}{'status':>8}{'attempts':>10}{'latency_s':>11}{'prompt_tok':>12}{'compl_tok':>11}{'cost_usd':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        status = ("REUSED" if r.reused else "PASS") if r.passed else "FAIL"
+        lines.append(
+            f"{r.game:<14}{r.seed:>5}{status:>8}{r.attempts:>10}{r.latency:>11.1f}"
+            f"{r.prompt_tokens:>12}{r.completion_tokens:>11}{r.cost_usd:>10.4f}"
+        )
+    passed = sum(r.passed for r in results)
+    total_tokens = sum(r.prompt_tokens + r.completion_tokens for r in results)
+    total_cost = sum(r.cost_usd for r in results)
+    lines.append("-" * len(header))
+    lines.append(f"{passed}/{len(results)} passed, {total_tokens} tokens, ${total_cost:.4f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    setup_logging()
+    games_to_run = list(GAMES)  # Options: any subset of games.GAMES
+    seeds = 2  # Independent synthesis runs per game
+    results = asyncio.run(run_batch(games_to_run, seeds=seeds, concurrency=4, max_cost_usd=5.0))
+    summary = format_summary(results)
+    logging.info(f"Batch summary:\n{summary}")
+    print(summary)
@@ -0,0 +1,188 @@
+import time
+import random
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from cwm import CWM
+from game_tree import canonical_key
+
+History = Tuple[str, ...]
+
+
+@dataclass
+class BeliefSet:
+    """Consistent worlds found so far for one (observation history, player) pair."""
+    worlds: Dict[History, int] = field(default_factory=dict)  # History -> times it was proposed and accepted
+    states: Dict[History, Dict[str, Any]] = field(default_factory=dict)  # History -> state it leads to
+    rejects: Set[History] = field(default_factory=set)
+    stale_proposals: int = 0  # Consecutive proposals that found no new world
+    complete: bool = False  # The world set is saturated; sample from it without proposing
+
+
+class BeliefSampler:
+    """
+    Batched determinization on top of a CWM's resample_history.
+
+    Each proposal from resample_history is replayed from the root state and
+    accepted only if it reproduces the player's observations. Accepted worlds
+    (with their states) and rejected histories are memoized per observation
+    history, so repeated proposals cost a dict lookup instead of a replay. Once
+    saturation consecutive proposals bring no new world, the set is treated as
+    complete and further samples are drawn from it, weighted by how often each
+    world was proposed.
+    """
+
+    def __init__(self, cwm: CWM, root_state: Dict[str, Any], seed: int = 0, saturation: int = 200, max_sets: int = 10000):
+        if cwm.resample_history is None:
+            raise ValueError("BeliefSampler needs a CWM that defines resample_history.")
+        self.cwm = cwm
+        self.root_state = root_state
+        self.rng = random.Random(seed)
+        self.saturation = saturation
+        self.max_sets = max_sets
+        self.beliefs: Dict[Hashable, BeliefSet] = {}
+
+        self.samples = 0
+        self.proposals = 0
+        self.rejections = 0
+        self.replays = 0
+        self.elapsed = 0.0
+
+    @property
+    def samples_per_sec(self) -> float:
+        return self.samples / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def rejection_rate(self) -> float:
+        return self.rejections / self.proposals if self.proposals else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "proposals": self.proposals,
+            "replays": self.replays,
+            "rejection_rate": round(self.rejection_rate, 4),
+            "samples_per_sec": round(self.samples_per_sec, 1),
+            "cached_sets": len(self.beliefs),
+        }
+
+    def sample(self, obs_history: List[Any], player_id: int, k: int = 1, max_proposals: Optional[int] = None) -> List[List[str]]:
+        """Returns k action histories consistent with player_id's observation history."""
+        return [list(h) for h in self._sample(obs_history, player_id, k, max_proposals)[0]]
+
+    def sample_states(self, obs_history: List[Any], player_id: int, k: int = 1, max_proposals: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Like sample(), but returns the determinized states the histories lead to.
+        States are cached and shared between samples, so treat them as read-only.
+        """
+        histories, belief = self._sample(obs_history, player_id, k, max_proposals)
+        return [belief.states[h] for h in histories]
+
+    def worlds(self, obs_history: List[Any], player_id: int) -> List[List[str]]:
+        """The distinct consistent histories discovered so far."""
+        return [list(h) for h in self._belief(obs_history, player_id).worlds]
+
+    def _belief(self, obs_history: List[Any], player_id: int) -> BeliefSet:
+        key = canonical_key((obs_history, player_id))
+        belief = self.beliefs.get(key)
+        if belief is None:
+            if len(self.beliefs) >= self.max_sets:
+                self.beliefs.pop(next(iter(self.beliefs)))
+            belief = self.beliefs[key] = BeliefSet()
+        return belief
+
+    def _sample(self, obs_history: List[Any], player_id: int, k: int, max_proposals: Optional[int]):
+        start = time.perf_counter()
+        belief = self._belief(obs_history, player_id)
+        max_proposals = max_proposals if max_proposals is not None else 100 * k
+        drawn: List[History] = []
+
+        proposals = 0
+        while len(drawn) < k and not belief.complete and proposals < max_proposals:
+            proposals += 1
+            history = self._propose(belief, obs_history, player_id)
+            if history is not None:
+                drawn.append(history)
+
+        if len(drawn) < k and belief.worlds:
+            population = list(belief.worlds)
+            weights = [belief.worlds[h] for h in population]
+            drawn.extend(self.rng.choices(population, weights=weights, k=k - len(drawn)))
+        if len(drawn) < k:
+            logging.warning(f"No consistent world found for player {player_id} after {proposals} proposals.")
+
+        self.samples += len(drawn)
+        self.elapsed += time.perf_counter() - start
+        return drawn, belief
+
+    def _propose(self, belief: BeliefSet, obs_history: List[Any], player_id: int) -> Optional[History]:
+        self.proposals += 1
+        try:
+            history = tuple(self.cwm.resample_history(obs_history, player_id))
+        except Exception:
+            self.rejections += 1
+            return None
+
+        if history in belief.worlds:
+            belief.worlds[history] += 1
+            self._mark_stale(belief)
+            return history
+        if history in belief.rejects:
+            self.rejections += 1
+            self._mark_stale(belief)
+            return None
+
+        state = self._replay(history, obs_history, player_id)
+        if state is None:
+            belief.rejects.add(history)
+            self.rejections += 1
+            return None
+        belief.worlds[history] = 1
+        belief.states[history] = state
+        belief.stale_proposals = 0
+        return history
+
+    def _mark_stale(self, belief: BeliefSet):
+        belief.stale_proposals += 1
+        if belief.stale_proposals >= self.saturation:
+            belief.complete = True
+
+    def _replay(self, history: History, obs_history: List[Any], player_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Replays history from the root. It is consistent if the player's
+        observations along the way contain obs_history in order, ending with
+        the current observation. Returns the final state, or None if inconsistent.
+        """
+        self.replays += 1
+        if not obs_history:
+            return None
+        earlier = obs_history[:-1]
+        matched = 0
+        state = self.root_state
+        try:
+            for action in history:
+                if action not in self.cwm.get_legal_actions(state):
+                    return None
+                if matched < len(earlier) and self.cwm.get_observations(state)[player_id] == earlier[matched]:
+                    matched += 1
+                state = self.cwm.apply_action(state, action)
+            final = self.cwm.get_observations(state)[player_id]
+        except Exception:
+            return None
+        if matched == len(earlier) and final == obs_history[-1]:
+            return state
+        return None
+
+
+if __name__ == "__main__":
+    from cwm import load_cwm
+    from games import GAMES
+
+    # The consistency setup of test_resample_history_consistency: player 0 holds J, P0 checked.
+    sampler = BeliefSampler(load_cwm("kuhn_poker"), GAMES["kuhn_poker"].initial_state())
+    p0_obs = {"private_card": "J", "history": ["check"], "current_player": 1}
+    for _ in range(100):
+        histories = sampler.sample([p0_obs], 0, k=100)
+    print(f"worlds: {sampler.worlds([p0_obs], 0)}")
+    print(sampler.stats())
@@ -0,0 +1,281 @@
+import os
+import copy
+import json
+import time
+import pstats
+import random
+import cProfile
+import hashlib
+import logging
+import tracemalloc
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from cwm import CWM, TERMINAL_PLAYER
+from inplace import allocations_per_step, check_inplace
+from metrics import percentile
+
+HISTORY_PATH = "results/benchmark_history.json"
+
+
+@dataclass
+class BenchmarkResult:
+    game: str
+    cwm_sha256: str
+    rollouts: int
+    steps: int
+    rollouts_per_sec: float
+    apply_action_per_sec: float
+    get_legal_actions_per_sec: float
+    apply_action_p50_us: float
+    apply_action_p99_us: float
+    get_legal_actions_p50_us: float
+    get_legal_actions_p99_us: float
+    peak_memory_kb: float
+    allocations_per_step: float = 0.0
+    # Filled in when the CWM defines apply_action_inplace/undo_action (see inplace.py)
+    inplace_rollouts_per_sec: Optional[float] = None
+    inplace_allocations_per_step: Optional[float] = None
+    inplace_problems: Optional[int] = None
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+
+
+def random_rollout(cwm: CWM, state: Dict[str, Any], rng: random.Random, max_steps: int = 1000, inplace: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Plays uniformly random actions (chance included) until a terminal state.
+    Uses the in-place API on a copy of state when the CWM has it, unless inplace is False.
+    """
+    if inplace is None:
+        inplace = cwm.has_inplace
+    if inplace:
+        state = copy.deepcopy(state)
+    for _ in range(max_steps):
+        if cwm.get_current_player(state) == TERMINAL_PLAYER:
+            break
+        actions = cwm.get_legal_actions(state)
+        if not actions:
+            break
+        if inplace:
+            cwm.apply_action_inplace(state, rng.choice(actions))
+        else:
+            state = cwm.apply_action(state, rng.choice(actions))
+    return state
+
+
+def _timed_rollouts(cwm: CWM, root_state: Dict[str, Any], num_rollouts: int, seed: int, max_steps: int):
+    apply_times: List[float] = []
+    legal_times: List[float] = []
+    rng = random.Random(seed)
+    clock = time.perf_counter
+
+    start = clock()
+    for _ in range(num_rollouts):
+        state = root_state
+        for _ in range(max_steps):
+            if cwm.get_current_player(state) == TERMINAL_PLAYER:
+                break
+            t0 = clock()
+            actions = cwm.get_legal_actions(state)
+            t1 = clock()
+            legal_times.append(t1 - t0)
+            if not actions:
+                break
+            action = rng.choice(actions)
+            t0 = clock()
+            state = cwm.apply_action(state, action)
+            apply_times.append(clock() - t0)
+    return clock() - start, apply_times, legal_times
+
+
+def benchmark_cwm(
+    cwm: CWM,
+    root_state: Dict[str, Any],
+    game_name: str = "",
+    num_rollouts: int = 200,
+    seed: int = 0,
+    max_steps: int = 1000,
+) -> BenchmarkResult:
+    """
+    Measures call throughput, per-call latency and peak memory of seeded random
+    rollouts. Per-call latencies are always those of the pure apply_action; a
+    CWM with the in-place API is also cross-checked, timed and compared on
+    allocations per step through it.
+    """
+    elapsed, apply_times, legal_times = _timed_rollouts(cwm, root_state, num_rollouts, seed, max_steps)
+
+    # Peak memory is measured on a separate, shorter pass because tracemalloc slows every allocation.
+    tracemalloc.start()
+    rng = random.Random(seed)
+    for _ in range(max(1, num_rollouts // 10)):
+        random_rollout(cwm, root_state, rng, max_steps)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    extra: Dict[str, Any] = {"allocations_per_step": allocations_per_step(cwm, root_state, seed=seed)}
+    if cwm.has_inplace:
+        rng = random.Random(seed)
+        start = time.perf_counter()
+        for _ in range(num_rollouts):
+            random_rollout(cwm, root_state, rng, max_steps, inplace=True)
+        inplace_elapsed = time.perf_counter() - start
+        extra.update(
+            inplace_rollouts_per_sec=num_rollouts / inplace_elapsed if inplace_elapsed else 0.0,
+            inplace_allocations_per_step=allocations_per_step(cwm, root_state, seed=seed, inplace=True),
+            inplace_problems=len(check_inplace(cwm, root_state, seed=seed, max_steps=max_steps)),
+        )
+
+    to_us = 1e6
+    return BenchmarkResult(
+        game=game_name,
+        cwm_sha256=hashlib.sha256(cwm.source.encode("utf-8")).hexdigest(),
+        rollouts=num_rollouts,
+        steps=len(apply_times),
+        rollouts_per_sec=num_rollouts / elapsed if elapsed else 0.0,
+        apply_action_per_sec=len(apply_times) / sum(apply_times) if apply_times else 0.0,
+        get_legal_actions_per_sec=len(legal_times) / sum(legal_times) if legal_times else 0.0,
+        apply_action_p50_us=percentile(apply_times, 50) * to_us,
+        apply_action_p99_us=percentile(apply_times, 99) * to_us,
+        get_legal_actions_p50_us=percentile(legal_times, 50) * to_us,
+        get_legal_actions_p99_us=percentile(legal_times, 99) * to_us,
+        peak_memory_kb=peak / 1024,
+        **extra,
+    )
+
+
+def profile_cwm(
+    cwm: CWM,
+    root_state: Dict[str, Any],
+    num_rollouts: int = 100,
+    seed: int = 0,
+    top: int = 8,
+) -> Dict[str, Any]:
+    """
+    Returns rollouts/sec from an unprofiled pass plus a text report of the
+    hottest functions (by own time) from a cProfile pass over the same rollouts.
+    Always measures the pure apply_action, which is the path the tests verify.
+    """
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for _ in range(num_rollouts):
+        random_rollout(cwm, root_state, rng, inplace=False)
+    elapsed = time.perf_counter() - start
+
+    profiler = cProfile.Profile()
+    rng = random.Random(seed)
+    profiler.enable()
+    for _ in range(num_rollouts):
+        random_rollout(cwm, root_state, rng, inplace=False)
+    profiler.disable()
+
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)
+    lines = [f"{'function':<40}{'calls':>10}{'own ms':>10}{'total ms':>10}"]
+    for (filename, line, name), (_, calls, own, total, _) in rows:
+        if filename == __file__ or name.startswith("<built-in method _lsprof"):
+            continue
+        where = name if filename == "~" else f"{os.path.basename(filename)}:{line}({name})"
+        lines.append(f"{where[:40]:<40}{calls:>10}{own * 1000:>10.1f}{total * 1000:>10.1f}")
+        if len(lines) > top:
+            break
+
+    return {
+        "rollouts_per_sec": num_rollouts / elapsed if elapsed else 0.0,
+        "profile": "\n".join(lines),
+    }
+
+
+def load_history(path: str = HISTORY_PATH) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def append_history(results: List[BenchmarkResult], path: str = HISTORY_PATH):
+    history = load_history(path)
+    history.extend(asdict(r) for r in results)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(history, f, indent=2)
+
+
+def find_regression(
+    result: BenchmarkResult,
+    history: List[Dict[str, Any]],
+    threshold: float = 0.3,
+) -> Optional[str]:
+    """
+    Compares against the most recent entry for the same game produced by a
+    different CWM. Returns a message if rollouts/sec dropped by more than threshold.
+    """
+    previous = [
+        h for h in history
+        if h["game"] == result.game and h["cwm_sha256"] != result.cwm_sha256
+    ]
+    if not previous:
+        return None
+    baseline = previous[-1]
+    if baseline["rollouts_per_sec"] <= 0:
+        return None
+    ratio = result.rollouts_per_sec / baseline["rollouts_per_sec"]
+    if ratio < 1.0 - threshold:
+        return (
+            f"{result.game}: rollouts/sec fell to {result.rollouts_per_sec:.1f} from "
+            f"{baseline['rollouts_per_sec']:.1f} ({ratio:.0%} of the previous CWM, {baseline['timestamp']})."
+        )
+    return None
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    header = (
+        f"{'game':<14}{'rollouts/s':>12}{'apply/s':>11}{'legal/s':>11}"
+        f"{'apply p50/p99 us':>20}{'legal p50/p99 us':>20}{'peak KB':>10}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.game:<14}{r.rollouts_per_sec:>12.1f}{r.apply_action_per_sec:>11.0f}{r.get_legal_actions_per_sec:>11.0f}"
+            f"{f'{r.apply_action_p50_us:.1f}/{r.apply_action_p99_us:.1f}':>20}"
+            f"{f'{r.get_legal_actions_p50_us:.1f}/{r.get_legal_actions_p99_us:.1f}':>20}"
+            f"{r.peak_memory_kb:>10.1f}"
+        )
+    for r in results:
+        if r.inplace_rollouts_per_sec is None:
+            continue
+        saved = r.allocations_per_step - r.inplace_allocations_per_step
+        lines.append(
+            f"{r.game}: in-place API {r.inplace_rollouts_per_sec:.1f} rollouts/s, "
+            f"{r.inplace_allocations_per_step:.1f} vs {r.allocations_per_step:.1f} allocations/step "
+            f"({saved:.1f} fewer), {r.inplace_problems} cross-check failures"
+        )
+    return "\n".join(lines)
+
+
+def run_benchmarks(games: List[str], num_rollouts: int = 200, seed: int = 0, threshold: float = 0.3) -> List[BenchmarkResult]:
+    """Benchmarks every game whose results/generated_<game>.py exists and records the history."""
+    from games import GAMES
+
+    history = load_history()
+    results = []
+    for game_name in games:
+        path = GAMES[game_name].output_path
+        if not os.path.exists(path):
+            logging.warning(f"Skipping {game_name}: {path} not found.")
+            continue
+        cwm = CWM.from_file(path)
+        result = benchmark_cwm(cwm, GAMES[game_name].initial_state(), game_name, num_rollouts, seed)
+        regression = find_regression(result, history, threshold)
+        if regression:
+            logging.warning(f"Performance regression: {regression}")
+        results.append(result)
+
+    append_history(results)
+    return results
+
+
+if __name__ == "__main__":
+    from games import GAMES
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    print(format_results(run_benchmarks(list(GAMES))))
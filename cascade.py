@@ -0,0 +1,144 @@
+import os
+import json
+import logging
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from llm_client import LLMClient
+
+STATS_PATH = "results/cascade_stats.json"
+
+
+@dataclass
+class Tier:
+    model: str
+    temperature: float = 0.7
+    attempts: int = 2  # Validations in this tier before escalating to the next one
+    refine_model: Optional[str] = None  # Model for this tier's refinements; defaults to model
+
+    def __post_init__(self):
+        if self.attempts < 1:
+            raise ValueError(f"Tier {self.model} needs at least one attempt, got {self.attempts}.")
+
+
+# Cheap and fast first; the stronger model only sees games the cheap one could not solve.
+DEFAULT_TIERS = [
+    Tier("gpt-4o-mini", temperature=0.7, attempts=2),
+    Tier("gpt-4o", temperature=0.7, attempts=3),
+]
+
+
+@dataclass
+class TierRun:
+    """Outcome of one tier on one synthesis run, appended to the stats file."""
+    game: str
+    tier: int
+    model: str
+    refine_model: str
+    success: bool
+    validations: int
+    latency: float
+    cost_usd: float
+    prompt_tokens: int
+    completion_tokens: int
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+
+
+class ModelCascade:
+    """
+    Per-tier LLM clients for CWMSynthesizer. Each tier's clients copy the
+    base client's cache, rate limiter, budget, seed and streaming settings,
+    and share its usage totals, so job-level accounting is unchanged.
+    """
+
+    def __init__(self, tiers: Optional[List[Tier]] = None, base: Optional[LLMClient] = None, stats_path: Optional[str] = STATS_PATH):
+        self.tiers = list(tiers or DEFAULT_TIERS)
+        if not self.tiers:
+            raise ValueError("A model cascade needs at least one tier.")
+        self.base = base or LLMClient(model=self.tiers[-1].model)
+        self.stats_path = stats_path
+        self._clients: Dict[tuple, LLMClient] = {}
+
+    def describe(self) -> str:
+        return " > ".join(
+            t.model if not t.refine_model else f"{t.model}/{t.refine_model}" for t in self.tiers
+        )
+
+    def client(self, model: str, temperature: float) -> LLMClient:
+        key = (model, temperature)
+        if key not in self._clients:
+            base = self.base
+            client = LLMClient(
+                model=model, temperature=temperature, cache=base.cache, rate_limiter=base.rate_limiter,
+                budget=base.budget, seed=base.seed, stream=base.stream, max_response_chars=base.max_response_chars,
+                base_url=base.base_url,
+            )
+            client.usage = base.usage
+            self._clients[key] = client
+        return self._clients[key]
+
+    def record(self, run: TierRun):
+        logging.info(
+            f"Tier {run.tier} ({run.model}): {'passed' if run.success else 'failed'} after {run.validations} "
+            f"validations, {run.latency:.1f}s, ${run.cost_usd:.4f}."
+        )
+        if self.stats_path is None:
+            return
+        history = load_stats(self.stats_path)
+        history.append(asdict(run))
+        os.makedirs(os.path.dirname(self.stats_path) or ".", exist_ok=True)
+        with open(self.stats_path, "w") as f:
+            json.dump(history, f, indent=2)
+
+    def tuned(self, game_name: str, min_runs: int = 3, min_success: float = 0.2) -> "ModelCascade":
+        """
+        A copy without the leading tiers that rarely solve game_name: tiers with
+        at least min_runs recorded runs and a success rate below min_success are
+        skipped. The last tier is always kept.
+        """
+        stats = tier_stats(load_stats(self.stats_path) if self.stats_path else [], game_name)
+        tiers = list(self.tiers)
+        while len(tiers) > 1:
+            s = stats.get(tiers[0].model)
+            if s is None or s["runs"] < min_runs or s["success_rate"] >= min_success:
+                break
+            logging.info(f"Skipping {tiers[0].model} for {game_name}: {s['success_rate']:.0%} success over {s['runs']} runs.")
+            tiers.pop(0)
+        return type(self)(tiers, self.base, self.stats_path)
+
+
+def load_stats(path: str = STATS_PATH) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def tier_stats(history: List[Dict[str, Any]], game_name: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """Per model: runs, success rate and mean latency/cost per run, optionally for one game."""
+    stats: Dict[str, Dict[str, float]] = {}
+    for run in history:
+        if game_name is not None and run["game"] != game_name:
+            continue
+        s = stats.setdefault(run["model"], {"runs": 0, "successes": 0, "latency": 0.0, "cost_usd": 0.0})
+        s["runs"] += 1
+        s["successes"] += run["success"]
+        s["latency"] += run["latency"]
+        s["cost_usd"] += run["cost_usd"]
+    for s in stats.values():
+        s["success_rate"] = s["successes"] / s["runs"]
+        s["mean_latency"] = s.pop("latency") / s["runs"]
+        s["mean_cost_usd"] = s.pop("cost_usd") / s["runs"]
+    return stats
+
+
+if __name__ == "__main__":
+    history = load_stats()
+    for game_name in sorted({run["game"] for run in history}):
+        print(game_name)
+        for model, s in tier_stats(history, game_name).items():
+            print(
+                f"  {model:<16}{s['runs']:>4} runs  {s['success_rate']:>5.0%} success  "
+                f"{s['mean_latency']:>7.1f}s  ${s['mean_cost_usd']:.4f}"
+            )
@@ -0,0 +1,313 @@
+import time
+import logging
+from typing import Any, Dict, Hashable, List, Tuple
+
+import numpy as np
+
+from cwm import CWM, CHANCE_PLAYER, TERMINAL_PLAYER
+from game_tree import canonical_key
+
+
+class InfoStateTree:
+    """
+    The full two-player game tree of a CWM, flattened into NumPy arrays.
+
+    Nodes are numbered in breadth-first order, so every parent precedes its
+    children and each depth level is a contiguous slice. Player nodes are
+    grouped into information sets keyed by (player, observation of that player).
+    Chance nodes are assumed uniform over their legal actions, since the CWM
+    API does not expose chance probabilities.
+    """
+
+    def __init__(self, cwm: CWM, root_state: Dict[str, Any], max_nodes: int = 1_000_000):
+        self.cwm = cwm
+        start = time.perf_counter()
+
+        parents: List[int] = [-1]
+        slots: List[int] = [-1]
+        players: List[int] = []
+        infosets: List[int] = []
+        chance_probs: List[float] = [1.0]
+        utilities: List[List[float]] = []
+        children: List[List[int]] = []
+        level_starts: List[int] = [0]
+
+        self.infoset_keys: List[Hashable] = []
+        self.infoset_actions: List[List[str]] = []
+        self.infoset_player: List[int] = []
+        infoset_index: Dict[Hashable, int] = {}
+
+        states = [root_state]
+        frontier_end = 1
+        n = 0
+        while n < len(states):
+            if n == frontier_end:
+                level_starts.append(n)
+                frontier_end = len(states)
+
+            state = states[n]
+            player = cwm.get_current_player(state)
+            players.append(player)
+
+            if player == TERMINAL_PLAYER:
+                infosets.append(-1)
+                utilities.append(list(cwm.get_rewards(state)))
+                children.append([])
+                states[n] = None
+                n += 1
+                continue
+
+            utilities.append([0.0, 0.0])
+            actions = list(cwm.get_legal_actions(state))
+            if not actions:
+                raise ValueError(f"Non-terminal node {n} has no legal actions: {state}")
+
+            if player == CHANCE_PLAYER:
+                infosets.append(-1)
+                probs = [1.0 / len(actions)] * len(actions)
+            else:
+                key = (player, canonical_key(cwm.get_observations(state)[player]))
+                if key not in infoset_index:
+                    infoset_index[key] = len(self.infoset_keys)
+                    self.infoset_keys.append(key)
+                    self.infoset_actions.append(actions)
+                    self.infoset_player.append(player)
+                infoset = infoset_index[key]
+                if set(actions) != set(self.infoset_actions[infoset]):
+                    raise ValueError(f"Legal actions differ within information set {key}.")
+                actions = self.infoset_actions[infoset]
+                infosets.append(infoset)
+                probs = [1.0] * len(actions)
+
+            child_ids = []
+            for slot, (action, prob) in enumerate(zip(actions, probs)):
+                child_ids.append(len(states))
+                states.append(cwm.apply_action(state, action))
+                parents.append(n)
+                slots.append(slot)
+                chance_probs.append(prob)
+            children.append(child_ids)
+            if len(states) > max_nodes:
+                raise ValueError(f"Game tree exceeds max_nodes={max_nodes}.")
+            states[n] = None
+            n += 1
+        level_starts.append(n)
+
+        self.num_nodes = n
+        self.num_infosets = len(self.infoset_keys)
+        self.max_actions = max((len(a) for a in self.infoset_actions), default=1)
+        self.parent = np.array(parents, dtype=np.int64)
+        self.slot = np.array(slots, dtype=np.int64)
+        self.player = np.array(players, dtype=np.int64)
+        self.infoset = np.array(infosets, dtype=np.int64)
+        self.chance_prob = np.array(chance_probs, dtype=np.float64)
+        self.utility = np.array(utilities, dtype=np.float64)
+        self.children = children
+        self.levels = [np.arange(a, b) for a, b in zip(level_starts, level_starts[1:]) if b > a]
+
+        self.action_mask = np.zeros((self.num_infosets, self.max_actions), dtype=bool)
+        for i, actions in enumerate(self.infoset_actions):
+            self.action_mask[i, :len(actions)] = True
+
+        # Edge views (every non-root node is the child end of one edge).
+        edges = np.arange(1, n)
+        self.edge_child = edges
+        self.edge_parent = self.parent[edges]
+        self.edge_slot = self.slot[edges]
+        self.edge_actor = self.player[self.edge_parent]
+        self.edge_infoset = self.infoset[self.edge_parent]
+        self.edge_is_decision = self.edge_actor >= 0
+
+        # One representative node per information set (own reach is equal across it).
+        self.infoset_node = np.zeros(self.num_infosets, dtype=np.int64)
+        decision_nodes = np.nonzero(self.infoset >= 0)[0]
+        self.infoset_node[self.infoset[decision_nodes[::-1]]] = decision_nodes[::-1]
+        self.infoset_player_arr = np.array(self.infoset_player, dtype=np.int64)
+
+        self.build_time = time.perf_counter() - start
+        logging.info(
+            f"Built information-state tree: {self.num_nodes} nodes, {self.num_infosets} info sets "
+            f"in {self.build_time:.3f}s."
+        )
+
+    def edge_probs(self, strategy: np.ndarray) -> np.ndarray:
+        """Probability of each edge under a behaviour strategy (chance edges stay uniform)."""
+        probs = self.chance_prob[self.edge_child].copy()
+        decision = self.edge_is_decision
+        probs[decision] = strategy[self.edge_infoset[decision], self.edge_slot[decision]]
+        return probs
+
+    def reach(self, edge_prob: np.ndarray) -> np.ndarray:
+        """Per-node reach contributions, columns (player 0, player 1, chance)."""
+        reach = np.ones((self.num_nodes, 3))
+        column = np.where(self.edge_actor == CHANCE_PLAYER, 2, self.edge_actor)
+        factors = np.ones((self.num_nodes, 3))
+        factors[self.edge_child, column] = edge_prob
+        for level in self.levels[1:]:
+            reach[level] = reach[self.parent[level]] * factors[level]
+        return reach
+
+    def values(self, edge_prob: np.ndarray) -> np.ndarray:
+        """Expected utility of every node for both players, by a backward pass over levels."""
+        values = np.where(self.player[:, None] == TERMINAL_PLAYER, self.utility, 0.0)
+        weights = np.zeros(self.num_nodes)
+        weights[self.edge_child] = edge_prob
+        for level in reversed(self.levels[1:]):
+            np.add.at(values, self.parent[level], weights[level, None] * values[level])
+        return values
+
+
+def regret_matching(regrets: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Vectorized regret matching over all information sets at once."""
+    positive = np.where(mask, np.maximum(regrets, 0.0), 0.0)
+    totals = positive.sum(axis=1, keepdims=True)
+    uniform = mask / mask.sum(axis=1, keepdims=True)
+    return np.where(totals > 0, positive / np.where(totals > 0, totals, 1.0), uniform)
+
+
+class CFRSolver:
+    """
+    Tabular CFR / CFR+ on an InfoStateTree with simultaneous updates.
+
+    Regrets and strategy sums live in (num_infosets, max_actions) arrays. Each
+    iteration is a forward reach pass and a backward value pass over the tree
+    levels, followed by one vectorized regret-matching update. "cfr+" floors
+    regrets at zero and weights the average strategy linearly by iteration.
+    """
+
+    def __init__(self, tree: InfoStateTree, variant: str = "cfr+"):
+        if variant not in ("cfr", "cfr+"):
+            raise ValueError(f"Unsupported CFR variant '{variant}'. Expected 'cfr' or 'cfr+'.")
+        self.tree = tree
+        self.variant = variant
+        self.regrets = np.zeros((tree.num_infosets, tree.max_actions))
+        self.strategy_sum = np.zeros((tree.num_infosets, tree.max_actions))
+        self.iteration = 0
+        self.history: List[Tuple[int, float, float]] = []  # (iteration, elapsed seconds, exploitability)
+
+    def current_strategy(self) -> np.ndarray:
+        return regret_matching(self.regrets, self.tree.action_mask)
+
+    def average_strategy(self) -> np.ndarray:
+        mask = self.tree.action_mask
+        totals = self.strategy_sum.sum(axis=1, keepdims=True)
+        uniform = mask / mask.sum(axis=1, keepdims=True)
+        return np.where(totals > 0, self.strategy_sum / np.where(totals > 0, totals, 1.0), uniform)
+
+    def iterate(self):
+        tree = self.tree
+        self.iteration += 1
+        strategy = self.current_strategy()
+        edge_prob = tree.edge_probs(strategy)
+        reach = tree.reach(edge_prob)
+        values = tree.values(edge_prob)
+
+        # Instantaneous counterfactual regret of every decision edge.
+        decision = tree.edge_is_decision
+        parents = tree.edge_parent[decision]
+        actors = tree.edge_actor[decision]
+        opponent_reach = reach[parents, 1 - actors] * reach[parents, 2]
+        advantage = values[tree.edge_child[decision], actors] - values[parents, actors]
+        instant = np.zeros_like(self.regrets)
+        np.add.at(instant, (tree.edge_infoset[decision], tree.edge_slot[decision]), opponent_reach * advantage)
+
+        own_reach = reach[tree.infoset_node, tree.infoset_player_arr]
+        weight = self.iteration if self.variant == "cfr+" else 1.0
+        self.strategy_sum += weight * own_reach[:, None] * strategy
+
+        if self.variant == "cfr+":
+            self.regrets = np.maximum(self.regrets + instant, 0.0)
+        else:
+            self.regrets += instant
+
+    def solve(self, iterations: int, eval_every: int = 100) -> List[Tuple[int, float, float]]:
+        """Runs CFR iterations, recording exploitability every eval_every iterations."""
+        start = time.perf_counter()
+        iteration_time = 0.0
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            self.iterate()
+            iteration_time += time.perf_counter() - t0
+            if self.iteration % eval_every == 0 or self.iteration == iterations:
+                exploit = exploitability(self.tree, self.average_strategy())
+                self.history.append((self.iteration, time.perf_counter() - start, exploit))
+                logging.info(
+                    f"CFR iteration {self.iteration}: exploitability {exploit:.6f}, "
+                    f"{self.iteration / max(iteration_time, 1e-9):.0f} it/s"
+                )
+        self.iterations_per_sec = iterations / max(iteration_time, 1e-9)
+        return self.history
+
+    def average_policy(self) -> Dict[Hashable, Dict[str, float]]:
+        """Average strategy as {info set key: {action: probability}}."""
+        avg = self.average_strategy()
+        return {
+            key: dict(zip(actions, avg[i, :len(actions)].tolist()))
+            for i, (key, actions) in enumerate(zip(self.tree.infoset_keys, self.tree.infoset_actions))
+        }
+
+
+def best_response_value(tree: InfoStateTree, strategy: np.ndarray, br_player: int) -> float:
+    """Value for br_player of a best response against strategy (opponent fixed)."""
+    edge_prob = tree.edge_probs(strategy)
+    reach = tree.reach(edge_prob)
+    opponent_reach = reach[:, 1 - br_player] * reach[:, 2]
+    weights = np.zeros(tree.num_nodes)
+    weights[tree.edge_child] = edge_prob
+
+    infoset_nodes: Dict[int, List[int]] = {}
+    for node in np.nonzero(tree.player == br_player)[0]:
+        infoset_nodes.setdefault(int(tree.infoset[node]), []).append(int(node))
+
+    choice: Dict[int, int] = {}
+    memo: Dict[int, float] = {}
+
+    def value(node: int) -> float:
+        if node in memo:
+            return memo[node]
+        player = tree.player[node]
+        kids = tree.children[node]
+        if player == TERMINAL_PLAYER:
+            result = tree.utility[node, br_player]
+        elif player == br_player:
+            result = value(kids[choose(int(tree.infoset[node]))])
+        else:
+            result = sum(weights[k] * value(k) for k in kids)
+        memo[node] = result
+        return result
+
+    def choose(infoset: int) -> int:
+        if infoset not in choice:
+            num_actions = len(tree.infoset_actions[infoset])
+            q = np.zeros(num_actions)
+            for node in infoset_nodes[infoset]:
+                for a, child in enumerate(tree.children[node]):
+                    q[a] += opponent_reach[node] * value(child)
+            choice[infoset] = int(np.argmax(q))
+        return choice[infoset]
+
+    return value(0)
+
+
+def exploitability(tree: InfoStateTree, strategy: np.ndarray) -> float:
+    """NashConv / 2 for a two-player zero-sum game; 0 at a Nash equilibrium."""
+    return (best_response_value(tree, strategy, 0) + best_response_value(tree, strategy, 1)) / 2
+
+
+def expected_values(tree: InfoStateTree, strategy: np.ndarray) -> np.ndarray:
+    return tree.values(tree.edge_probs(strategy))[0]
+
+
+if __name__ == "__main__":
+    from cwm import load_cwm
+    from games import GAMES
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    game_name = "kuhn_poker"
+    tree = InfoStateTree(load_cwm(game_name), GAMES[game_name].initial_state())
+    solver = CFRSolver(tree, variant="cfr+")
+    solver.solve(iterations=2000, eval_every=200)
+    print(f"Iterations/sec: {solver.iterations_per_sec:.0f}")
+    print(f"Expected values under the average strategy: {expected_values(tree, solver.average_strategy())}")
+    for key, probs in solver.average_policy().items():
+        print(key, {a: round(p, 3) for a, p in probs.items()})
@@ -0,0 +1,62 @@
+from typing import Any, Callable, Dict, Optional
+
+REQUIRED_FUNCTIONS = (
+    "apply_action",
+    "get_current_player",
+    "get_player_name",
+    "get_rewards",
+    "get_legal_actions",
+    "get_observations",
+)
+
+CHANCE_PLAYER = -1
+TERMINAL_PLAYER = -4
+
+
+class CWM:
+    """
+    A loaded code world model: the functions defined by a synthesized module,
+    exposed as attributes (cwm.apply_action(state, action), ...).
+    """
+
+    def __init__(self, namespace: Dict[str, Any], source: str = ""):
+        missing = [name for name in REQUIRED_FUNCTIONS if not callable(namespace.get(name))]
+        if missing:
+            raise ValueError(f"CWM is missing required functions: {missing}")
+        self.namespace = namespace
+        self.source = source
+
+        self.apply_action: Callable = namespace["apply_action"]
+        self.get_current_player: Callable = namespace["get_current_player"]
+        self.get_player_name: Callable = namespace["get_player_name"]
+        self.get_rewards: Callable = namespace["get_rewards"]
+        self.get_legal_actions: Callable = namespace["get_legal_actions"]
+        self.get_observations: Callable = namespace["get_observations"]
+        self.resample_history: Optional[Callable] = namespace.get("resample_history")
+        # Optional in-place contract for search: apply_action_inplace(state, action) -> undo record,
+        # undo_action(state, undo) restores the state. See inplace.py for the cross-check harness.
+        self.apply_action_inplace: Optional[Callable] = namespace.get("apply_action_inplace")
+        self.undo_action: Optional[Callable] = namespace.get("undo_action")
+
+    @classmethod
+    def from_code(cls, code: str, filename: str = "<cwm>") -> "CWM":
+        namespace: Dict[str, Any] = {"__name__": "cwm"}
+        exec(compile(code, filename, "exec"), namespace)
+        return cls(namespace, code)
+
+    @classmethod
+    def from_file(cls, path: str) -> "CWM":
+        with open(path, "r") as f:
+            return cls.from_code(f.read(), path)
+
+    @property
+    def has_inplace(self) -> bool:
+        return callable(self.apply_action_inplace) and callable(self.undo_action)
+
+    def is_terminal(self, state) -> bool:
+        return self.get_current_player(state) == TERMINAL_PLAYER
+
+
+def load_cwm(game_name: str) -> CWM:
+    """Loads the verified CWM saved by run_pipeline for game_name."""
+    return CWM.from_file(f"results/generated_{game_name}.py")
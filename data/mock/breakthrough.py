@@ -0,0 +1,40 @@
+import copy
+def _winner(b):
+    if 'w' in b[20:25]: return 0
+    if 'b' in b[0:5]: return 1
+    if 'w' not in b: return 1
+    if 'b' not in b: return 0
+    return None
+def apply_action(state, action):
+    s = copy.deepcopy(state)
+    src, dst = action.split('->')
+    sr, sc = map(int, src.split(',')); dr, dc = map(int, dst.split(','))
+    s['board'][dr*5+dc] = s['board'][sr*5+sc]
+    s['board'][sr*5+sc] = '.'
+    s['current_player'] = 1 - s['current_player']
+    return s
+def get_current_player(state):
+    return -4 if _winner(state['board']) is not None else state['current_player']
+def get_player_name(p):
+    return {-1:'chance',-4:'terminal',0:'white',1:'black'}[p]
+def get_rewards(state):
+    w = _winner(state['board'])
+    if w is None: return [0.0, 0.0]
+    return [1.0, -1.0] if w == 0 else [-1.0, 1.0]
+def get_legal_actions(state):
+    if get_current_player(state) == -4: return []
+    p = state['current_player']; me = 'w' if p == 0 else 'b'; opp = 'b' if p == 0 else 'w'
+    d = 1 if p == 0 else -1
+    b = state['board']; out = []
+    for i, x in enumerate(b):
+        if x != me: continue
+        r, c = divmod(i, 5); nr = r + d
+        if not 0 <= nr < 5: continue
+        if b[nr*5+c] == '.': out.append(f"{r},{c}->{nr},{c}")
+        for dc in (-1, 1):
+            nc = c + dc
+            if 0 <= nc < 5 and b[nr*5+nc] == opp:
+                out.append(f"{r},{c}->{nr},{nc}")
+    return out
+def get_observations(state):
+    return [copy.deepcopy(state), copy.deepcopy(state)]
@@ -0,0 +1,23 @@
+import copy
+def apply_action(state, action):
+    s = copy.deepcopy(state)
+    s['board'][int(action)] = s['current_player']
+    s['current_player'] = 1 - s['current_player']
+    return s
+def get_legal_actions(state):
+    b = state['board']
+    out = []
+    for i in range(13):
+        if b[i] is None and (i == 0 or b[i-1] is None) and (i == 12 or b[i+1] is None):
+            out.append(str(i))
+    return out
+def get_current_player(state):
+    return -4 if not get_legal_actions(state) else state['current_player']
+def get_player_name(p):
+    return {-1:'chance',-4:'terminal'}.get(p, f'player_{p}')
+def get_rewards(state):
+    if get_legal_actions(state): return [0.0, 0.0]
+    loser = state['current_player']
+    return [-1.0, 1.0] if loser == 0 else [1.0, -1.0]
+def get_observations(state):
+    return [copy.deepcopy(state), copy.deepcopy(state)]
@@ -0,0 +1,58 @@
+import copy, random
+RANK = {'J': 0, 'Q': 1, 'K': 2}
+def _public(h):
+    return [a for a in h if not a.startswith('deal')]
+def apply_action(state, action):
+    s = copy.deepcopy(state)
+    if action.startswith('deal'):
+        card = action.split()[1]; p = int(action[-1])
+        s['hands'][p] = card; s['deck'].remove(card)
+        s['history'].append(action)
+        s['current_player'] = 0 if p == 1 else -1
+        return s
+    p = s['current_player']
+    if action in ('bet', 'call'): s['pot'][p] += 1.0
+    s['history'].append(action)
+    pub = _public(s['history'])
+    if pub in (['check','check'], ['bet','call'], ['check','bet','call'], ['bet','fold'], ['check','bet','fold']):
+        s['is_terminal'] = True; s['current_player'] = -4
+    else:
+        s['current_player'] = 1 - p
+    return s
+def get_current_player(state):
+    if state.get('is_terminal') or _public(state['history']) in (['check','check'], ['bet','call'], ['check','bet','call'], ['bet','fold'], ['check','bet','fold']):
+        return -4
+    if None in state['hands']: return -1
+    return state['current_player']
+def get_player_name(p):
+    return {-1:'chance',-4:'terminal'}.get(p, f'player_{p}')
+def get_rewards(state):
+    pub = _public(state['history'])
+    pot = state['pot']
+    if get_current_player(state) != -4: return [0.0, 0.0]
+    if pub and pub[-1] == 'fold':
+        folder = 0 if len(pub) == 3 else 1
+        w = 1 - folder
+    else:
+        w = 0 if RANK[state['hands'][0]] > RANK[state['hands'][1]] else 1
+    l = 1 - w
+    r = [0.0, 0.0]; r[w] = pot[l]; r[l] = -pot[l]
+    return r
+def get_legal_actions(state):
+    p = get_current_player(state)
+    if p == -4: return []
+    if p == -1:
+        who = 0 if state['hands'][0] is None else 1
+        return [f"deal: {c} to P{who}" for c in state['deck']]
+    pub = _public(state['history'])
+    if pub and pub[-1] == 'bet': return ['fold', 'call']
+    return ['check', 'bet']
+def get_observations(state):
+    pub = _public(state['history'])
+    return [{'private_card': state['hands'][i], 'history': list(pub), 'current_player': state['current_player']} for i in range(2)]
+def resample_history(obs_history, player_id):
+    obs = obs_history[-1]
+    mine = obs['private_card']
+    other = random.choice([c for c in 'JQK' if c != mine])
+    hands = [None, None]; hands[player_id] = mine; hands[1 - player_id] = other
+    return [f"deal: {hands[0]} to P0", f"deal: {hands[1]} to P1"] + list(obs['history'])
@@ -0,0 +1,34 @@
+import copy
+from typing import Any
+Action = str
+State = dict[str, Any]
+LINES = [(0,1,2),(3,4,5),(6,7,8),(0,3,6),(1,4,7),(2,5,8),(0,4,8),(2,4,6)]
+def _winner(board):
+    for a,b,c in LINES:
+        if board[a] is not None and board[a] == board[b] == board[c]:
+            return board[a]
+    return None
+def apply_action(state, action):
+    s = copy.deepcopy(state)
+    mark = action[0]
+    r, c = int(action[2]), int(action[4])
+    s['board'][r*3+c] = mark
+    s['current_player_mark'] = 'o' if mark == 'x' else 'x'
+    return s
+def get_current_player(state):
+    if _winner(state['board']) or all(x is not None for x in state['board']):
+        return -4
+    return 0 if state['current_player_mark'] == 'x' else 1
+def get_player_name(player_id):
+    return {-1: 'chance', -4: 'terminal', 0: 'x', 1: 'o'}[player_id]
+def get_rewards(state):
+    w = _winner(state['board'])
+    if w == 'x': return [1.0, -1.0]
+    if w == 'o': return [-1.0, 1.0]
+    return [0.0, 0.0]
+def get_legal_actions(state):
+    if get_current_player(state) == -4: return []
+    m = state['current_player_mark']
+    return [f"{m}({i//3},{i%3})" for i in range(9) if state['board'][i] is None]
+def get_observations(state):
+    return [copy.deepcopy(state), copy.deepcopy(state)]
@@ -0,0 +1,217 @@
+import time
+import random
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyspiel
+
+from cwm import CWM, TERMINAL_PLAYER
+
+KUHN_CARDS = ["J", "Q", "K"]
+
+
+class SpielAdapter:
+    """
+    Maps an OpenSpiel game onto the state and action formats of our CWMs.
+    Player ids agree already (-1 chance, -4 terminal). Subclasses set
+    game_string and translate the initial state and each action id.
+    """
+
+    game_string = ""
+
+    def initial_state(self, spiel_state) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def action(self, spiel_state, action_id: int) -> str:
+        return spiel_state.action_to_string(spiel_state.current_player(), action_id)
+
+
+class TicTacToeAdapter(SpielAdapter):
+    game_string = "tic_tac_toe"
+
+    def initial_state(self, spiel_state) -> Dict[str, Any]:
+        return {"board": [None] * 9, "current_player_mark": "x"}
+
+
+class KuhnPokerAdapter(SpielAdapter):
+    game_string = "kuhn_poker"
+
+    def initial_state(self, spiel_state) -> Dict[str, Any]:
+        return {
+            "deck": list(KUHN_CARDS),
+            "hands": [None, None],
+            "pot": [1.0, 1.0],
+            "history": [],
+            "current_player": -1,
+            "is_terminal": False,
+        }
+
+    def action(self, spiel_state, action_id: int) -> str:
+        if spiel_state.is_chance_node():
+            return f"deal: {KUHN_CARDS[action_id]} to P{len(spiel_state.history())}"
+        # Action 0 is Pass and 1 is Bet; once a bet is outstanding they mean fold and call.
+        facing_bet = 1 in spiel_state.history()[2:]
+        if action_id == 0:
+            return "fold" if facing_bet else "check"
+        return "call" if facing_bet else "bet"
+
+
+# Breakthrough has no adapter: OpenSpiel's breakthrough(rows=5,columns=5) starts
+# with one row of pieces per side, ours with two, and OpenSpiel states cannot be
+# set up from an arbitrary board, so every trajectory would diverge at step 0.
+ADAPTERS: Dict[str, SpielAdapter] = {
+    "tic_tac_toe": TicTacToeAdapter(),
+    "kuhn_poker": KuhnPokerAdapter(),
+}
+
+
+@dataclass
+class Divergence:
+    seed: int
+    step: int
+    check: str  # "legal_actions", "current_player", "terminal", "rewards" or "exception"
+    expected: Any
+    actual: Any
+    actions: List[str] = field(default_factory=list)  # Trajectory up to the diverging step
+
+    def describe(self) -> str:
+        return (
+            f"seed {self.seed}, step {self.step}: {self.check} differs "
+            f"(OpenSpiel {self.expected!r}, CWM {self.actual!r}) after {self.actions}"
+        )
+
+
+@dataclass
+class DiffReport:
+    game: str
+    trajectories: int = 0
+    steps: int = 0
+    elapsed: float = 0.0
+    divergent: int = 0
+    first_divergence: Optional[Divergence] = None
+
+    @property
+    def steps_per_sec(self) -> float:
+        return self.steps / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.game}: {self.trajectories} trajectories, {self.steps} steps, "
+            f"{self.divergent} divergent, {self.steps_per_sec:.0f} steps/s"
+        ]
+        if self.first_divergence is not None:
+            lines.append(f"  first divergence: {self.first_divergence.describe()}")
+        return "\n".join(lines)
+
+
+def compare_trajectory(cwm: CWM, game, adapter: SpielAdapter, seed: int, max_steps: int = 1000) -> Tuple[int, Optional[Divergence]]:
+    """
+    Plays one seeded uniformly random trajectory through both models and
+    compares them at every step. Returns (steps, first divergence or None).
+    """
+    rng = random.Random(seed)
+    spiel_state = game.new_initial_state()
+    state = adapter.initial_state(spiel_state)
+    actions: List[str] = []
+    step = 0
+
+    def diverged(check, expected, actual):
+        return step, Divergence(seed, step, check, expected, actual, list(actions))
+
+    try:
+        for step in range(max_steps + 1):
+            expected_player = spiel_state.current_player()
+            player = cwm.get_current_player(state)
+            if player != expected_player:
+                return diverged("current_player", expected_player, player)
+            if (player == TERMINAL_PLAYER) != spiel_state.is_terminal():
+                return diverged("terminal", spiel_state.is_terminal(), player == TERMINAL_PLAYER)
+
+            expected_rewards = list(spiel_state.returns() if spiel_state.is_terminal() else spiel_state.rewards())
+            rewards = [float(r) for r in cwm.get_rewards(state)]
+            if rewards != expected_rewards:
+                return diverged("rewards", expected_rewards, rewards)
+            if spiel_state.is_terminal():
+                return step, None
+
+            legal_ids = spiel_state.legal_actions()
+            mapped = {adapter.action(spiel_state, a): a for a in legal_ids}
+            legal = cwm.get_legal_actions(state)
+            if sorted(legal) != sorted(mapped):
+                return diverged("legal_actions", sorted(mapped), sorted(legal))
+
+            action_id = rng.choice(legal_ids)
+            action = adapter.action(spiel_state, action_id)
+            actions.append(action)
+            spiel_state.apply_action(action_id)
+            state = cwm.apply_action(state, action)
+    except Exception as e:
+        return diverged("exception", None, f"{type(e).__name__}: {e}")
+    return step, None
+
+
+# Worker processes load the CWM and the OpenSpiel game once per shard run.
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(game_name: str, source: str):
+    _WORKER["cwm"] = CWM.from_code(source, "<difftest_worker>")
+    _WORKER["adapter"] = ADAPTERS[game_name]
+    _WORKER["game"] = pyspiel.load_game(ADAPTERS[game_name].game_string)
+
+
+def _run_shard(seeds: List[int], max_steps: int) -> Tuple[int, int, int, Optional[Divergence]]:
+    steps, divergent, first = 0, 0, None
+    for seed in seeds:
+        n, divergence = compare_trajectory(_WORKER["cwm"], _WORKER["game"], _WORKER["adapter"], seed, max_steps)
+        steps += n
+        if divergence is not None:
+            divergent += 1
+            if first is None:
+                first = divergence
+    return len(seeds), steps, divergent, first
+
+
+def difftest(
+    game_name: str,
+    cwm: CWM,
+    num_trajectories: int = 2000,
+    num_workers: Optional[int] = None,
+    seed: int = 0,
+    shard_size: int = 100,
+    max_steps: int = 1000,
+) -> DiffReport:
+    """Compares a CWM against its OpenSpiel counterpart on seeded random trajectories, sharded over a process pool."""
+    if game_name not in ADAPTERS:
+        raise ValueError(f"No OpenSpiel adapter for '{game_name}'. Expected one of {list(ADAPTERS)}.")
+    seeds = list(range(seed, seed + num_trajectories))
+    shards = [seeds[i:i + shard_size] for i in range(0, len(seeds), shard_size)]
+
+    report = DiffReport(game_name)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(game_name, cwm.source),
+    ) as pool:
+        # Shards are collected in seed order, so the first divergence is the lowest diverging seed.
+        for count, steps, divergent, first in pool.map(_run_shard, shards, [max_steps] * len(shards)):
+            report.trajectories += count
+            report.steps += steps
+            report.divergent += divergent
+            if report.first_divergence is None:
+                report.first_divergence = first
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+if __name__ == "__main__":
+    from cwm import load_cwm
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    for game_name in ADAPTERS:
+        print(difftest(game_name, load_cwm(game_name)).summary())
@@ -1,6 +1,131 @@
+import ast
+import time
+import linecache
 import traceback
-import random
-from typing import Tuple, Any, Dict
+import unittest
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Tuple, Any, Dict, List
+
+GAME_FILENAME = "<generated_cwm>"
+TESTS_FILENAME = "<unit_tests>"
+
+
+@dataclass
+class TestRecord:
+    name: str
+    status: str  # "pass", "fail", "error" or "skipped"
+    duration: float = 0.0
+    message: str = ""
+
+
+@dataclass
+class TestReport:
+    records: List[TestRecord] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return bool(self.records) and all(r.status == "pass" for r in self.records)
+
+    @property
+    def pass_rate(self) -> float:
+        """Fraction of tests that passed; used to rank candidates that are not fully correct."""
+        if not self.records:
+            return 0.0
+        return sum(r.status == "pass" for r in self.records) / len(self.records)
+
+    @property
+    def failures(self) -> List[TestRecord]:
+        return [r for r in self.records if r.status in ("fail", "error")]
+
+    def summary(self) -> str:
+        counts = {}
+        for r in self.records:
+            counts[r.status] = counts.get(r.status, 0) + 1
+        details = ", ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+        return f"{counts.get('pass', 0)}/{len(self.records)} tests passed ({details})"
+
+    def to_trace(self) -> str:
+        """Renders the failures in the same spirit as a unittest text report."""
+        if self.passed:
+            return "All tests passed."
+        lines = [f"Unit tests failed: {self.summary()}"]
+        for r in self.failures:
+            lines.append("=" * 70)
+            lines.append(f"{r.status.upper()}: {r.name}")
+            lines.append("-" * 70)
+            lines.append(r.message.rstrip())
+        return "\n".join(lines)
+
+
+def _register_source(source: str, filename: str):
+    # Done on every call, not only on a cache miss: the filename is shared by
+    # all candidates, so tracebacks must show the source that is running now.
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+
+
+@lru_cache(maxsize=64)
+def _compile_cached(source: str, filename: str):
+    return compile(source, filename, "exec")
+
+
+def _compile_source(source: str, filename: str):
+    _register_source(source, filename)
+    return _compile_cached(source, filename)
+
+
+@lru_cache(maxsize=16)
+def _compile_test_cached(test_code: str):
+    tree = ast.parse(test_code)
+    keep = (ast.Import, ast.ImportFrom, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+    tree.body = [node for node in tree.body if isinstance(node, keep)]
+    return compile(tree, TESTS_FILENAME, "exec")
+
+
+def _compile_test_definitions(test_code: str):
+    """
+    Compiles only the imports and definitions of a test file, dropping its
+    module-level suite runner. Line numbers match the original file.
+    """
+    _register_source(test_code, TESTS_FILENAME)
+    return _compile_test_cached(test_code)
+
+
+def load_test_names(namespace: Dict[str, Any]) -> List[str]:
+    """Returns 'Class.test_method' ids for every TestCase defined by the test file."""
+    loader = unittest.TestLoader()
+    names = []
+    for obj in namespace.values():
+        if isinstance(obj, type) and issubclass(obj, unittest.TestCase) and obj.__module__ == TESTS_FILENAME:
+            names.extend(f"{obj.__name__}.{m}" for m in loader.getTestCaseNames(obj))
+    return names
+
+
+def build_test_namespace(game_code: str, test_code: str) -> Dict[str, Any]:
+    """Executes the generated module once and defines the TestCase classes on top of it."""
+    namespace: Dict[str, Any] = {"__name__": TESTS_FILENAME}
+    exec(_compile_source(game_code, GAME_FILENAME), namespace)
+    exec(_compile_test_definitions(test_code), namespace)
+    return namespace
+
+
+def run_single_test(namespace: Dict[str, Any], test_name: str) -> TestRecord:
+    class_name, method_name = test_name.split(".", 1)
+    test = namespace[class_name](method_name)
+    result = unittest.TestResult()
+
+    start = time.perf_counter()
+    test.run(result)
+    duration = time.perf_counter() - start
+
+    if result.errors:
+        return TestRecord(test_name, "error", duration, result.errors[0][1])
+    if result.failures:
+        return TestRecord(test_name, "fail", duration, result.failures[0][1])
+    if result.skipped:
+        return TestRecord(test_name, "skipped", duration, result.skipped[0][1])
+    return TestRecord(test_name, "pass", duration)
+
 
 class Executor:
     def run_tests(self, game_code: str, test_code: str) -> Tuple[bool, str]:
@@ -9,11 +134,54 @@ class Executor:
         Returns (True, "Passed") or (False, Traceback).
         """
         full_script = f"{game_code}\n\n{test_code}"
-        
+
         execution_scope: Dict[str, Any] = {}
-        
+
         try:
             exec(full_script, execution_scope)
             return True, "All tests passed."
         except Exception:
             return False, traceback.format_exc()
+
+    def run_test_suite(self, game_code: str, test_code: str, fail_fast: bool = False) -> TestReport:
+        """
+        Compiles the generated module once, loads the TestCase classes from the
+        test file and runs every test individually, returning per-test records.
+        With fail_fast, the remaining tests are marked skipped after the first failure.
+        """
+        try:
+            namespace = build_test_namespace(game_code, test_code)
+        except Exception:
+            return TestReport([TestRecord("<module>", "error", 0.0, traceback.format_exc())])
+
+        report = TestReport()
+        for name in load_test_names(namespace):
+            if fail_fast and report.failures:
+                report.records.append(TestRecord(name, "skipped", 0.0, "Skipped after an earlier failure (fail-fast)."))
+                continue
+            report.records.append(run_single_test(namespace, name))
+        return report
+
+    def profile(self, game_code: str, root_state: Dict[str, Any], num_rollouts: int = 100, seed: int = 0) -> Dict[str, Any]:
+        """
+        Measures random-rollout throughput of the generated code and profiles its
+        hot functions. Returns {"rollouts_per_sec": float, "profile": str}.
+        """
+        # Imported here so that test execution does not depend on the benchmark layer.
+        from benchmark import profile_cwm
+        from cwm import CWM
+
+        try:
+            return profile_cwm(CWM.from_code(game_code, GAME_FILENAME), root_state, num_rollouts, seed)
+        except Exception:
+            return {"rollouts_per_sec": 0.0, "profile": traceback.format_exc()}
+
+    def check_inplace(self, game_code: str, root_state: Dict[str, Any], num_trajectories: int = 100, seed: int = 0) -> List[str]:
+        """Cross-checks apply_action_inplace/undo_action against apply_action; returns the problems found."""
+        from cwm import CWM
+        from inplace import check_inplace
+
+        try:
+            return check_inplace(CWM.from_code(game_code, GAME_FILENAME), root_state, num_trajectories, seed)
+        except Exception:
+            return [traceback.format_exc()]
@@ -0,0 +1,194 @@
+import time
+import hashlib
+import logging
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from cwm import CWM, TERMINAL_PLAYER
+from state_codec import StateCodec
+
+
+def canonical_key(obj: Any) -> Hashable:
+    """
+    Converts a nested dict/list state into an equivalent hashable tuple.
+    Dicts become sorted (key, value) tuples, so key order never matters.
+    """
+    if isinstance(obj, dict):
+        return tuple(sorted(((k, canonical_key(v)) for k, v in obj.items()), key=_sort_key))
+    if isinstance(obj, (list, tuple)):
+        return tuple(canonical_key(v) for v in obj)
+    if isinstance(obj, (set, frozenset)):
+        return ("__set__",) + tuple(sorted((canonical_key(v) for v in obj), key=repr))
+    return obj
+
+
+def _sort_key(item):
+    key = item[0]
+    return (type(key).__name__, key if isinstance(key, (str, int, float)) else repr(key))
+
+
+def compact_key(obj: Any) -> bytes:
+    """A 16-byte digest of canonical_key(obj); much smaller to store than the full tuple."""
+    return hashlib.blake2b(repr(canonical_key(obj)).encode("utf-8"), digest_size=16).digest()
+
+
+class TranspositionTable:
+    """
+    A memory-bounded mapping from state keys to values with LRU eviction.
+    Tracks hits, misses and evictions so search code can report its hit rate.
+    """
+
+    def __init__(self, max_entries: Optional[int] = 1_000_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any = None):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class TreeStats:
+    nodes: int = 0  # Unique states expanded
+    edges: int = 0  # (state, action) transitions generated
+    terminals: int = 0  # Unique terminal states
+    transpositions: int = 0  # Edges that reached an already-seen state
+    max_depth: int = 0
+    elapsed: float = 0.0
+    evictions: int = 0
+
+    @property
+    def nodes_per_sec(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.nodes} nodes, {self.edges} edges, {self.terminals} terminals, "
+            f"{self.transpositions} transpositions, depth {self.max_depth}, "
+            f"{self.elapsed:.2f}s ({self.nodes_per_sec:.0f} nodes/s)"
+        )
+
+
+# visit(key, state, player, actions, child_keys) is called once per expanded state.
+VisitFn = Callable[[Hashable, Dict[str, Any], int, List[str], List[Hashable]], None]
+
+
+class GameTreeWalker:
+    """
+    Breadth-first enumeration of the state graph of a CWM.
+
+    States are identified by key_fn (compact_key by default), and a
+    TranspositionTable of seen keys makes each unique position expand once,
+    so the walk is linear in distinct states rather than in paths. If the
+    table is bounded and evicts entries, evicted states may be expanded again.
+    With a StateCodec the frontier is held as packed bytes, which also serve
+    as the (exact) state keys unless key_fn is given.
+    """
+
+    def __init__(
+        self,
+        cwm: CWM,
+        table: Optional[TranspositionTable] = None,
+        key_fn: Optional[Callable[[Any], Hashable]] = None,
+        codec: Optional[StateCodec] = None,
+    ):
+        self.cwm = cwm
+        self.table = table if table is not None else TranspositionTable(max_entries=None)
+        self.codec = codec
+        self.key_fn = key_fn or (codec.pack if codec is not None else compact_key)
+
+    def walk(
+        self,
+        root_state: Dict[str, Any],
+        max_depth: Optional[int] = None,
+        max_nodes: Optional[int] = None,
+        visit: Optional[VisitFn] = None,
+    ) -> TreeStats:
+        stats = TreeStats()
+        start = time.perf_counter()
+        evictions_before = self.table.evictions
+
+        store = self.codec.pack if self.codec is not None else lambda s: s
+        load = self.codec.unpack if self.codec is not None else lambda s: s
+
+        root_key = self.key_fn(root_state)
+        self.table.put(root_key, 0)
+        queue = deque([(root_key, store(root_state), 0)])
+
+        while queue:
+            key, stored, depth = queue.popleft()
+            state = load(stored)
+            stats.nodes += 1
+            stats.max_depth = max(stats.max_depth, depth)
+
+            player = self.cwm.get_current_player(state)
+            if player == TERMINAL_PLAYER:
+                stats.terminals += 1
+                if visit is not None:
+                    visit(key, state, player, [], [])
+                continue
+
+            actions = list(self.cwm.get_legal_actions(state))
+            child_keys = []
+            expand = max_depth is None or depth < max_depth
+            for action in actions if expand else []:
+                child = self.cwm.apply_action(state, action)
+                child_key = self.key_fn(child)
+                child_keys.append(child_key)
+                stats.edges += 1
+                if child_key in self.table:
+                    stats.transpositions += 1
+                    continue
+                self.table.put(child_key, depth + 1)
+                queue.append((child_key, store(child), depth + 1))
+
+            if visit is not None:
+                visit(key, state, player, actions if expand else [], child_keys)
+            if max_nodes is not None and stats.nodes >= max_nodes:
+                logging.warning(f"Game tree walk stopped at max_nodes={max_nodes}.")
+                break
+
+        stats.elapsed = time.perf_counter() - start
+        stats.evictions = self.table.evictions - evictions_before
+        return stats
+
+
+if __name__ == "__main__":
+    from cwm import load_cwm
+    from games import GAMES
+
+    for game_name in ("tic_tac_toe", "kuhn_poker"):
+        walker = GameTreeWalker(load_cwm(game_name))
+        stats = walker.walk(GAMES[game_name].initial_state())
+        print(f"{game_name}: {stats.summary()}")
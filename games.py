@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass(frozen=True)
+class GameSpec:
+    name: str
+    info_type: str  # "perfect" or "imperfect", selects the system prompt template
+    initial_state: Callable[[], Dict[str, Any]]  # Fresh root state in the format used by the tests
+    num_players: int = 2
+    tabulate: bool = False  # Small enough to compile into a transition table after synthesis
+    min_rollouts_per_sec: Optional[float] = None  # Throughput floor for the optional performance gate
+
+    @property
+    def rules_path(self) -> str:
+        return f"data/{self.name}_rules.txt"
+
+    @property
+    def tests_path(self) -> str:
+        return f"data/{self.name}_tests.py"
+
+    @property
+    def output_path(self) -> str:
+        return f"results/generated_{self.name}.py"
+
+
+def _breakthrough_initial_state() -> Dict[str, Any]:
+    return {"board": ["w"] * 10 + ["."] * 5 + ["b"] * 10, "current_player": 0}
+
+
+def _isolation_initial_state() -> Dict[str, Any]:
+    return {"board": [None] * 13, "current_player": 0}
+
+
+def _kuhn_poker_initial_state() -> Dict[str, Any]:
+    return {
+        "deck": ["J", "Q", "K"],
+        "hands": [None, None],
+        "pot": [1.0, 1.0],
+        "history": [],
+        "current_player": -1,
+        "is_terminal": False,
+    }
+
+
+def _tic_tac_toe_initial_state() -> Dict[str, Any]:
+    return {"board": [None] * 9, "current_player_mark": "x"}
+
+
+GAMES: Dict[str, GameSpec] = {
+    "breakthrough": GameSpec(
+        "breakthrough", "perfect", _breakthrough_initial_state, min_rollouts_per_sec=500.0
+    ),
+    "isolation": GameSpec(
+        "isolation", "perfect", _isolation_initial_state, tabulate=True, min_rollouts_per_sec=2000.0
+    ),
+    "kuhn_poker": GameSpec(
+        "kuhn_poker", "imperfect", _kuhn_poker_initial_state, tabulate=True, min_rollouts_per_sec=2000.0
+    ),
+    "tic_tac_toe": GameSpec(
+        "tic_tac_toe", "perfect", _tic_tac_toe_initial_state, tabulate=True, min_rollouts_per_sec=2000.0
+    ),
+}
@@ -0,0 +1,106 @@
+import copy
+import random
+import logging
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from cwm import CWM, TERMINAL_PLAYER
+
+
+def _check_trajectory(cwm: CWM, root_state: Dict[str, Any], rng: random.Random, max_steps: int) -> Optional[str]:
+    pure = root_state
+    state = copy.deepcopy(root_state)
+    path = [copy.deepcopy(state)]
+    undos: List[Any] = []
+    actions: List[str] = []
+    try:
+        for _ in range(max_steps):
+            if cwm.get_current_player(pure) == TERMINAL_PLAYER:
+                break
+            legal = cwm.get_legal_actions(pure)
+            if not legal:
+                break
+            action = rng.choice(legal)
+            actions.append(action)
+            pure = cwm.apply_action(pure, action)
+            undos.append(cwm.apply_action_inplace(state, action))
+            if state != pure:
+                return f"apply_action_inplace differs from apply_action after {actions}"
+            path.append(copy.deepcopy(state))
+
+        for i in range(len(undos) - 1, -1, -1):
+            cwm.undo_action(state, undos[i])
+            if state != path[i]:
+                return f"undo_action does not restore the state before {actions[:i + 1]}"
+    except Exception as e:
+        return f"{type(e).__name__}: {e} after {actions}"
+    return None
+
+
+def check_inplace(cwm: CWM, root_state: Dict[str, Any], num_trajectories: int = 100, seed: int = 0, max_steps: int = 1000) -> List[str]:
+    """
+    Cross-checks apply_action_inplace/undo_action against the pure apply_action
+    on seeded random trajectories. Every in-place step must produce the same
+    state as apply_action, and undoing the whole trajectory in reverse must
+    restore each earlier state exactly. Returns a list of problems (empty if
+    the contracts agree).
+    """
+    if not cwm.has_inplace:
+        return ["CWM does not define apply_action_inplace and undo_action"]
+    rng = random.Random(seed)
+    problems = []
+    for t in range(num_trajectories):
+        problem = _check_trajectory(cwm, root_state, rng, max_steps)
+        if problem:
+            problems.append(f"trajectory {t}: {problem}")
+    return problems
+
+
+def _traced_blocks() -> int:
+    return sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+
+
+def allocations_per_step(cwm: CWM, root_state: Dict[str, Any], num_steps: int = 2000, seed: int = 0, inplace: bool = False) -> float:
+    """
+    Memory blocks allocated per random step for what a depth-first search has
+    to keep along its path: the successor state from apply_action, or the undo
+    record from apply_action_inplace. Results are held until the end so that
+    tracemalloc counts them; finished games restart from the root.
+    """
+    rng = random.Random(seed)
+    kept: List[Any] = [None] * num_steps
+    state = copy.deepcopy(root_state) if inplace else root_state
+    tracemalloc.start()
+    before = _traced_blocks()
+    for i in range(num_steps):
+        legal = [] if cwm.get_current_player(state) == TERMINAL_PLAYER else cwm.get_legal_actions(state)
+        if not legal:
+            state = copy.deepcopy(root_state) if inplace else root_state
+            continue
+        action = rng.choice(legal)
+        if inplace:
+            kept[i] = cwm.apply_action_inplace(state, action)
+        else:
+            state = kept[i] = cwm.apply_action(state, action)
+    after = _traced_blocks()
+    tracemalloc.stop()
+    return (after - before) / num_steps
+
+
+if __name__ == "__main__":
+    from cwm import load_cwm
+    from games import GAMES
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    for game_name in GAMES:
+        cwm = load_cwm(game_name)
+        if not cwm.has_inplace:
+            print(f"{game_name}: no in-place API")
+            continue
+        root_state = GAMES[game_name].initial_state()
+        problems = check_inplace(cwm, root_state)
+        pure = allocations_per_step(cwm, root_state)
+        inplace = allocations_per_step(cwm, root_state, inplace=True)
+        print(f"{game_name}: {len(problems)} problems, {pure:.1f} -> {inplace:.1f} allocations/step")
+        for problem in problems[:5]:
+            print(f"  {problem}")
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Optional
+
+
+class CacheMissError(LookupError):
+    """Raised in replay-only mode when a prompt has no recorded response."""
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of raw LLM responses.
+
+    Each entry is one JSON file named by the SHA-256 of (model, system prompt,
+    user prompt, temperature, sample index, seed). The file mtime records when the
+    entry was written (age limit) and the atime records its last use (LRU).
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "cache/llm",
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age_seconds: Optional[float] = 30 * 24 * 3600,
+        replay_only: bool = False,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.replay_only = replay_only
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(
+        model: str,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        sample_index: int = 0,
+        seed: Optional[int] = None,
+    ) -> str:
+        payload = json.dumps(
+            [model, system_prompt, user_prompt, temperature, sample_index, seed],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response text, or None (raises in replay-only mode)."""
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+            if self._expired(stat.st_mtime):
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path, (time.time(), stat.st_mtime))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            if self.replay_only:
+                raise CacheMissError(f"No cached LLM response for key {key} (replay-only mode).")
+            return None
+
+        self.hits += 1
+        logging.info(f"LLM cache hit: {key[:12]}")
+        return entry["content"]
+
+    def put(self, key: str, content: str, **metadata):
+        entry = {"content": content, **metadata}
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Drops expired entries, then least-recently-used ones until under max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if self._expired(stat.st_mtime):
+                self._remove(path)
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _expired(self, written_at: float) -> bool:
+        return self.max_age_seconds is not None and time.time() - written_at > self.max_age_seconds
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -1,42 +1,247 @@
 import os
 import re
+import time
 import logging
-from openai import OpenAI
+from types import SimpleNamespace
+from typing import Optional
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
+from llm_cache import ResponseCache
+from rate_limit import RateLimiter, CostBudget, estimate_tokens, usd_cost
+from streaming import StreamingCodeParser
+import telemetry
 
 load_dotenv()
 
 class LLMClient:
-    def __init__(self, model="gpt-4o"):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(
+        self,
+        model="gpt-4o",
+        temperature=0.7,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        budget: Optional[CostBudget] = None,
+        seed: Optional[int] = None,
+        stream: bool = False,
+        max_response_chars: int = 60000,
+        base_url: Optional[str] = None,
+    ):
         self.model = model
+        self.temperature = temperature
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.budget = budget
+        self.seed = seed
+        # Streaming stops at the closing code fence and aborts malformed or oversized responses early.
+        self.stream = stream
+        self.max_response_chars = max_response_chars
+        self.base_url = base_url
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "latency": 0.0}
 
-    def generate(self, system_prompt: str, user_prompt: str = "Generate the code.") -> str:
-        """Sends request to OpenAI, logs the interaction, and extracts code."""
-        
-        logging.info(f"\n{'='*40}\n SENDING PROMPT TO LLM\n{'='*40}")
-        logging.info(f"--- System Prompt ---\n{system_prompt}") 
-        logging.info(f"--- User Prompt ---\n{user_prompt}")
-        
+        # A replay-only cache never reaches the network, so no API key is needed.
+        if cache is not None and cache.replay_only:
+            self.client = None
+            self.async_client = None
+        else:
+            # base_url points the client at another OpenAI-compatible server, e.g. mock_server.py.
+            api_key = os.getenv("OPENAI_API_KEY") or ("local" if base_url else None)
+            self.client = OpenAI(api_key=api_key, base_url=base_url)
+            self.async_client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+
+    def generate(self, system_prompt: str, user_prompt: str = "Generate the code.", sample_index: int = 0, attempt: Optional[int] = None) -> str:
+        """
+        Sends request to OpenAI, logs the interaction, and extracts code.
+        sample_index distinguishes independent samples of the same prompt in the cache;
+        attempt is the synthesis attempt the call belongs to, for telemetry.
+        """
+        call = self._log_request(system_prompt, user_prompt, sample_index, attempt)
+
+        cache_key, cached = self._cache_lookup(system_prompt, user_prompt, sample_index)
+        if cached is not None:
+            telemetry.record("llm_call", outcome="cache_hit", latency=0.0, response_chars=len(cached), **call)
+            return self._extract_code(cached)
+
+        estimated = estimate_tokens(system_prompt, user_prompt)
+        reserved = self.budget.check(self.model, estimated) if self.budget is not None else 0.0
+        settled = False  # Set once usage (and so the reservation) has been recorded
+        start = time.perf_counter()
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire_blocking(estimated)
+            start = time.perf_counter()
+            if self.stream:
+                parser = StreamingCodeParser(self.max_response_chars)
+                stream = self.client.chat.completions.create(**self._request_kwargs(system_prompt, user_prompt, stream=True))
+                usage = None
+                try:
+                    for chunk in stream:
+                        usage = chunk.usage or usage
+                        if self._feed_chunk(parser, chunk):
+                            break
+                finally:
+                    stream.close()
+                settled = True
+                return self._finish_stream(parser, usage, time.perf_counter() - start, estimated, cache_key, call, reserved)
+
+            response = self.client.chat.completions.create(**self._request_kwargs(system_prompt, user_prompt))
+            content = response.choices[0].message.content or ""
+            settled = True
+            self._record_usage(response.usage, time.perf_counter() - start, estimated, call, "ok", len(content), reserved)
+            return self._handle_response(content, cache_key)
+
+        except Exception as e:
+            logging.error(f"LLM API Error: {e}")
+            telemetry.record("llm_call", outcome="error", latency=time.perf_counter() - start, error=str(e), **call)
+            return ""
+        finally:
+            # Also runs when the call is cancelled (best-of-N losers), which is not an Exception.
+            if self.budget is not None and not settled:
+                self.budget.release(reserved)
+
+    async def agenerate(self, system_prompt: str, user_prompt: str = "Generate the code.", sample_index: int = 0, attempt: Optional[int] = None) -> str:
+        """Async counterpart of generate; many calls can be in flight at once."""
+        call = self._log_request(system_prompt, user_prompt, sample_index, attempt)
+
+        cache_key, cached = self._cache_lookup(system_prompt, user_prompt, sample_index)
+        if cached is not None:
+            telemetry.record("llm_call", outcome="cache_hit", latency=0.0, response_chars=len(cached), **call)
+            return self._extract_code(cached)
+
+        estimated = estimate_tokens(system_prompt, user_prompt)
+        reserved = self.budget.check(self.model, estimated) if self.budget is not None else 0.0
+        settled = False  # Set once usage (and so the reservation) has been recorded
+        start = time.perf_counter()
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7
-            )
-            content = response.choices[0].message.content
-            
-            logging.info(f"\n{'='*40}\n RECEIVED RESPONSE FROM LLM\n{'='*40}")
-            logging.info(content)
-            
-            return self._extract_code(content)
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(estimated)
+            start = time.perf_counter()
+            if self.stream:
+                parser = StreamingCodeParser(self.max_response_chars)
+                stream = await self.async_client.chat.completions.create(
+                    **self._request_kwargs(system_prompt, user_prompt, stream=True)
+                )
+                usage = None
+                try:
+                    async for chunk in stream:
+                        usage = chunk.usage or usage
+                        if self._feed_chunk(parser, chunk):
+                            break
+                finally:
+                    await stream.close()
+                settled = True
+                return self._finish_stream(parser, usage, time.perf_counter() - start, estimated, cache_key, call, reserved)
+
+            response = await self.async_client.chat.completions.create(**self._request_kwargs(system_prompt, user_prompt))
+            content = response.choices[0].message.content or ""
+            settled = True
+            self._record_usage(response.usage, time.perf_counter() - start, estimated, call, "ok", len(content), reserved)
+            return self._handle_response(content, cache_key)
 
         except Exception as e:
             logging.error(f"LLM API Error: {e}")
+            telemetry.record("llm_call", outcome="error", latency=time.perf_counter() - start, error=str(e), **call)
             return ""
+        finally:
+            # Also runs when the call is cancelled (best-of-N losers), which is not an Exception.
+            if self.budget is not None and not settled:
+                self.budget.release(reserved)
+
+    def _request_kwargs(self, system_prompt: str, user_prompt: str, stream: bool = False) -> dict:
+        kwargs = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": self.temperature,
+        }
+        if self.seed is not None:
+            kwargs["seed"] = self.seed
+        if stream:
+            kwargs["stream"] = True
+            kwargs["stream_options"] = {"include_usage": True}
+        return kwargs
+
+    def _feed_chunk(self, parser: StreamingCodeParser, chunk) -> bool:
+        if not chunk.choices:
+            return False
+        return parser.feed(chunk.choices[0].delta.content or "")
+
+    def _finish_stream(self, parser: StreamingCodeParser, usage, latency: float, estimated: int, cache_key: Optional[str], call: dict, reserved: float = 0.0) -> str:
+        """Records usage for a streamed call and returns the extracted code."""
+        if usage is None:
+            # The stream was closed before the final usage chunk; fall back to estimates.
+            usage = SimpleNamespace(prompt_tokens=estimated, completion_tokens=estimate_tokens(parser.text))
+        outcome = "aborted" if parser.aborted_reason else "ok"
+        self._record_usage(usage, latency, estimated, call, outcome, len(parser.text), reserved)
+
+        if parser.aborted_reason:
+            logging.warning(f"Aborted LLM stream after {len(parser.text)} chars: {parser.aborted_reason}")
+            return parser.code
+        if parser.done:
+            logging.info(f"Code fence closed after {latency:.2f}s; stopped the stream early.")
+        return self._handle_response(parser.text, cache_key)
+
+    def _record_usage(self, usage, latency: float, estimated_tokens: int, call: dict, outcome: str, response_chars: int, reserved: float = 0.0):
+        """
+        Accumulates token counts, cost and latency, settles rate-limit and budget
+        accounting, and queues the call's telemetry record.
+        """
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+
+        self.usage["calls"] += 1
+        self.usage["prompt_tokens"] += prompt_tokens
+        self.usage["completion_tokens"] += completion_tokens
+        self.usage["latency"] += latency
+        if self.rate_limiter is not None:
+            self.rate_limiter.settle(estimated_tokens, prompt_tokens + completion_tokens)
+        if self.budget is not None:
+            cost = self.budget.charge(self.model, prompt_tokens, completion_tokens, reserved)
+        else:
+            cost = usd_cost(self.model, prompt_tokens, completion_tokens)
+        self.usage["cost_usd"] += cost
+        telemetry.record(
+            "llm_call", outcome=outcome, latency=latency, prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens, cost_usd=cost, response_chars=response_chars, **call
+        )
+
+    def _log_request(self, system_prompt: str, user_prompt: str, sample_index: int, attempt: Optional[int]) -> dict:
+        """
+        Full prompts only go to DEBUG; telemetry stores them once by hash.
+        Returns the fields shared by the call's telemetry records.
+        """
+        system_hash, user_hash = telemetry.text_hash(system_prompt), telemetry.text_hash(user_prompt)
+        logging.info(
+            f"Sending prompt to {self.model}: system {system_hash} ({len(system_prompt)} chars), "
+            f"user {user_hash} ({len(user_prompt)} chars)."
+        )
+        logging.debug(f"--- System Prompt ---\n{system_prompt}")
+        logging.debug(f"--- User Prompt ---\n{user_prompt}")
+        return {
+            "texts": (system_prompt, user_prompt),  # Stored once by hash, not in the record itself
+            "model": self.model,
+            "attempt": attempt,
+            "sample_index": sample_index,
+            "system_prompt_sha": system_hash,
+            "user_prompt_sha": user_hash,
+        }
+
+    def _cache_lookup(self, system_prompt: str, user_prompt: str, sample_index: int):
+        """Returns (cache_key, cached_content); both None when caching is disabled."""
+        if self.cache is None:
+            return None, None
+        key = ResponseCache.make_key(self.model, system_prompt, user_prompt, self.temperature, sample_index, self.seed)
+        return key, self.cache.get(key)
+
+    def _handle_response(self, content: str, cache_key: Optional[str] = None) -> str:
+        logging.info(f"Received {len(content)} chars from {self.model}.")
+        logging.debug(f"--- Response ---\n{content}")
+
+        if cache_key is not None and content:
+            self.cache.put(cache_key, content, model=self.model, temperature=self.temperature)
+
+        return self._extract_code(content)
 
     def _extract_code(self, text: str) -> str:
         """Extracts python code from markdown fences."""
@@ -44,4 +249,4 @@ class LLMClient:
         match = re.search(pattern, text, re.DOTALL)
         if match:
             return match.group(1).strip()
-        return text.strip()
\ No newline at end of file
+        return text.strip()
@@ -0,0 +1,108 @@
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from batch import BatchJob, JobResult, run_job
+from llm_cache import ResponseCache
+from metrics import percentile
+from mock_server import MockConfig, MockOpenAIServer, MockStats, canned_responses
+from rate_limit import CostBudget, RateLimiter
+from sandbox import SandboxedExecutor
+
+
+@dataclass
+class LoadReport:
+    jobs: int
+    concurrency: int
+    elapsed: float
+    results: List[JobResult] = field(default_factory=list)
+    server: Optional[MockStats] = None
+
+    @property
+    def throughput(self) -> float:
+        """Completed synthesis jobs per second."""
+        return self.jobs / self.elapsed if self.elapsed else 0.0
+
+    def latency(self, q: float) -> float:
+        return percentile([r.latency for r in self.results], q)
+
+    def summary(self) -> str:
+        passed = sum(r.passed for r in self.results)
+        attempts = sum(r.attempts for r in self.results)
+        lines = [
+            f"concurrency {self.concurrency}: {self.jobs} jobs in {self.elapsed:.1f}s "
+            f"({self.throughput:.2f} jobs/s), {passed}/{self.jobs} passed, {attempts} validations",
+            f"  job latency p50 {self.latency(50):.2f}s, p95 {self.latency(95):.2f}s, p99 {self.latency(99):.2f}s",
+        ]
+        if self.server is not None:
+            s = self.server
+            lines.append(
+                f"  server: {s.requests} requests, {s.completions} completions, {s.rate_limited} x 429, "
+                f"{s.errors} x 500, {s.broken} broken, {s.recorded} recorded, request latency p95 {percentile(s.latencies, 95):.2f}s"
+            )
+        return "\n".join(lines)
+
+
+async def _run_jobs(
+    jobs: List[BatchJob],
+    base_url: str,
+    concurrency: int,
+    executor: SandboxedExecutor,
+    num_candidates: int,
+    max_retries: int,
+    requests_per_minute: float,
+    tokens_per_minute: float,
+) -> List[JobResult]:
+    scheduler = asyncio.Semaphore(concurrency)
+    rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    budget = CostBudget(float("inf"))
+    tasks = [
+        asyncio.create_task(run_job(
+            job, scheduler, executor, None, rate_limiter, budget, num_candidates, max_retries,
+            reuse=False, base_url=base_url,
+        ))
+        for job in jobs
+    ]
+    return [result for result, _, _ in await asyncio.gather(*tasks)]
+
+
+def load_test(
+    games: List[str],
+    jobs_per_game: int = 4,
+    concurrency: int = 4,
+    config: Optional[MockConfig] = None,
+    num_candidates: int = 1,
+    max_retries: int = 2,
+    executor_workers: Optional[int] = None,
+    requests_per_minute: float = 10_000,
+    tokens_per_minute: float = 10_000_000,
+    recorded_cache: Optional[ResponseCache] = None,
+) -> LoadReport:
+    """
+    Runs jobs_per_game batch jobs per game against a local mock server, with
+    the LLM cache and artifact reuse off so that every job synthesizes and
+    validates. Nothing is written to results/. Reports jobs/s and tail latency
+    alongside the server's request counts. With recorded_cache, the server
+    replays recorded responses (one per candidate of best-of-N) when present.
+    """
+    jobs = [BatchJob(game, seed) for game in games for seed in range(jobs_per_game)]
+    with MockOpenAIServer(canned_responses(games), config, recorded_cache) as server, \
+            SandboxedExecutor(num_workers=executor_workers, timeout=30.0) as executor:
+        start = time.perf_counter()
+        results = asyncio.run(_run_jobs(
+            jobs, server.base_url, concurrency, executor, num_candidates, max_retries,
+            requests_per_minute, tokens_per_minute,
+        ))
+        elapsed = time.perf_counter() - start
+    return LoadReport(len(jobs), concurrency, elapsed, results, server.stats)
+
+
+if __name__ == "__main__":
+    from games import GAMES
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+    config = MockConfig(latency_median=0.5, latency_sigma=0.6, error_rate=0.02, rate_limit_rate=0.05, broken_rate=0.3)
+    for concurrency in (1, 4, 16):
+        print(load_test(list(GAMES), jobs_per_game=4, concurrency=concurrency, config=config).summary())
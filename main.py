@@ -1,8 +1,17 @@
 import os
 import logging
+import logging.handlers
 from datetime import datetime
 from synthesizer import CWMSynthesizer
-from executor import Executor
+from sandbox import SandboxedExecutor
+from llm_client import LLMClient
+from llm_cache import ResponseCache
+from cascade import ModelCascade
+from cwm import CWM
+from manifest import build_manifest, reuse_verified, save_manifest
+from games import GAMES
+import telemetry
+from tabulate import tabulate_game, table_dir
 
 def load_file(filepath):
     with open(filepath, "r") as f:
@@ -13,24 +22,30 @@ def save_file(filepath, content):
         f.write(content)
 
 def setup_logging():
-    """Sets up a timestamped log file for this specific run."""
+    """
+    Sets up a timestamped log file for this specific run. Log records are
+    written by a background listener, and per-call telemetry goes to
+    logs/telemetry/<timestamp>.jsonl (see telemetry.py).
+    """
+    root = logging.getLogger()
+    if any(isinstance(h, logging.handlers.QueueHandler) for h in root.handlers):
+        return  # Already set up by an earlier run in this process
     if not os.path.exists("logs"):
         os.makedirs("logs")
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_filename = f"logs/run_{timestamp}.log"
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        handlers=[
-            logging.FileHandler(log_filename, encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
-    print(f"Logging enabled. Check file: {log_filename}")
 
-def run_pipeline(game_name, info_type="perfect"):
+    formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
+    handlers = [logging.FileHandler(log_filename, encoding='utf-8'), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    root.setLevel(logging.INFO)
+    telemetry.queue_logging(root, handlers)
+    telemetry_path = telemetry.start(timestamp)
+    print(f"Logging enabled. Check file: {log_filename} (telemetry: {telemetry_path})")
+
+def run_pipeline(game_name, info_type="perfect", num_candidates=1, use_cache=True, replay_only=False, perf_gate=False, stream=False, reuse=True, inplace_api=False, cascade=False):
     setup_logging()
     
     rules_path = f"data/{game_name}_rules.txt"
@@ -41,28 +56,72 @@ def run_pipeline(game_name, info_type="perfect"):
     rules = load_file(rules_path)
     tests = load_file(tests_path)
 
-    synthesizer = CWMSynthesizer()
-    executor = Executor()
+    # perf_gate additionally requires the verified code to reach the game's rollout throughput floor.
+    spec = GAMES.get(game_name)
+    perf_floor = spec.min_rollouts_per_sec if perf_gate and spec is not None else None
+    root_state = spec.initial_state() if spec is not None else None
+
+    # replay_only serves every LLM call from the on-disk cache and never touches the network.
+    cache = ResponseCache("cache/llm", replay_only=replay_only) if use_cache or replay_only else None
+    # Candidates are validated in sandboxed worker processes with timeouts and rlimits.
+    with SandboxedExecutor(timeout=30.0) as executor:
+        llm = LLMClient(cache=cache, stream=stream)
+        # cascade tries cheaper models first; tiers that rarely solve this game in past runs are skipped.
+        configured_cascade = ModelCascade(base=llm) if cascade else None
+        model_cascade = configured_cascade.tuned(game_name) if cascade else None
+        synthesizer = CWMSynthesizer(llm=llm, executor=executor, inplace_api=inplace_api, cascade=model_cascade)
 
-    # 1. Run Synthesis Pipeline
-    cwm_code = synthesizer.synthesize(
-        game_name=game_name,
-        rules=rules,
-        tests=tests,
-        info_type=info_type
-    )
+        # 0. Reuse the stored artifact if its inputs are unchanged and it still verifies.
+        # The manifest names the configured tiers: tuning changes with cascade_stats.json, the inputs do not.
+        model = configured_cascade.describe() if cascade else llm.model
+        manifest = build_manifest(rules, tests, synthesizer.prompt_template(info_type), model, perf_floor, inplace_api)
+        cwm_code = reuse_verified(output_path, manifest, executor, tests, root_state) if reuse else None
+        reused = cwm_code is not None
+
+        # 1. Run Synthesis Pipeline
+        if not reused:
+            cwm_code = synthesizer.synthesize(
+                game_name=game_name,
+                rules=rules,
+                tests=tests,
+                info_type=info_type,
+                num_candidates=num_candidates,
+                perf_floor=perf_floor,
+                root_state=root_state
+            )
 
     if not cwm_code:
         logging.error("Pipeline failed to generate valid code.")
         return
 
-    # 2. Save the valid code
-    logging.info(f"Saving verified CWM to {output_path}...")
-    save_file(output_path, cwm_code)
+    # 2. Save the valid code together with the manifest of its inputs
+    if not reused:
+        logging.info(f"Saving verified CWM to {output_path}...")
+        save_file(output_path, cwm_code)
+        save_manifest(output_path, manifest, cwm_code)
+
+    # 3. Compile small games into memory-mapped transition tables
+    if spec is not None and spec.tabulate and not (reused and os.path.exists(table_dir(game_name))):
+        logging.info(f"Tabulating {game_name} into {table_dir(game_name)}...")
+        try:
+            tabulate_game(game_name, CWM.from_code(cwm_code, output_path))
+        except Exception as e:
+            logging.warning(f"Tabulation skipped: {e}")
 
     logging.info("--- Pipeline Complete ---")
 
 if __name__ == "__main__":
     game_to_run = "kuhn_poker"  # Options: "breakthrough", "isolation", "kuhn_poker", "tic_tac_toe"
     info_type = "imperfect"  # Set to "imperfect" for imperfect-information games
-    run_pipeline(game_to_run, info_type)
\ No newline at end of file
+    num_candidates = 3  # Initial generations sent in parallel; 1 keeps the sequential loop
+    replay_only = False  # True re-runs the pipeline purely from cached LLM responses
+    perf_gate = False  # True rejects verified code that is slower than the game's throughput floor
+    stream = False  # True stops each LLM response at its closing code fence and aborts malformed ones early
+    reuse = True  # False re-synthesizes even if the stored artifact's rules, tests, prompt and model are unchanged
+    inplace_api = False  # True also asks for apply_action_inplace/undo_action, which search then uses
+    cascade = False  # True tries gpt-4o-mini before gpt-4o (see cascade.py); num_candidates is then ignored
+    run_pipeline(
+        game_to_run, info_type, num_candidates,
+        replay_only=replay_only, perf_gate=perf_gate, stream=stream, reuse=reuse, inplace_api=inplace_api,
+        cascade=cascade
+    )
\ No newline at end of file
@@ -0,0 +1,105 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from executor import Executor
+
+
+def sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def manifest_path(output_path: str) -> str:
+    """results/generated_<game>.py -> results/generated_<game>.manifest.json"""
+    return os.path.splitext(output_path)[0] + ".manifest.json"
+
+
+def build_manifest(
+    rules: str,
+    tests: str,
+    prompt_template: str,
+    model: str,
+    perf_floor: Optional[float] = None,
+    inplace_api: bool = False,
+) -> Dict[str, Any]:
+    """The inputs a verified artifact was synthesized from; any change invalidates it."""
+    return {
+        "rules_sha256": sha256(rules),
+        "tests_sha256": sha256(tests),
+        "prompt_sha256": sha256(prompt_template),
+        "model": model,
+        "perf_floor": perf_floor,
+        "inplace_api": inplace_api,
+    }
+
+
+def load_manifest(output_path: str) -> Optional[Dict[str, Any]]:
+    path = manifest_path(output_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(output_path: str, manifest: Dict[str, Any], code: str):
+    record = dict(manifest, code_sha256=sha256(code), verified_at=datetime.now().isoformat(timespec="seconds"))
+    with open(manifest_path(output_path), "w") as f:
+        json.dump(record, f, indent=2)
+
+
+def reuse_verified(
+    output_path: str,
+    manifest: Dict[str, Any],
+    executor: Executor,
+    tests: str,
+    root_state: Optional[Dict[str, Any]] = None,
+) -> Optional[str]:
+    """
+    Returns the stored artifact if it was produced from the same inputs, is
+    unmodified since, and still passes the tests. The gates recorded in the
+    manifest are re-run as well: the throughput floor (perf_floor) and the
+    in-place cross-check (inplace_api), both from root_state. Otherwise None,
+    meaning the game has to be synthesized again.
+    """
+    stored = load_manifest(output_path)
+    if stored is None or not os.path.exists(output_path):
+        return None
+    changed = [key for key, value in manifest.items() if stored.get(key) != value]
+    if changed:
+        logging.info(f"Artifact {output_path} is stale ({', '.join(changed)} changed).")
+        return None
+
+    with open(output_path, "r") as f:
+        code = f.read()
+    if stored.get("code_sha256") != sha256(code):
+        logging.info(f"Artifact {output_path} was modified after verification.")
+        return None
+
+    report = executor.run_test_suite(code, tests)
+    if not report.passed:
+        logging.warning(f"Stored artifact {output_path} no longer verifies: {report.summary()}.")
+        return None
+    if (manifest.get("perf_floor") is not None or manifest.get("inplace_api")) and root_state is None:
+        logging.info(f"Artifact {output_path} needs a root state to re-run its gates.")
+        return None
+    if manifest.get("perf_floor") is not None:
+        rollouts_per_sec = executor.profile(code, root_state)["rollouts_per_sec"]
+        if rollouts_per_sec < manifest["perf_floor"]:
+            logging.warning(
+                f"Stored artifact {output_path} is below the throughput floor "
+                f"({rollouts_per_sec:.1f} < {manifest['perf_floor']:.1f} rollouts/s)."
+            )
+            return None
+    if manifest.get("inplace_api"):
+        problems = executor.check_inplace(code, root_state)
+        if problems:
+            logging.warning(f"Stored artifact {output_path} fails the in-place cross-check: {problems[0]}")
+            return None
+    logging.info(f"Reusing verified artifact {output_path}; skipping synthesis.")
+    return code
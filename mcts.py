@@ -0,0 +1,361 @@
+import copy
+import math
+import time
+import random
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from belief import BeliefSampler
+from cwm import CWM, CHANCE_PLAYER, TERMINAL_PLAYER
+
+MODES = ("serial", "root", "leaf")
+
+
+@dataclass
+class MCTSConfig:
+    num_simulations: int = 1000  # Tree iterations per search (per worker in root-parallel mode)
+    time_limit: Optional[float] = None  # Seconds per decision; stops the search early if set
+    c_uct: float = 1.4
+    mode: str = "serial"  # "serial", "root" (independent trees, merged) or "leaf" (parallel rollouts)
+    num_workers: Optional[int] = None
+    max_rollout_steps: int = 1000
+    seed: int = 0
+
+
+class Node:
+    __slots__ = ("visits", "total", "available", "children")
+
+    def __init__(self):
+        self.visits = 0
+        self.total = 0.0  # Sum of rewards of the player who chose the edge into this node
+        self.available = 1  # Times the edge was legal when its parent was visited (IS-MCTS)
+        self.children: Dict[str, "Node"] = {}
+
+
+def random_playout(cwm: CWM, state: Dict[str, Any], rng: random.Random, max_steps: int, owned: bool = False) -> List[float]:
+    """owned means the caller gives up state, so a CWM with the in-place API may modify it."""
+    inplace = owned and cwm.has_inplace
+    for _ in range(max_steps):
+        if cwm.get_current_player(state) == TERMINAL_PLAYER:
+            break
+        actions = cwm.get_legal_actions(state)
+        if not actions:
+            break
+        if inplace:
+            cwm.apply_action_inplace(state, rng.choice(actions))
+        else:
+            state = cwm.apply_action(state, rng.choice(actions))
+    return list(cwm.get_rewards(state))
+
+
+# Worker processes load the CWM once from source; agents and games then run on it.
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(source: str, root_state: Dict[str, Any]):
+    cwm = CWM.from_code(source, "<mcts_worker>")
+    _WORKER["cwm"] = cwm
+    _WORKER["root_state"] = root_state
+
+
+def _root_search_in_worker(config: Dict[str, Any], state, player_id, obs_history, seed: int):
+    agent = MCTSAgent(_WORKER["cwm"], _WORKER["root_state"], MCTSConfig(**dict(config, mode="serial", seed=seed)))
+    root, simulations = agent._search(state, player_id, obs_history, random.Random(seed))
+    return {a: (child.visits, child.total) for a, child in root.children.items()}, simulations
+
+
+def _playout_in_worker(state: Dict[str, Any], seed: int, max_steps: int) -> List[float]:
+    return random_playout(_WORKER["cwm"], state, random.Random(seed), max_steps, owned=True)
+
+
+def _make_pool(num_workers: Optional[int], source: str, root_state: Dict[str, Any]) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(source, root_state),
+    )
+
+
+class MCTSAgent:
+    """
+    UCT search over a CWM. For imperfect-information games (the CWM defines
+    resample_history) and an observation history, it runs single-observer
+    IS-MCTS: every iteration starts from a determinization drawn by a
+    BeliefSampler, and edges are scored with availability counts.
+
+    mode="root" runs independent searches in a process pool and sums their
+    root statistics; mode="leaf" grows one tree and evaluates each new leaf
+    with num_workers parallel rollouts.
+    """
+
+    def __init__(self, cwm: CWM, root_state: Dict[str, Any], config: Optional[MCTSConfig] = None):
+        self.cwm = cwm
+        self.root_state = root_state
+        self.config = config or MCTSConfig()
+        if self.config.mode not in MODES:
+            raise ValueError(f"Unsupported mode '{self.config.mode}'. Expected one of {list(MODES)}.")
+        self.sampler = BeliefSampler(cwm, root_state, self.config.seed) if cwm.resample_history else None
+        self.rng = random.Random(self.config.seed)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        self.simulations = 0  # Rollouts played over the agent's lifetime
+        self.elapsed = 0.0
+
+    @property
+    def simulations_per_sec(self) -> float:
+        return self.simulations / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = _make_pool(self.config.num_workers, self.cwm.source, self.root_state)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def select_action(self, state: Dict[str, Any], player_id: int, obs_history: Optional[List[Any]] = None) -> str:
+        """
+        Returns the most visited legal action for player_id. With obs_history,
+        an imperfect-information agent only uses state for its legal actions and
+        searches over sampled determinizations instead of the true state.
+        """
+        start = time.perf_counter()
+        if self.config.mode == "root":
+            visits, simulations = self._root_parallel(state, player_id, obs_history)
+        else:
+            root, simulations = self._search(state, player_id, obs_history, self.rng)
+            visits = {a: child.visits for a, child in root.children.items()}
+        self.simulations += simulations
+        self.elapsed += time.perf_counter() - start
+
+        legal = self.cwm.get_legal_actions(state)
+        return max(legal, key=lambda a: (visits.get(a, 0), -legal.index(a)))
+
+    def _root_parallel(self, state, player_id, obs_history) -> Tuple[Dict[str, int], int]:
+        workers = self.config.num_workers or multiprocessing.cpu_count()
+        seeds = [self.rng.randrange(2 ** 31) for _ in range(workers)]
+        config = asdict(self.config)
+        futures = [
+            self.pool.submit(_root_search_in_worker, config, state, player_id, obs_history, seed)
+            for seed in seeds
+        ]
+        visits: Dict[str, int] = {}
+        simulations = 0
+        for future in futures:
+            stats, count = future.result()
+            simulations += count
+            for action, (n, _) in stats.items():
+                visits[action] = visits.get(action, 0) + n
+        return visits, simulations
+
+    def _determinizer(self, state, player_id, obs_history) -> Callable[[], Dict[str, Any]]:
+        if self.sampler is None or obs_history is None:
+            return lambda: state
+        batch: List[Dict[str, Any]] = []
+
+        def determinize():
+            if not batch:
+                batch.extend(self.sampler.sample_states(obs_history, player_id, k=64))
+                if not batch:
+                    raise ValueError(f"No determinization is consistent with player {player_id}'s observations.")
+            return batch.pop()
+
+        return determinize
+
+    def _evaluate(self, state: Dict[str, Any], rng: random.Random) -> Tuple[List[float], int]:
+        """Rewards of a leaf and the number of rollouts used to estimate them."""
+        if self.config.mode != "leaf":
+            return random_playout(self.cwm, state, rng, self.config.max_rollout_steps, owned=self.cwm.has_inplace), 1
+        workers = self.config.num_workers or multiprocessing.cpu_count()
+        futures = [
+            self.pool.submit(_playout_in_worker, state, rng.randrange(2 ** 31), self.config.max_rollout_steps)
+            for _ in range(workers)
+        ]
+        results = [future.result() for future in futures]
+        return [sum(values) / len(results) for values in zip(*results)], len(results)
+
+    def _search(self, state, player_id, obs_history, rng: random.Random) -> Tuple[Node, int]:
+        cwm, c = self.cwm, self.config.c_uct
+        inplace = cwm.has_inplace
+        determinize = self._determinizer(state, player_id, obs_history)
+        deadline = time.perf_counter() + self.config.time_limit if self.config.time_limit else None
+        root = Node()
+        simulations = 0
+
+        for _ in range(self.config.num_simulations):
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            # With the in-place API each simulation walks a private copy of its determinization.
+            current = copy.deepcopy(determinize()) if inplace else determinize()
+            node = root
+            path: List[Tuple[Node, int]] = []
+            expanded = False
+
+            # Selection and expansion
+            while not expanded:
+                player = cwm.get_current_player(current)
+                if player == TERMINAL_PLAYER:
+                    break
+                actions = cwm.get_legal_actions(current)
+                if not actions:
+                    break
+                if player == CHANCE_PLAYER:
+                    action = rng.choice(actions)
+                else:
+                    untried = [a for a in actions if a not in node.children]
+                    for a in actions:
+                        if a in node.children:
+                            node.children[a].available += 1
+                    if untried:
+                        action = rng.choice(untried)
+                        expanded = True
+                    else:
+                        action = max(actions, key=lambda a: _ucb(node.children[a], c))
+                child = node.children.get(action)
+                if child is None:
+                    child = node.children[action] = Node()
+                path.append((child, player))
+                if inplace:
+                    cwm.apply_action_inplace(current, action)
+                else:
+                    current = cwm.apply_action(current, action)
+                node = child
+
+            # Simulation
+            if cwm.get_current_player(current) == TERMINAL_PLAYER:
+                rewards, playouts = list(cwm.get_rewards(current)), 1
+            else:
+                rewards, playouts = self._evaluate(current, rng)
+            simulations += playouts
+
+            # Backpropagation
+            root.visits += 1
+            for child, mover in path:
+                child.visits += 1
+                if mover >= 0:
+                    child.total += rewards[mover]
+
+        return root, simulations
+
+
+def _ucb(node: Node, c: float) -> float:
+    return node.total / node.visits + c * math.sqrt(math.log(node.available) / node.visits)
+
+
+def play_game(
+    cwm: CWM,
+    root_state: Dict[str, Any],
+    agents: List[Optional[MCTSAgent]],
+    rng: random.Random,
+    max_steps: int = 1000,
+) -> List[float]:
+    """
+    Plays one game; agents[p] picks for player p (None plays uniformly at random).
+    Imperfect-information agents receive the observations seen at their own turns.
+    """
+    state = root_state
+    obs_histories: Dict[int, List[Any]] = {}
+    imperfect = cwm.resample_history is not None
+    for _ in range(max_steps):
+        player = cwm.get_current_player(state)
+        if player == TERMINAL_PLAYER:
+            break
+        actions = cwm.get_legal_actions(state)
+        if player == CHANCE_PLAYER or agents[player] is None:
+            action = rng.choice(actions)
+        else:
+            obs_history = None
+            if imperfect:
+                obs_history = obs_histories.setdefault(player, [])
+                obs_history.append(cwm.get_observations(state)[player])
+            action = agents[player].select_action(state, player, obs_history)
+        state = cwm.apply_action(state, action)
+    return list(cwm.get_rewards(state))
+
+
+def _arena_game_in_worker(configs: List[Optional[Dict[str, Any]]], seed: int, swap: bool):
+    cwm, root_state = _WORKER["cwm"], _WORKER["root_state"]
+    seats = list(reversed(configs)) if swap else list(configs)
+    agents = [
+        MCTSAgent(cwm, root_state, MCTSConfig(**dict(c, mode="serial", seed=seed + i))) if c is not None else None
+        for i, c in enumerate(seats)
+    ]
+    start = time.perf_counter()
+    rewards = play_game(cwm, root_state, agents, random.Random(seed))
+    simulations = sum(a.simulations for a in agents if a is not None)
+    if swap:
+        rewards = list(reversed(rewards))
+    return rewards, simulations, time.perf_counter() - start
+
+
+def arena(
+    cwm: CWM,
+    root_state: Dict[str, Any],
+    configs: List[Optional[MCTSConfig]],
+    num_games: int = 100,
+    num_workers: Optional[int] = None,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Head-to-head evaluation of two agents (None is a uniform random player).
+    Games run in parallel across a process pool, each with its own seed, and
+    seats alternate so both agents play both sides. Agents inside the arena
+    search serially; the parallelism is across games.
+    """
+    if len(configs) != 2:
+        raise ValueError("arena() compares exactly two agents.")
+    plain = [asdict(c) if c is not None else None for c in configs]
+    start = time.perf_counter()
+    totals = [0.0, 0.0]
+    wins = [0, 0]
+    simulations = 0
+    search_seconds = 0.0
+    with _make_pool(num_workers, cwm.source, root_state) as pool:
+        futures = [pool.submit(_arena_game_in_worker, plain, seed + g, g % 2 == 1) for g in range(num_games)]
+        for future in futures:
+            rewards, sims, seconds = future.result()
+            simulations += sims
+            search_seconds += seconds
+            for i in range(2):
+                totals[i] += rewards[i]
+            if rewards[0] != rewards[1]:
+                wins[0 if rewards[0] > rewards[1] else 1] += 1
+
+    summary = {
+        "games": num_games,
+        "mean_reward": [t / num_games for t in totals],
+        "wins": wins,
+        "draws": num_games - sum(wins),
+        "simulations_per_sec": simulations / search_seconds if search_seconds else 0.0,
+        "elapsed": time.perf_counter() - start,
+    }
+    logging.info(f"Arena: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    from cwm import load_cwm
+    from games import GAMES
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    for game_name in ("tic_tac_toe", "kuhn_poker"):
+        cwm = load_cwm(game_name)
+        root_state = GAMES[game_name].initial_state()
+        result = arena(cwm, root_state, [MCTSConfig(num_simulations=200), None], num_games=40)
+        print(
+            f"{game_name}: MCTS vs random mean rewards {result['mean_reward']}, wins {result['wins']}, "
+            f"{result['simulations_per_sec']:.0f} simulations/s"
+        )
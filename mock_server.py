@@ -0,0 +1,312 @@
+import os
+import re
+import json
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from llm_cache import ResponseCache
+from rate_limit import estimate_tokens
+
+GAME_PATTERN = re.compile(r"building the game of (\w+)")
+CODE_BLOCK = re.compile(r"```python(.*?)```", re.DOTALL)  # The block LLMClient extracts
+FIXTURE_DIR = "data/mock"
+# Appended to a canned CWM to make it fail the tests while still passing the static check.
+BROKEN_SUFFIX = "\n\ndef get_rewards(state):\n    return [0.0, 0.0]\n"
+# Served when a game has neither a saved CWM nor a fixture: defines every required function, passes no tests.
+STUB_CWM = """def apply_action(state, action):
+    return state
+
+def get_current_player(state):
+    return -4
+
+def get_player_name(player_id):
+    return str(player_id)
+
+def get_rewards(state):
+    return [0.0, 0.0]
+
+def get_legal_actions(state):
+    return []
+
+def get_observations(state):
+    return [state, state]
+"""
+
+
+@dataclass
+class MockConfig:
+    latency_median: float = 2.0  # Seconds; latencies are log-normal around the median
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0  # Fraction of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0  # Fraction answered with HTTP 429
+    retry_after: float = 1.0  # Retry-After seconds sent with 429s
+    broken_rate: float = 0.0  # Fraction of responses whose code fails the tests
+    stream_chunk_chars: int = 200
+    seed: int = 0
+
+
+@dataclass
+class MockStats:
+    requests: int = 0
+    completions: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    broken: int = 0
+    recorded: int = 0  # Served from a recorded ResponseCache entry
+    latencies: List[float] = field(default_factory=list)
+
+
+def canned_responses(games: List[str]) -> Dict[str, str]:
+    """
+    A markdown-fenced response per game, made from its saved results/ CWM, or
+    from the fixture in data/mock/ on a fresh checkout. Games with neither get
+    a stub that fails the tests, so the load test still runs offline.
+    """
+    from games import GAMES
+
+    responses = {}
+    for game_name in games:
+        for path in (GAMES[game_name].output_path, os.path.join(FIXTURE_DIR, f"{game_name}.py")):
+            if os.path.exists(path):
+                with open(path, "r") as f:
+                    code = f.read()
+                break
+        else:
+            logging.warning(f"No saved CWM or fixture for {game_name}; serving a stub that fails the tests.")
+            code = STUB_CWM
+        responses[game_name] = f"```python\n{code}\n```"
+    return responses
+
+
+def break_code(content: str) -> str:
+    """Appends BROKEN_SUFFIX inside the code block the client extracts (or to the whole text if unfenced)."""
+    match = CODE_BLOCK.search(content)
+    if match is None:
+        return content + BROKEN_SUFFIX
+    return content[:match.end(1)] + BROKEN_SUFFIX + content[match.end(1):]
+
+
+class MockOpenAIServer:
+    """
+    A local stand-in for the OpenAI chat completions endpoint, for offline load
+    tests. Each request sleeps for a sampled latency and may fail with a 500 or
+    a 429 (with Retry-After), as configured. A response comes from a recorded
+    ResponseCache entry for the exact request if one exists, and otherwise from
+    the canned response of the game named in the system prompt; refinement
+    prompts name no game and get the one whose code they quote most. Streaming
+    requests are served as server-sent events, with usage in the final chunk.
+
+        with MockOpenAIServer(canned_responses(["tic_tac_toe"])) as server:
+            llm = LLMClient(base_url=server.base_url)
+    """
+
+    def __init__(self, responses: Dict[str, str], config: Optional[MockConfig] = None,
+                 cache: Optional[ResponseCache] = None, host: str = "127.0.0.1", port: int = 0):
+        if not responses:
+            raise ValueError("MockOpenAIServer needs at least one canned response.")
+        self.responses = responses
+        self.config = config or MockConfig()
+        self.cache = cache
+        self.stats = MockStats()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._last_game = next(iter(responses))
+        self._samples: Dict[tuple, int] = {}  # Completions served per identical request
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logging.info(f"Mock OpenAI server listening on {self.base_url}.")
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "MockOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _draw(self) -> Dict[str, Any]:
+        """Samples the outcome of one request under the lock (random.Random is shared)."""
+        cfg = self.config
+        with self._lock:
+            self.stats.requests += 1
+            latency = self._rng.lognormvariate(0.0, cfg.latency_sigma) * cfg.latency_median
+            roll = self._rng.random()
+            broken = self._rng.random() < cfg.broken_rate
+        if roll < cfg.error_rate:
+            status = 500
+        elif roll < cfg.error_rate + cfg.rate_limit_rate:
+            status = 429
+        else:
+            status = 200
+        return {"latency": latency, "status": status, "broken": broken}
+
+    def _content(self, body: Dict[str, Any]) -> str:
+        messages = {m["role"]: m["content"] for m in body.get("messages", [])}
+        system_prompt, user_prompt = messages.get("system", ""), messages.get("user", "")
+        if self.cache is not None:
+            # Requests carry no sample index: the n-th completion served for the same request
+            # is looked up as sample n, as LLMClient keys best-of-N samples in the cache.
+            request = (body.get("model", ""), system_prompt, user_prompt, body.get("temperature", 0.7), body.get("seed"))
+            with self._lock:
+                sample_index = self._samples.get(request, 0)
+                self._samples[request] = sample_index + 1
+            key = ResponseCache.make_key(*request[:4], sample_index, request[4])
+            recorded = self.cache.get(key)
+            if recorded is not None:
+                with self._lock:
+                    self.stats.recorded += 1
+                return recorded
+        return self.responses[self._game_for(system_prompt)]
+
+    def _game_for(self, prompt: str) -> str:
+        match = GAME_PATTERN.search(prompt)
+        if match and match.group(1) in self.responses:
+            game = match.group(1)
+        else:
+            # Refinement prompts quote the current code: pick the game whose canned code it shares most lines with.
+            overlap = {
+                game: sum(len(line) > 20 and line in prompt for line in response.splitlines())
+                for game, response in self.responses.items()
+            }
+            game = max(overlap, key=overlap.get)
+            if overlap[game] == 0:
+                game = self._last_game
+        with self._lock:
+            self._last_game = game
+        return game
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logging.debug(f"mock server: {format % args}")
+
+            def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+                    return
+
+                draw = server._draw()
+                time.sleep(draw["latency"])
+                if draw["status"] == 500:
+                    with server._lock:
+                        server.stats.errors += 1
+                    self._send_json(500, {"error": {"message": "Mock server error", "type": "server_error"}})
+                    return
+                if draw["status"] == 429:
+                    with server._lock:
+                        server.stats.rate_limited += 1
+                    self._send_json(
+                        429, {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_error"}},
+                        {"Retry-After": str(server.config.retry_after)},
+                    )
+                    return
+
+                content = server._content(body)
+                if draw["broken"]:
+                    content = break_code(content)
+                prompt_text = "".join(m.get("content", "") for m in body.get("messages", []))
+                usage = {
+                    "prompt_tokens": estimate_tokens(prompt_text),
+                    "completion_tokens": estimate_tokens(content),
+                }
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                with server._lock:
+                    server.stats.completions += 1
+                    server.stats.broken += draw["broken"]
+                    server.stats.latencies.append(draw["latency"])
+
+                if body.get("stream"):
+                    self._stream(body, content, usage)
+                else:
+                    self._send_json(200, {
+                        "id": f"chatcmpl-mock-{server.stats.requests}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "mock"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": usage,
+                    })
+
+            def _stream(self, body: Dict[str, Any], content: str, usage: Dict[str, int]):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                base = {
+                    "id": f"chatcmpl-mock-{server.stats.requests}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                }
+                step = server.config.stream_chunk_chars
+                chunks = [
+                    dict(base, choices=[{"index": 0, "delta": {"content": content[i:i + step]}, "finish_reason": None}])
+                    for i in range(0, len(content), step)
+                ]
+                chunks.append(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    chunks.append(dict(base, choices=[], usage=usage))
+                try:
+                    for chunk in chunks:
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client stopped reading at the closing code fence
+
+        return Handler
+
+
+if __name__ == "__main__":
+    from games import GAMES
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    server = MockOpenAIServer(canned_responses(list(GAMES)), MockConfig(rate_limit_rate=0.05, error_rate=0.02), port=8765)
+    server.start()
+    print(f"Serving on {server.base_url}; set base_url (or OPENAI_BASE_URL) to use it. Ctrl-C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
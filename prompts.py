@@ -103,6 +103,23 @@ Constraints:
 5. Enclose your code in a markdown block ```python ... ```.
 """
 
+INPLACE_API_PROMPT = """
+Game solvers will also call the following in-place functions to avoid copying the state at every step.
+Implement them in addition to the functions above:
+# START FUNCTION SIGNATURE
+def apply_action_inplace(state: State, action: Action) -> Any:
+    '''Applies the action by modifying state itself and returns an undo record of what changed.'''
+    pass
+
+def undo_action(state: State, undo: Any) -> None:
+    '''Restores state to exactly what it was before the apply_action_inplace call that returned undo.'''
+    pass
+# END FUNCTION SIGNATURE
+apply_action_inplace(state, action) must leave state equal to apply_action(state, action), and undo
+records are undone in reverse order. Keep undo records small (the changed squares and fields), never
+a copy of the whole state.
+"""
+
 REFINE_PROMPT = """
 The previous implementation failed the unit tests.
 Here is the error trace:
@@ -112,4 +129,39 @@ The original code was:
 {original_code}
 
 Please fix the errors and return the full, corrected code.
-"""
\ No newline at end of file
+"""
+
+OPTIMIZE_PROMPT = """
+The following implementation passes all unit tests but is too slow for use inside a game solver.
+It runs {rollouts_per_sec:.1f} random rollouts per second; the target is at least {floor:.1f}.
+
+Profile of random rollouts (hottest functions first):
+{profile_report}
+
+The current code is:
+{original_code}
+
+Please optimize the hot paths (for example avoid copy.deepcopy of the whole state, repeated
+board scans and quadratic loops in get_legal_actions) without changing behaviour, function
+signatures or the state format. Return the full, optimized code in a markdown block ```python ... ```.
+"""
+
+
+COMPACT_REFINE_PROMPT = """
+The current implementation of this game fails some unit tests.
+Game rules:
+{game_desc}
+
+Failing tests:
+{failing_tests}
+
+Errors (truncated, identical traces merged):
+{error_trace}
+
+Relevant functions from the current code:
+{relevant_code}
+
+Return ONLY the top-level functions (and any new imports or helpers) that must change, each
+written out in full, in a markdown block ```python ... ```. They will be merged into the
+current code by name; do not repeat unchanged functions or the unit tests.
+"""
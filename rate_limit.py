@@ -0,0 +1,125 @@
+import time
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple
+
+
+class BudgetExceededError(RuntimeError):
+    """Raised before an LLM call once the shared cost budget is spent."""
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate_per_minute, holding at most capacity."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Takes amount from the bucket (possibly going negative) and returns the seconds to wait."""
+        with self._lock:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def adjust(self, delta: float):
+        """Corrects a reservation once the real amount is known (positive delta refunds)."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits shared by every LLM client in a run."""
+
+    def __init__(self, requests_per_minute: float = 500, tokens_per_minute: float = 30000):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    async def acquire(self, estimated_tokens: int):
+        delay = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def acquire_blocking(self, estimated_tokens: int):
+        delay = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if delay > 0:
+            time.sleep(delay)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        self.tokens.adjust(estimated_tokens - actual_tokens)
+
+
+# USD per 1M (prompt, completion) tokens.
+DEFAULT_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+}
+
+
+def usd_cost(model: str, prompt_tokens: int, completion_tokens: int, prices: Optional[Dict[str, Tuple[float, float]]] = None) -> float:
+    prompt_price, completion_price = (prices or DEFAULT_PRICES).get(model, DEFAULT_PRICES["gpt-4o"])
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class CostBudget:
+    """
+    A global spend limit across all jobs. check() reserves an estimated cost for
+    a call before it is sent, and charge() (or release() if the call fails)
+    settles it, so concurrent jobs cannot all pass the check before any of them
+    has been charged.
+    """
+
+    def __init__(self, max_usd: float, prices: Optional[Dict[str, Tuple[float, float]]] = None,
+                 completion_tokens_estimate: int = 2000):
+        self.max_usd = max_usd
+        self.prices = prices or DEFAULT_PRICES
+        self.completion_tokens_estimate = completion_tokens_estimate  # Assumed response length when reserving
+        self.spent_usd = 0.0
+        self.reserved_usd = 0.0
+        self._lock = threading.Lock()
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        return usd_cost(model, prompt_tokens, completion_tokens, self.prices)
+
+    def check(self, model: str, prompt_tokens: int) -> float:
+        """Reserves the estimated cost of one call and returns it; raises if it does not fit the budget."""
+        estimate = self.cost(model, prompt_tokens, self.completion_tokens_estimate)
+        with self._lock:
+            if self.spent_usd + self.reserved_usd + estimate > self.max_usd:
+                raise BudgetExceededError(
+                    f"Cost budget exhausted: spent ${self.spent_usd:.4f} (${self.reserved_usd:.4f} reserved "
+                    f"by calls in flight) of ${self.max_usd:.2f}."
+                )
+            self.reserved_usd += estimate
+        return estimate
+
+    def charge(self, model: str, prompt_tokens: int, completion_tokens: int, reserved: float = 0.0) -> float:
+        """Records the actual cost of a call and frees its reservation."""
+        cost = self.cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            self.reserved_usd = max(0.0, self.reserved_usd - reserved)
+            self.spent_usd += cost
+        return cost
+
+    def release(self, reserved: float):
+        """Frees the reservation of a call that failed without usage."""
+        with self._lock:
+            self.reserved_usd = max(0.0, self.reserved_usd - reserved)
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough pre-call estimate (~4 characters per token) used to reserve TPM capacity."""
+    return sum(len(t) for t in texts) // 4 + 1
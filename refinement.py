@@ -0,0 +1,202 @@
+import ast
+import re
+from typing import Dict, List, Set
+
+from executor import TestReport
+from prompts import COMPACT_REFINE_PROMPT
+
+MAX_TRACE_LINES = 12
+MAX_FUNCTIONS = 6
+
+
+def _top_level_names(node: ast.stmt) -> List[str]:
+    """Names a top-level statement defines (functions, classes, simple assignments)."""
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return [node.name]
+    if isinstance(node, ast.Assign):
+        return [t.id for t in node.targets if isinstance(t, ast.Name)]
+    if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+        return [node.target.id]
+    return []
+
+
+def _node_span(node: ast.stmt):
+    """1-based inclusive line span of a statement, decorators included."""
+    start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+    return start, node.end_lineno
+
+
+def _source_of(lines: List[str], node: ast.stmt) -> str:
+    start, end = _node_span(node)
+    return "".join(lines[start - 1:end])
+
+
+def compact_traces(report: TestReport, max_lines: int = MAX_TRACE_LINES) -> str:
+    """
+    Failing tests with their tracebacks cut to the last max_lines lines.
+    Tests that fail with an identical trace are listed together once.
+    """
+    groups: Dict[str, List[str]] = {}
+    for record in report.failures:
+        lines = record.message.rstrip().splitlines()
+        if len(lines) > max_lines:
+            lines = ["  ..."] + lines[-max_lines:]
+        groups.setdefault("\n".join(lines), []).append(f"{record.name} ({record.status})")
+
+    blocks = []
+    for trace, names in groups.items():
+        blocks.append("\n".join([f"- {name}" for name in names] + [trace]))
+    return "\n\n".join(blocks)
+
+
+def failing_test_sources(test_code: str, report: TestReport) -> str:
+    """Source of the failing test methods only, instead of the whole test file."""
+    wanted = {r.name for r in report.failures}
+    lines = test_code.splitlines(True)
+    chunks = []
+    for node in ast.parse(test_code).body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for item in node.body:
+            if isinstance(item, ast.FunctionDef) and f"{node.name}.{item.name}" in wanted:
+                chunks.append(_source_of(lines, item))
+    return "".join(chunks)
+
+
+def relevant_functions(code: str, context: str, max_functions: int = MAX_FUNCTIONS) -> str:
+    """
+    Top-level definitions of the current code that the failing tests or their
+    tracebacks mention, plus the helpers those definitions call directly.
+    Falls back to the whole module when it cannot be parsed.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return code
+
+    lines = code.splitlines(True)
+    definitions = {}
+    for node in tree.body:
+        for name in _top_level_names(node):
+            definitions[name] = node
+
+    mentioned = set(re.findall(r"[A-Za-z_][A-Za-z0-9_]*", context))
+    selected: List[str] = [name for name in definitions if name in mentioned]
+    for name in list(selected):
+        for inner in ast.walk(definitions[name]):
+            if isinstance(inner, ast.Name) and inner.id in definitions and inner.id not in selected:
+                selected.append(inner.id)
+
+    if not selected:
+        return code
+    seen: Set[int] = set()
+    chunks = []
+    for name in selected[:max_functions]:
+        node = definitions[name]
+        if id(node) not in seen:
+            seen.add(id(node))
+            chunks.append(_source_of(lines, node))
+    return "\n".join(chunks)
+
+
+def build_compact_prompt(rules: str, test_code: str, current_code: str, report: TestReport) -> str:
+    traces = compact_traces(report)
+    tests = failing_test_sources(test_code, report)
+    return COMPACT_REFINE_PROMPT.format(
+        game_desc=rules,
+        failing_tests=tests or "(module failed before any test could run)",
+        error_trace=traces,
+        relevant_code=relevant_functions(current_code, tests + traces),
+    )
+
+
+def parses(code: str) -> bool:
+    try:
+        ast.parse(code)
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+
+def _import_insertion_line(tree: ast.Module) -> int:
+    """Line after which new imports go: the last top-level import, else the module docstring, else 0."""
+    line = 0
+    for i, node in enumerate(tree.body):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            line = node.end_lineno
+        elif i == 0 and isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            line = node.end_lineno
+    return line
+
+
+def merge_patch(current_code: str, patch_code: str) -> str:
+    """
+    Merges a function-level patch into the current module. A top-level statement
+    in the patch replaces the current statement defining the same names in place
+    (a multi-target assignment only if the patch covers all of its targets; else
+    the patched one is appended). New definitions are appended and new imports
+    go after the existing import block. A patch that does not parse is appended
+    as is, so that the static check reports its error in context. The current
+    code must parse; use the full refinement prompt for code that does not.
+    """
+    try:
+        current_tree = ast.parse(current_code)
+    except SyntaxError as e:
+        raise ValueError(f"Cannot merge a patch into code that does not parse: {e}") from e
+    lines = current_code.splitlines(True)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    try:
+        patch_tree = ast.parse(patch_code)
+    except SyntaxError:
+        return "".join(lines) + "\n\n" + patch_code.rstrip("\n") + "\n"
+
+    patch_lines = patch_code.splitlines(True)
+    replacements: Dict[str, str] = {}  # Name -> source of the patch statement defining it
+    defines: Dict[str, List[str]] = {}  # Patch statement source -> every name it defines
+    imports: List[str] = []
+    others: List[str] = []
+    for node in patch_tree.body:
+        names = _top_level_names(node)
+        text = _source_of(patch_lines, node)
+        if names:
+            defines[text] = names
+            for name in names:
+                replacements[name] = text
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            imports.append(text)
+        else:
+            others.append(text)
+
+    # Edits are (start, end, text) over 1-based line numbers, applied from the bottom up.
+    edits = []
+    applied: Set[str] = set()
+    placed: Set[str] = set()
+    for node in current_tree.body:
+        names = _top_level_names(node)
+        texts = {replacements.get(name) for name in names}
+        if not names or len(texts) != 1 or None in texts:
+            continue  # Not patched, or only some targets of a multi-target assignment are
+        text = texts.pop()
+        start, end = _node_span(node)
+        edits.append((start, end, "" if text in placed else (text if text.endswith("\n") else text + "\n")))
+        placed.add(text)
+        applied.update(defines[text])
+
+    existing_imports = {ast.unparse(n) for n in current_tree.body if isinstance(n, (ast.Import, ast.ImportFrom))}
+    new_imports = [i for i in imports if ast.unparse(ast.parse(i).body[0]) not in existing_imports]
+    if new_imports:
+        line = _import_insertion_line(current_tree)
+        edits.append((line + 1, line, "".join(i if i.endswith("\n") else i + "\n" for i in new_imports)))
+
+    for start, end, text in sorted(edits, key=lambda edit: (edit[0], edit[1]), reverse=True):
+        lines[start - 1:end] = [text] if text else []
+
+    merged = "".join(lines)
+    seen: Set[str] = set()
+    additions = [text for name, text in replacements.items() if name not in applied and text not in placed]
+    for text in additions + others:
+        if text not in seen:
+            seen.add(text)
+            merged += "\n\n" + text.rstrip("\n") + "\n"
+    return merged
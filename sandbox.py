@@ -0,0 +1,311 @@
+import os
+import queue
+import logging
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from executor import (
+    Executor,
+    TestRecord,
+    TestReport,
+    build_test_namespace,
+    load_test_names,
+    run_single_test,
+)
+
+try:
+    import resource
+except ImportError:  # Windows: rlimits are unavailable, only the wall-clock timeout applies.
+    resource = None
+
+
+class SandboxTimeout(Exception):
+    """The task exceeded its wall-clock timeout and the worker was killed."""
+
+
+class SandboxCrash(Exception):
+    """The worker process died while running the task (rlimit, segfault, os._exit...)."""
+
+
+def _set_soft_limit(limit, value: int):
+    _, hard = resource.getrlimit(limit)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    resource.setrlimit(limit, (value, hard))
+
+
+def _worker_main(conn, cpu_seconds: Optional[int], memory_bytes: Optional[int]):
+    """Worker loop: receives (fn, args) tuples and sends back ("ok", result) or ("error", trace)."""
+    if resource is not None and memory_bytes:
+        _set_soft_limit(resource.RLIMIT_AS, memory_bytes)
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+
+        fn, args = message
+        if resource is not None and cpu_seconds:
+            # RLIMIT_CPU counts the whole process lifetime, so re-arm it relative to usage so far.
+            used = resource.getrusage(resource.RUSAGE_SELF)
+            _set_soft_limit(resource.RLIMIT_CPU, int(used.ru_utime + used.ru_stime) + cpu_seconds)
+        try:
+            conn.send(("ok", fn(*args)))
+        except BaseException:
+            conn.send(("error", traceback.format_exc()))
+
+
+class _Worker:
+    def __init__(self, ctx, cpu_seconds: Optional[int], memory_bytes: Optional[int]):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, cpu_seconds, memory_bytes),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.tasks_done = 0
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    """
+    A reusable pool of sandboxed worker processes.
+
+    Each task runs under a wall-clock timeout plus per-task CPU and address-space
+    rlimits. Workers that time out or crash are replaced, and every worker is
+    recycled after max_tasks_per_worker tasks so leaked state cannot accumulate.
+    run() is thread-safe: up to num_workers tasks execute concurrently.
+    """
+
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        timeout: float = 10.0,
+        cpu_seconds: Optional[int] = 10,
+        memory_mb: Optional[int] = 1024,
+        max_tasks_per_worker: int = 50,
+    ):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_mb * 1024 * 1024 if memory_mb else None
+        self.max_tasks_per_worker = max_tasks_per_worker
+
+        # spawn keeps workers free of the parent's threads and memory footprint.
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[Optional[_Worker]]" = queue.Queue()
+        for _ in range(self.num_workers):
+            self._idle.put(None)  # Placeholder slots; workers are started lazily.
+        self._workers_lock = threading.Lock()
+        self._workers: List[_Worker] = []
+        self._closed = False
+
+    def run(self, fn: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """Runs fn(*args) in a worker. fn must be a picklable module-level function."""
+        if self._closed:
+            raise RuntimeError("WorkerPool is closed.")
+        timeout = self.timeout if timeout is None else timeout
+
+        worker = self._idle.get()
+        try:
+            if worker is None or not worker.process.is_alive():
+                if worker is not None:
+                    self._discard(worker)
+                worker = self._spawn()
+            worker.conn.send((fn, args))
+            if not worker.conn.poll(timeout):
+                self._discard(worker)
+                worker = None
+                raise SandboxTimeout(f"Execution exceeded the {timeout:.1f}s wall-clock limit.")
+            try:
+                status, payload = worker.conn.recv()
+            except EOFError:
+                exitcode = worker.process.exitcode
+                self._discard(worker)
+                worker = None
+                raise SandboxCrash(f"Sandbox worker died during execution (exit code {exitcode}).")
+
+            worker.tasks_done += 1
+            if worker.tasks_done >= self.max_tasks_per_worker:
+                self._retire(worker)
+                worker = None
+
+            if status == "error":
+                raise SandboxCrash(payload)
+            return payload
+        finally:
+            self._idle.put(worker)
+
+    def map(self, fn: Callable, arg_tuples: List[tuple], timeout: Optional[float] = None) -> List[Any]:
+        """Runs fn over many argument tuples concurrently; exceptions are returned in place."""
+        def call(args):
+            try:
+                return self.run(fn, *args, timeout=timeout)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.num_workers) as threads:
+            return list(threads.map(call, arg_tuples))
+
+    def close(self):
+        self._closed = True
+        with self._workers_lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self.cpu_seconds, self.memory_bytes)
+        with self._workers_lock:
+            self._workers.append(worker)
+        return worker
+
+    def _forget(self, worker: _Worker):
+        with self._workers_lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+
+    def _discard(self, worker: _Worker):
+        self._forget(worker)
+        worker.kill()
+
+    def _retire(self, worker: _Worker):
+        self._forget(worker)
+        worker.stop()
+
+
+def _run_tests_in_worker(game_code: str, test_code: str) -> Tuple[bool, str]:
+    return Executor().run_tests(game_code, test_code)
+
+
+def _profile_in_worker(game_code: str, root_state: Dict[str, Any], num_rollouts: int, seed: int) -> Dict[str, Any]:
+    return Executor().profile(game_code, root_state, num_rollouts, seed)
+
+
+def _check_inplace_in_worker(game_code: str, root_state: Dict[str, Any], num_trajectories: int, seed: int) -> List[str]:
+    return Executor().check_inplace(game_code, root_state, num_trajectories, seed)
+
+
+_NAMESPACE_CACHE: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+
+def _worker_namespace(game_code: str, test_code: str) -> Dict[str, Any]:
+    """Builds the test namespace once per worker for each (game, tests) pair."""
+    key = (game_code, test_code)
+    if key not in _NAMESPACE_CACHE:
+        if len(_NAMESPACE_CACHE) >= 8:
+            _NAMESPACE_CACHE.clear()
+        _NAMESPACE_CACHE[key] = build_test_namespace(game_code, test_code)
+    return _NAMESPACE_CACHE[key]
+
+
+def _list_tests_in_worker(game_code: str, test_code: str) -> List[str]:
+    return load_test_names(_worker_namespace(game_code, test_code))
+
+
+def _run_single_test_in_worker(game_code: str, test_code: str, test_name: str) -> TestRecord:
+    return run_single_test(_worker_namespace(game_code, test_code), test_name)
+
+
+class SandboxedExecutor(Executor):
+    """
+    Executor backend that runs every validation inside a WorkerPool process.
+    Keeps the (bool, str) contract of Executor.run_tests; timeouts and crashes
+    are reported as failures instead of taking down the pipeline.
+    """
+
+    def __init__(self, pool: Optional[WorkerPool] = None, **pool_kwargs):
+        self.pool = pool or WorkerPool(**pool_kwargs)
+
+    def run_tests(self, game_code: str, test_code: str) -> Tuple[bool, str]:
+        try:
+            return self.pool.run(_run_tests_in_worker, game_code, test_code)
+        except SandboxTimeout as e:
+            logging.warning(f"Sandbox timeout: {e}")
+            return False, f"TimeoutError: {e} Check for infinite loops or runaway recursion."
+        except SandboxCrash as e:
+            logging.warning("Sandbox worker crashed during validation.")
+            return False, f"Sandbox crash (possible memory/CPU limit hit):\n{e}"
+
+    def run_test_suite(self, game_code: str, test_code: str, fail_fast: bool = False) -> TestReport:
+        """
+        Structured per-test validation with each test dispatched to the pool, so
+        a suite runs in parallel across workers. A test that hangs or crashes
+        only fails its own record. With fail_fast, tests not yet started when
+        the first failure arrives are marked skipped.
+        """
+        try:
+            names = self.pool.run(_list_tests_in_worker, game_code, test_code)
+        except (SandboxTimeout, SandboxCrash) as e:
+            return TestReport([TestRecord("<module>", "error", 0.0, str(e))])
+
+        failed = threading.Event()
+
+        def run_one(name: str) -> TestRecord:
+            if fail_fast and failed.is_set():
+                return TestRecord(name, "skipped", 0.0, "Skipped after an earlier failure (fail-fast).")
+            try:
+                record = self.pool.run(_run_single_test_in_worker, game_code, test_code, name)
+            except SandboxTimeout as e:
+                record = TestRecord(name, "error", self.pool.timeout, f"TimeoutError: {e}")
+            except SandboxCrash as e:
+                record = TestRecord(name, "error", 0.0, f"Sandbox crash (possible memory/CPU limit hit):\n{e}")
+            if record.status in ("fail", "error"):
+                failed.set()
+            return record
+
+        with ThreadPoolExecutor(max_workers=self.pool.num_workers) as threads:
+            return TestReport(list(threads.map(run_one, names)))
+
+    def profile(self, game_code: str, root_state: Dict[str, Any], num_rollouts: int = 100, seed: int = 0) -> Dict[str, Any]:
+        try:
+            return self.pool.run(_profile_in_worker, game_code, root_state, num_rollouts, seed)
+        except (SandboxTimeout, SandboxCrash) as e:
+            return {"rollouts_per_sec": 0.0, "profile": f"Profiling failed in the sandbox: {e}"}
+
+    def check_inplace(self, game_code: str, root_state: Dict[str, Any], num_trajectories: int = 100, seed: int = 0) -> List[str]:
+        try:
+            return self.pool.run(_check_inplace_in_worker, game_code, root_state, num_trajectories, seed)
+        except (SandboxTimeout, SandboxCrash) as e:
+            return [f"In-place cross-check failed in the sandbox: {e}"]
+
+    def run_tests_many(self, game_codes: List[str], test_code: str) -> List[Tuple[bool, str]]:
+        """Validates several candidates in parallel across the pool."""
+        with ThreadPoolExecutor(max_workers=self.pool.num_workers) as threads:
+            return list(threads.map(lambda code: self.run_tests(code, test_code), game_codes))
+
+    def close(self):
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
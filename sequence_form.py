@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import linprog
+
+from cfr import InfoStateTree, exploitability
+from cwm import CWM, TERMINAL_PLAYER
+from game_tree import canonical_key
+
+BACKENDS = ("highs", "ecos", "osqp")
+CACHE_DIR = "cache/sequence_form"
+
+
+def _tuples(obj: Any) -> Any:
+    """Undoes JSON's tuple -> list conversion; canonical keys never contain lists."""
+    if isinstance(obj, list):
+        return tuple(_tuples(v) for v in obj)
+    return obj
+
+
+class SequenceForm:
+    """
+    Sequence-form representation of a two-player zero-sum game.
+
+    Sequence 0 of each player is the empty sequence; the others are the
+    (information set, action) pairs of that player, numbered by
+    seq_index[p][infoset, slot]. A[s0, s1] sums chance-weighted player-0
+    payoffs of the terminals reached by that sequence pair. E x = e and
+    F y = f are the realization-plan constraints: row 0 fixes the empty
+    sequence at 1, and each information set's action sequences sum to the
+    sequence that leads into it.
+    """
+
+    def __init__(self, A, E, F, seq_index: List[np.ndarray], parent_seq: np.ndarray,
+                 infoset_keys: List[Hashable], infoset_actions: List[List[str]], infoset_player: List[int],
+                 build_time: float = 0.0):
+        self.A = A.tocsr()
+        self.E = E.tocsr()
+        self.F = F.tocsr()
+        self.seq_index = seq_index
+        self.parent_seq = parent_seq
+        self.infoset_keys = infoset_keys
+        self.infoset_actions = infoset_actions
+        self.infoset_player = infoset_player
+        self.build_time = build_time
+
+    @property
+    def sizes(self) -> Dict[str, Any]:
+        return {
+            "sequences": list(self.A.shape),
+            "constraints": [self.E.shape[0], self.F.shape[0]],
+            "payoff_nnz": int(self.A.nnz),
+        }
+
+    @classmethod
+    def from_tree(cls, tree: InfoStateTree) -> "SequenceForm":
+        start = time.perf_counter()
+        num_infosets, max_actions = tree.num_infosets, tree.max_actions
+        player_of = np.array(tree.infoset_player, dtype=np.int64)
+
+        # Sequence ids per player: 0 is the empty sequence.
+        seq_index = []
+        counts = []
+        for p in (0, 1):
+            index = np.full((num_infosets, max_actions), -1, dtype=np.int64)
+            mask = tree.action_mask & (player_of == p)[:, None]
+            index[mask] = np.arange(1, mask.sum() + 1)
+            seq_index.append(index)
+            counts.append(int(mask.sum()) + 1)
+
+        # Last own sequence of each player on the path to every node, level by level.
+        node_seq = np.zeros((tree.num_nodes, 2), dtype=np.int64)
+        edge_of_child = np.full(tree.num_nodes, -1, dtype=np.int64)
+        edge_of_child[tree.edge_child] = np.arange(len(tree.edge_child))
+        for level in tree.levels[1:]:
+            node_seq[level] = node_seq[tree.parent[level]]
+            edges = edge_of_child[level]
+            actors = tree.edge_actor[edges]
+            for p in (0, 1):
+                own = actors == p
+                node_seq[level[own], p] = seq_index[p][tree.edge_infoset[edges[own]], tree.edge_slot[edges[own]]]
+
+        # Each information set's parent sequence (perfect recall: the same for all its nodes).
+        parent_seq = node_seq[tree.infoset_node, player_of] if num_infosets else np.zeros(0, dtype=np.int64)
+
+        chance_reach = tree.reach(tree.edge_probs(tree.action_mask / tree.action_mask.sum(axis=1, keepdims=True)))[:, 2]
+        terminals = np.nonzero(tree.player == TERMINAL_PLAYER)[0]
+        A = sp.coo_matrix(
+            (chance_reach[terminals] * tree.utility[terminals, 0], (node_seq[terminals, 0], node_seq[terminals, 1])),
+            shape=(counts[0], counts[1]),
+        ).tocsr()  # Duplicate entries are summed
+
+        constraints = []
+        for p in (0, 1):
+            rows, cols, vals = [0], [0], [1.0]
+            for row, i in enumerate(np.nonzero(player_of == p)[0], start=1):
+                rows.append(row)
+                cols.append(int(parent_seq[i]))
+                vals.append(-1.0)
+                for s in seq_index[p][i][seq_index[p][i] >= 0]:
+                    rows.append(row)
+                    cols.append(int(s))
+                    vals.append(1.0)
+            constraints.append(sp.coo_matrix((vals, (rows, cols)), shape=(rows[-1] + 1, counts[p])).tocsr())
+
+        return cls(
+            A, constraints[0], constraints[1], seq_index, parent_seq,
+            tree.infoset_keys, tree.infoset_actions, tree.infoset_player,
+            build_time=tree.build_time + time.perf_counter() - start,
+        )
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        for name in ("A", "E", "F"):
+            sp.save_npz(os.path.join(directory, f"{name}.npz"), getattr(self, name))
+        np.save(os.path.join(directory, "seq_index.npy"), np.stack(self.seq_index))
+        np.save(os.path.join(directory, "parent_seq.npy"), self.parent_seq)
+        with open(os.path.join(directory, "infosets.json"), "w") as f:
+            json.dump({
+                "keys": self.infoset_keys,
+                "actions": self.infoset_actions,
+                "players": self.infoset_player,
+                "build_time": self.build_time,
+            }, f)
+
+    @classmethod
+    def load(cls, directory: str) -> "SequenceForm":
+        A, E, F = (sp.load_npz(os.path.join(directory, f"{name}.npz")) for name in ("A", "E", "F"))
+        seq_index = np.load(os.path.join(directory, "seq_index.npy"))
+        parent_seq = np.load(os.path.join(directory, "parent_seq.npy"))
+        with open(os.path.join(directory, "infosets.json"), "r") as f:
+            meta = json.load(f)
+        return cls(
+            A, E, F, [seq_index[0], seq_index[1]], parent_seq,
+            [_tuples(k) for k in meta["keys"]], meta["actions"], meta["players"], meta["build_time"],
+        )
+
+
+def cache_key(cwm: CWM, root_state: Dict[str, Any]) -> str:
+    return hashlib.sha256(repr((cwm.source, canonical_key(root_state))).encode("utf-8")).hexdigest()[:16]
+
+
+def load_or_build(cwm: CWM, root_state: Dict[str, Any], cache_dir: Optional[str] = CACHE_DIR) -> SequenceForm:
+    """Builds the sequence form of a CWM, reusing the matrices cached on disk for the same source and root state."""
+    directory = os.path.join(cache_dir, cache_key(cwm, root_state)) if cache_dir else None
+    if directory and os.path.exists(os.path.join(directory, "infosets.json")):
+        start = time.perf_counter()
+        form = SequenceForm.load(directory)
+        logging.info(f"Loaded sequence form from {directory} in {time.perf_counter() - start:.3f}s.")
+        return form
+    form = SequenceForm.from_tree(InfoStateTree(cwm, root_state))
+    if directory:
+        form.save(directory)
+    return form
+
+
+@dataclass
+class LPSolution:
+    value: float  # Game value for player 0
+    realization: List[np.ndarray]  # Realization plans x (player 0) and y (player 1)
+    backend: str
+    build_time: float
+    solve_time: float
+    sizes: Dict[str, Any]
+
+    def summary(self) -> str:
+        return (
+            f"{self.backend}: value {self.value:+.6f}, sequences {self.sizes['sequences']}, "
+            f"constraints {self.sizes['constraints']}, payoff nnz {self.sizes['payoff_nnz']}, "
+            f"build {self.build_time:.3f}s, solve {self.solve_time:.3f}s"
+        )
+
+
+def _solve_highs(c, A_ub, A_eq, b_eq, bounds) -> np.ndarray:
+    result = linprog(c, A_ub=A_ub, b_ub=np.zeros(A_ub.shape[0]), A_eq=A_eq, b_eq=b_eq, bounds=bounds, method="highs")
+    if not result.success:
+        raise RuntimeError(f"HiGHS failed: {result.message}")
+    return result.x
+
+
+def _solve_cvxpy(c, A_ub, A_eq, b_eq, num_nonneg: int, backend: str) -> np.ndarray:
+    import cvxpy as cp
+
+    z = cp.Variable(len(c))
+    problem = cp.Problem(
+        cp.Minimize(c @ z),
+        [A_ub @ z <= 0, A_eq @ z == b_eq, z[:num_nonneg] >= 0],
+    )
+    problem.solve(solver=backend.upper())
+    if z.value is None:
+        raise RuntimeError(f"{backend} failed: {problem.status}")
+    return np.asarray(z.value)
+
+
+def _solve_player(form: SequenceForm, player: int, backend: str) -> np.ndarray:
+    """
+    Player 0: max f'q  s.t.  F'q - A'x <= 0,  E x = e,  x >= 0 (q free).
+    Player 1 is the same LP on -A' with the roles of E and F swapped.
+    Returns [realization plan, dual variables].
+    """
+    own, other = (form.E, form.F) if player == 0 else (form.F, form.E)
+    payoff = form.A.T if player == 0 else -form.A
+    n, m = own.shape[1], other.shape[0]
+
+    c = np.zeros(n + m)
+    c[n] = -1.0  # Maximize the dual variable of the opponent's root constraint
+    A_ub = sp.hstack([-payoff, other.T]).tocsr()
+    A_eq = sp.hstack([own, sp.csr_matrix((own.shape[0], m))]).tocsr()
+    b_eq = np.zeros(own.shape[0])
+    b_eq[0] = 1.0
+
+    if backend == "highs":
+        return _solve_highs(c, A_ub, A_eq, b_eq, [(0, None)] * n + [(None, None)] * m)
+    return _solve_cvxpy(c, A_ub, A_eq, b_eq, n, backend)
+
+
+def solve_sequence_form(form: SequenceForm, backend: str = "highs") -> LPSolution:
+    """Solves both players' sequence-form LPs for an exact Nash equilibrium."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported backend '{backend}'. Expected one of {list(BACKENDS)}.")
+    start = time.perf_counter()
+    n0, n1 = form.A.shape
+    z0 = _solve_player(form, 0, backend)
+    z1 = _solve_player(form, 1, backend)
+    solve_time = time.perf_counter() - start
+
+    x, y = np.maximum(z0[:n0], 0.0), np.maximum(z1[:n1], 0.0)
+    return LPSolution(
+        value=float(x @ form.A @ y),
+        realization=[x, y],
+        backend=backend,
+        build_time=form.build_time,
+        solve_time=solve_time,
+        sizes=form.sizes,
+    )
+
+
+def behaviour_strategy(form: SequenceForm, solution: LPSolution) -> np.ndarray:
+    """Converts the realization plans into the (num_infosets, max_actions) layout used by cfr.py."""
+    seq_index = form.seq_index
+    strategy = np.zeros(seq_index[0].shape)
+    for i, player in enumerate(form.infoset_player):
+        plan = solution.realization[player]
+        sequences = seq_index[player][i][seq_index[player][i] >= 0]
+        probs = plan[sequences]
+        total = probs.sum()
+        strategy[i, :len(sequences)] = probs / total if total > 1e-12 else 1.0 / len(sequences)
+    return strategy
+
+
+def policy(form: SequenceForm, solution: LPSolution) -> Dict[Hashable, Dict[str, float]]:
+    strategy = behaviour_strategy(form, solution)
+    return {
+        key: dict(zip(actions, strategy[i, :len(actions)].tolist()))
+        for i, (key, actions) in enumerate(zip(form.infoset_keys, form.infoset_actions))
+    }
+
+
+if __name__ == "__main__":
+    from cfr import CFRSolver
+    from cwm import load_cwm
+    from games import GAMES
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    game_name = "kuhn_poker"
+    cwm = load_cwm(game_name)
+    root_state = GAMES[game_name].initial_state()
+    tree = InfoStateTree(cwm, root_state)
+    form = load_or_build(cwm, root_state)
+    for backend in BACKENDS:
+        solution = solve_sequence_form(form, backend)
+        print(f"{solution.summary()}, exploitability {exploitability(tree, behaviour_strategy(form, solution)):.2e}")
+
+    solver = CFRSolver(tree, variant="cfr+")
+    start = time.perf_counter()
+    solver.solve(iterations=1000, eval_every=1000)
+    print(
+        f"cfr+: 1000 iterations in {time.perf_counter() - start:.3f}s, "
+        f"exploitability {exploitability(tree, solver.average_strategy()):.2e}"
+    )
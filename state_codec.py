@@ -0,0 +1,282 @@
+import sys
+import random
+import logging
+from collections.abc import Mapping
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cwm import CWM, TERMINAL_PLAYER
+
+PAD = 255  # Byte value of -1 in int8: an unused slot of a variable-length field
+MAX_VOCAB = 127
+
+
+class StateCodec:
+    """
+    Converts dict states with a fixed shape to int8 arrays (or the same bytes).
+
+    Every top-level key gets a fixed range of slots: one for a scalar, one per
+    element for a list of scalars. Slots hold the value's index in a per-key
+    vocabulary that grows as new values are encoded (at most 127 per key), so
+    'w'/'b'/'.' or None/0/1 boards take one byte per square. Lists must keep
+    the root state's length unless max_lengths gives them a capacity, in which
+    case a length slot precedes the padded elements.
+    """
+
+    def __init__(self, root_state: Dict[str, Any], max_lengths: Optional[Dict[str, int]] = None,
+                 vocab: Optional[Dict[str, List[Any]]] = None):
+        max_lengths = max_lengths or {}
+        self.keys = sorted(root_state)
+        self.layout: Dict[str, Tuple[int, Optional[int], bool]] = {}  # key -> (offset, list length or None, variable)
+        offset = 0
+        for key in self.keys:
+            value = root_state[key]
+            if isinstance(value, (list, tuple)):
+                variable = key in max_lengths
+                length = max_lengths.get(key, len(value))
+                self.layout[key] = (offset, length, variable)
+                offset += length + variable
+            else:
+                self.layout[key] = (offset, None, False)
+                offset += 1
+        self.size = offset
+        self.vocab: Dict[str, List[Any]] = {key: [] for key in self.keys}
+        self._index: Dict[str, Dict[Tuple[type, Hashable], int]] = {key: {} for key in self.keys}
+        for key, values in (vocab or {}).items():
+            for value in values:
+                self._code(key, value)
+
+    def _code(self, key: str, value: Any) -> int:
+        # Keyed by type as well, so that 1, 1.0 and True stay distinct values.
+        if isinstance(value, (list, tuple, dict, set)):
+            raise ValueError(f"Field '{key}' holds a nested {type(value).__name__}; only scalars can be encoded.")
+        index = self._index[key]
+        code = index.get((type(value), value))
+        if code is None:
+            values = self.vocab[key]
+            if len(values) >= MAX_VOCAB:
+                raise ValueError(f"Field '{key}' has more than {MAX_VOCAB} distinct values.")
+            code = index[(type(value), value)] = len(values)
+            values.append(value)
+        return code
+
+    def _codes(self, state: Dict[str, Any]) -> List[int]:
+        if len(state) != len(self.keys):
+            raise ValueError(f"State keys {sorted(state)} do not match the codec's {self.keys}.")
+        codes: List[int] = []
+        for key in self.keys:
+            _, length, variable = self.layout[key]
+            value = state[key]
+            if length is None:
+                codes.append(self._code(key, value))
+                continue
+            if len(value) > length or not variable and len(value) != length:
+                raise ValueError(f"Field '{key}' has length {len(value)}; the codec expects {length}.")
+            if variable:
+                codes.append(len(value))
+            codes.extend(self._code(key, v) for v in value)
+            codes.extend([PAD] * (length - len(value)))
+        return codes
+
+    def pack(self, state: Dict[str, Any]) -> bytes:
+        return bytes(self._codes(state))
+
+    def encode(self, state: Dict[str, Any]) -> np.ndarray:
+        return np.frombuffer(self.pack(state), dtype=np.int8).copy()
+
+    def encode_batch(self, states: Sequence[Dict[str, Any]]) -> np.ndarray:
+        return np.frombuffer(b"".join(self.pack(s) for s in states), dtype=np.int8).reshape(len(states), self.size).copy()
+
+    def unpack(self, data: bytes) -> Dict[str, Any]:
+        state: Dict[str, Any] = {}
+        for key in self.keys:
+            offset, length, variable = self.layout[key]
+            values = self.vocab[key]
+            if length is None:
+                state[key] = values[data[offset]]
+            elif variable:
+                state[key] = [values[c] for c in data[offset + 1:offset + 1 + data[offset]]]
+            else:
+                state[key] = [values[c] for c in data[offset:offset + length]]
+        return state
+
+    def decode(self, array: np.ndarray) -> Dict[str, Any]:
+        return self.unpack(array.astype(np.int8, copy=False).tobytes())
+
+    def decode_batch(self, batch: np.ndarray) -> List[Dict[str, Any]]:
+        return [self.decode(row) for row in batch]
+
+
+class CompactState(Mapping):
+    """
+    A read-only dict view of a packed state. Generated functions that only read
+    the state (get_legal_actions, get_rewards, ...) accept it directly; use
+    CompactCWM for apply_action. It hashes and compares by its bytes.
+    """
+
+    __slots__ = ("codec", "data")
+
+    def __init__(self, codec: StateCodec, data: bytes):
+        self.codec = codec
+        self.data = data
+
+    @classmethod
+    def from_dict(cls, codec: StateCodec, state: Dict[str, Any]) -> "CompactState":
+        return cls(codec, codec.pack(state))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.codec.unpack(self.data)
+
+    def __getitem__(self, key: str) -> Any:
+        offset, length, variable = self.codec.layout[key]
+        values = self.codec.vocab[key]
+        if length is None:
+            return values[self.data[offset]]
+        start, end = (offset + 1, offset + 1 + self.data[offset]) if variable else (offset, offset + length)
+        return [values[c] for c in self.data[start:end]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.codec.keys)
+
+    def __len__(self) -> int:
+        return len(self.codec.keys)
+
+    def __hash__(self) -> int:
+        return hash(self.data)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, CompactState) and other.codec is self.codec:
+            return self.data == other.data
+        return isinstance(other, Mapping) and dict(self.items()) == dict(other.items())
+
+    def __copy__(self) -> "CompactState":
+        return self  # Immutable
+
+    def __deepcopy__(self, memo) -> "CompactState":
+        return self
+
+    def __repr__(self) -> str:
+        return f"CompactState({self.to_dict()!r})"
+
+
+class CompactCWM:
+    """
+    The CWM interface over CompactStates, plus batched calls over (n, size)
+    int8 arrays. Each call decodes to a dict for the generated function;
+    successors are stepped with the in-place API when the CWM has it.
+    """
+
+    def __init__(self, cwm: CWM, codec: StateCodec):
+        self.cwm = cwm
+        self.codec = codec
+        self.get_player_name = cwm.get_player_name
+
+    def wrap(self, state: Dict[str, Any]) -> CompactState:
+        return CompactState.from_dict(self.codec, state)
+
+    def _successor(self, state: Dict[str, Any], action: str) -> Dict[str, Any]:
+        # state is a freshly decoded dict, so the in-place API can modify it.
+        if self.cwm.has_inplace:
+            self.cwm.apply_action_inplace(state, action)
+            return state
+        return self.cwm.apply_action(state, action)
+
+    def apply_action(self, state: CompactState, action: str) -> CompactState:
+        return self.wrap(self._successor(state.to_dict(), action))
+
+    def get_current_player(self, state: CompactState) -> int:
+        return self.cwm.get_current_player(state.to_dict())
+
+    def get_rewards(self, state: CompactState) -> List[float]:
+        return self.cwm.get_rewards(state.to_dict())
+
+    def get_legal_actions(self, state: CompactState) -> List[str]:
+        return self.cwm.get_legal_actions(state.to_dict())
+
+    def get_observations(self, state: CompactState) -> List[Any]:
+        return self.cwm.get_observations(state.to_dict())
+
+    def step_batch(self, batch: np.ndarray, actions: Sequence[str]) -> np.ndarray:
+        """Applies actions[i] to row i and returns the successor rows as a new array."""
+        if len(batch) != len(actions):
+            raise ValueError(f"Got {len(actions)} actions for {len(batch)} states.")
+        out = np.empty_like(batch)
+        for i, (row, action) in enumerate(zip(batch, actions)):
+            out[i] = np.frombuffer(self.codec.pack(self._successor(self.codec.decode(row), action)), dtype=np.int8)
+        return out
+
+    def current_player_batch(self, batch: np.ndarray) -> np.ndarray:
+        return np.array([self.cwm.get_current_player(self.codec.decode(row)) for row in batch], dtype=np.int8)
+
+    def legal_actions_batch(self, batch: np.ndarray) -> List[List[str]]:
+        return [self.cwm.get_legal_actions(self.codec.decode(row)) for row in batch]
+
+    def rollout_batch(self, root_state: Dict[str, Any], num_rollouts: int, seed: int = 0, max_steps: int = 1000) -> np.ndarray:
+        """
+        Plays num_rollouts uniformly random games side by side and returns every
+        visited state as a (steps + 1, num_rollouts, size) array; finished games
+        repeat their terminal row.
+        """
+        rng = random.Random(seed)
+        batch = np.tile(self.codec.encode(root_state), (num_rollouts, 1))
+        frames = [batch]
+        for _ in range(max_steps):
+            legal = [
+                [] if player == TERMINAL_PLAYER else actions
+                for player, actions in zip(self.current_player_batch(batch), self.legal_actions_batch(batch))
+            ]
+            active = [i for i, actions in enumerate(legal) if actions]
+            if not active:
+                break
+            batch = batch.copy()
+            batch[active] = self.step_batch(batch[active], [rng.choice(legal[i]) for i in active])
+            frames.append(batch)
+        return np.stack(frames)
+
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """Bytes held by obj and everything it references (shared objects counted once)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    return size
+
+
+def storage_report(codec: StateCodec, states: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Bytes to hold states as dicts, as a list of packed bytes and as one int8 array."""
+    packed = [codec.pack(s) for s in states]
+    dict_bytes = deep_sizeof(states)
+    array_bytes = codec.encode_batch(states).nbytes
+    return {
+        "states": len(states),
+        "dict_bytes": dict_bytes,
+        "packed_bytes": deep_sizeof(packed),
+        "array_bytes": array_bytes,
+        "reduction": dict_bytes / array_bytes if array_bytes else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    from cwm import load_cwm
+    from games import GAMES
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    for game_name in ("tic_tac_toe", "isolation", "breakthrough"):
+        cwm = load_cwm(game_name)
+        root_state = GAMES[game_name].initial_state()
+        codec = StateCodec(root_state)
+        frames = CompactCWM(cwm, codec).rollout_batch(root_state, 200)
+        states = [codec.decode(row) for row in frames.reshape(-1, codec.size)]
+        report = storage_report(codec, states)
+        print(
+            f"{game_name}: {report['states']} rollout states, {report['dict_bytes'] / 1024:.0f} KB as dicts, "
+            f"{report['packed_bytes'] / 1024:.0f} KB as bytes, {report['array_bytes'] / 1024:.0f} KB as int8 "
+            f"({report['reduction']:.0f}x smaller)"
+        )
@@ -0,0 +1,94 @@
+import ast
+import re
+import traceback
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from executor import GAME_FILENAME, TestRecord, TestReport
+
+SIGNATURE_BLOCK = re.compile(r"# START FUNCTION SIGNATURE\n(.*?)# END FUNCTION SIGNATURE", re.S)
+
+# Generated game logic only needs the standard library's pure helpers (copy, random,
+# itertools, typing, ...). Anything touching the OS, network or interpreter is rejected.
+FORBIDDEN_MODULES = frozenset({
+    "os", "sys", "subprocess", "shutil", "socket", "ctypes", "signal", "importlib", "builtins",
+    "multiprocessing", "threading", "asyncio", "pickle", "marshal", "urllib", "http", "requests",
+    "pathlib", "tempfile", "inspect", "gc", "resource",
+})
+FORBIDDEN_CALLS = frozenset({"exec", "eval", "compile", "open", "__import__", "input", "breakpoint", "globals"})
+
+
+@lru_cache(maxsize=8)
+def required_signatures(prompt_template: str) -> Dict[str, int]:
+    """Function name -> positional parameter count, read from a prompt's signature block."""
+    match = SIGNATURE_BLOCK.search(prompt_template)
+    if not match:
+        return {}
+    tree = ast.parse(match.group(1))
+    return {
+        node.name: len(node.args.posonlyargs) + len(node.args.args)
+        for node in tree.body
+        if isinstance(node, ast.FunctionDef)
+    }
+
+
+def _accepts(func: ast.FunctionDef, arity: int) -> bool:
+    positional = func.args.posonlyargs + func.args.args
+    required = len(positional) - len(func.args.defaults)
+    required_kwonly = any(default is None for default in func.args.kw_defaults)
+    return required <= arity and (len(positional) >= arity or func.args.vararg is not None) and not required_kwonly
+
+
+def _forbidden_usage(tree: ast.Module) -> List[str]:
+    issues = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            modules = [node.module or ""]
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FORBIDDEN_CALLS:
+            issues.append(f"line {node.lineno}: call to forbidden builtin '{node.func.id}'")
+            continue
+        else:
+            continue
+        for module in modules:
+            if module.split(".")[0] in FORBIDDEN_MODULES:
+                issues.append(f"line {node.lineno}: forbidden import '{module}'")
+    return issues
+
+
+def static_check(code: str, signatures: Dict[str, int]) -> List[str]:
+    """
+    Checks generated code without running it: it must compile, define every
+    required function at module level with a compatible positional arity, and
+    avoid forbidden imports and builtins. Returns a list of problems (empty if ok).
+    """
+    try:
+        tree = ast.parse(code, GAME_FILENAME)
+        compile(tree, GAME_FILENAME, "exec")
+    except (SyntaxError, ValueError) as e:
+        return ["".join(traceback.format_exception_only(type(e), e)).rstrip()]
+
+    defined = {
+        node.name: node for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    }
+    issues = []
+    for name, arity in signatures.items():
+        func = defined.get(name)
+        if func is None:
+            issues.append(f"missing required function '{name}'")
+        elif isinstance(func, ast.AsyncFunctionDef):
+            issues.append(f"'{name}' must be a regular function, not async")
+        elif not _accepts(func, arity):
+            issues.append(f"'{name}' must accept {arity} positional argument(s), got ({ast.unparse(func.args)})")
+    return issues + _forbidden_usage(tree)
+
+
+def static_report(code: str, signatures: Dict[str, int]) -> Optional[TestReport]:
+    """A single-record failing TestReport if the static check fails, else None."""
+    issues = static_check(code, signatures)
+    if not issues:
+        return None
+    message = "Static check failed before execution:\n" + "\n".join(f"- {issue}" for issue in issues)
+    return TestReport([TestRecord("<static>", "error", 0.0, message)])
@@ -0,0 +1,120 @@
+import re
+from typing import Optional, Tuple
+
+OPEN_FENCE = re.compile(r"```(?:python|py)[^\n]*\n")
+CLOSE_FENCE = "\n```"
+
+# Messages of SyntaxErrors that only mean "the code is not finished yet". A missing
+# indented block is not among them: the prefix is only checked at a column-0 line.
+_INCOMPLETE_MARKERS = (
+    "never closed",
+    "unexpected EOF",
+    "unterminated",
+    "incomplete input",
+)
+_STATEMENT_START = re.compile(r"(def|class|async|import|from|@|[A-Za-z_])")
+
+
+class StreamingCodeParser:
+    """
+    Incremental parser for a streamed LLM response.
+
+    feed() receives text deltas as they arrive and reports when the stream can
+    stop: either the closing fence of the python block was seen (done), or the
+    response should be abandoned (aborted_reason is set). Each time a new
+    top-level statement begins, the statements since the last check must
+    compile; a SyntaxError there means the response is malformed and is
+    aborted. Compiled statements are not compiled again, so checking stays
+    linear in the length of the response.
+    """
+
+    def __init__(self, max_chars: int = 60000):
+        self.max_chars = max_chars
+        self.text = ""
+        self.code_start: Optional[int] = None
+        self.code_end: Optional[int] = None
+        self.aborted_reason: Optional[str] = None
+        self._checked_upto = 0  # Offset (relative to code_start) of the last line already inspected
+        self._compiled_upto = 0  # Offset (relative to code_start) up to which the code is known to compile
+        self._compiled_lines = 0  # Lines before _compiled_upto
+        self._in_decorator = False  # The last top-level statement seen is a decorator line
+
+    @property
+    def done(self) -> bool:
+        return self.code_end is not None
+
+    @property
+    def finished(self) -> bool:
+        return self.done or self.aborted_reason is not None
+
+    @property
+    def code(self) -> str:
+        if self.code_start is None:
+            return self.text.strip()
+        end = self.code_end if self.code_end is not None else len(self.text)
+        return self.text[self.code_start:end].strip()
+
+    def feed(self, delta: str) -> bool:
+        """Adds a chunk of text; returns True once the stream should be stopped."""
+        if self.finished or not delta:
+            return self.finished
+        self.text += delta
+
+        if self.code_start is None:
+            match = OPEN_FENCE.search(self.text)
+            if match:
+                self.code_start = match.end()
+
+        if self.code_start is not None:
+            close = self.text.find(CLOSE_FENCE, max(self.code_start - 1, 0))
+            if close != -1:
+                self.code_end = close + 1
+                return True
+            self._check_syntax()
+
+        if len(self.text) > self.max_chars:
+            self.aborted_reason = f"response exceeded {self.max_chars} characters"
+        return self.finished
+
+    def _check_syntax(self):
+        # Offsets are relative to code_start; the text is indexed in place rather than copied per delta.
+        base = self.code_start
+        last_newline = self.text.rfind("\n", base) - base
+        while self._checked_upto < last_newline:
+            line_end = self.text.find("\n", base + self._checked_upto) - base
+            line = self.text[base + self._checked_upto:base + line_end]
+            line_start = self._checked_upto
+            self._checked_upto = line_end + 1
+
+            if not line or line[0].isspace() or not _STATEMENT_START.match(line):
+                continue
+            if re.match(r"(else|elif|except|finally)\b", line):
+                continue
+            # A decorator is only complete together with the def or class that follows it.
+            after_decorator, self._in_decorator = self._in_decorator, line.startswith("@")
+            if line_start == 0 or after_decorator:
+                continue
+            chunk = self.text[base + self._compiled_upto:base + line_start]
+            compiles, error = _compile_check(chunk)
+            if error is not None:
+                lines = self._compiled_lines + chunk.count("\n")
+                self.aborted_reason = (
+                    f"malformed code before line {lines + 1}: {error.msg} (line {(error.lineno or 0) + self._compiled_lines})"
+                )
+                return
+            if compiles:
+                self._compiled_upto = line_start
+                self._compiled_lines += chunk.count("\n")
+
+
+def _compile_check(source: str) -> Tuple[bool, Optional[SyntaxError]]:
+    """Returns (compiles, error), where error is only set if source is definitely malformed."""
+    try:
+        compile(source, "<stream>", "exec")
+    except SyntaxError as e:
+        if any(marker in str(e.msg) for marker in _INCOMPLETE_MARKERS):
+            return False, None
+        return False, e
+    except ValueError:
+        return False, None
+    return True, None
@@ -1,16 +1,44 @@
+import time
+import asyncio
 import logging
+from typing import Any, Dict, Optional, Tuple
 from llm_client import LLMClient
-from executor import Executor
+from executor import Executor, TestRecord, TestReport
+from refinement import build_compact_prompt, merge_patch, parses
+from static_check import required_signatures, static_report
+from rate_limit import estimate_tokens
+from cascade import ModelCascade, TierRun
+import telemetry
 from prompts import (
     CWM_SYSTEM_PROMPT_PERFECT,
     CWM_SYSTEM_PROMPT_IMPERFECT,
     REFINE_PROMPT,
+    OPTIMIZE_PROMPT,
+    INPLACE_API_PROMPT,
 )
 
 class CWMSynthesizer:
-    def __init__(self):
-        self.llm = LLMClient()
-        self.executor = Executor()
+    def __init__(
+        self,
+        llm: LLMClient = None,
+        executor: Executor = None,
+        compact_refinement: bool = True,
+        inplace_api: bool = False,
+        cascade: Optional[ModelCascade] = None,
+    ):
+        self.llm = llm or LLMClient()
+        self.executor = executor or Executor()
+        # Compact refinement sends only failing tests, trimmed traces and relevant
+        # functions, and merges a function-level patch; otherwise REFINE_PROMPT is used.
+        self.compact_refinement = compact_refinement
+        # inplace_api also asks for apply_action_inplace/undo_action (see inplace.py).
+        self.inplace_api = inplace_api
+        # With a cascade, cheap models are tried first and stronger ones only after failures.
+        self.cascade = cascade
+        self.attempts = 0  # Validations performed by the most recent synthesis run.
+        self.static_rejections = 0  # Of those, candidates rejected by the static check alone.
+        self.signatures: Dict[str, int] = {}  # Required functions of the active prompt template.
+        self.root_state: Optional[Dict[str, Any]] = None  # Root of the in-place cross-check.
 
     PROMPT_MAP = {
         "perfect": CWM_SYSTEM_PROMPT_PERFECT,
@@ -24,46 +52,350 @@ class CWMSynthesizer:
         tests: str,
         info_type: str = "perfect",
         max_retries = 2,
+        num_candidates = 1,
+        perf_floor: Optional[float] = None,
+        root_state: Optional[Dict[str, Any]] = None,
     ) -> str:
+        """
+        With perf_floor (random rollouts/sec) and root_state set, code that passes
+        the tests must also clear the throughput gate, see optimize().
+        """
+        self.root_state = root_state
+        if self.cascade is not None:
+            return self._synthesize_cascade(game_name, rules, tests, info_type, perf_floor, root_state)
+        if num_candidates > 1:
+            return asyncio.run(self.asynthesize(
+                game_name, rules, tests, info_type, max_retries, num_candidates, perf_floor, root_state
+            ))
+
         logging.info(f"--- Starting Synthesis for {game_name} ---")
-        info_key = info_type.strip().lower()
-        if info_key not in self.PROMPT_MAP:
-            raise ValueError(
-                f"Unsupported info_type '{info_type}'. Expected one of {list(self.PROMPT_MAP.keys())}."
-            )
-        logging.info(f"Using {info_key} information prompt template.")
+        self.attempts = 0
+        self.static_rejections = 0
 
         # 1. Initial Zero-Shot Generation
-        system_prompt_template = self.PROMPT_MAP[info_key]
-        system_prompt = system_prompt_template.format(
-            game_name=game_name,
-            game_desc=rules,
-            test_code=tests
-        )
-        
-        current_code = self.llm.generate(system_prompt)
-        
+        system_prompt = self._build_system_prompt(game_name, rules, tests, info_type)
+        current_code = self.llm.generate(system_prompt, attempt=1)
+
         # 2. Refinement Loop
         for attempt in range(max_retries + 1):
             logging.info(f"Validating Attempt {attempt + 1}...")
-            
-            success, result = self.executor.run_tests(current_code, tests)
-            
-            if success:
+
+            report = self._validate(current_code, tests)
+            self.attempts += 1
+
+            if report.passed:
                 logging.info(f"Success! Code passed all tests.")
-                return current_code
-            
-            logging.warning(f"Attempt {attempt + 1} Failed. Error trace captured.")
-            logging.debug(f"Error Trace: {result}")
+                return self._apply_perf_gate(current_code, tests, perf_floor, root_state)
+
+            logging.warning(f"Attempt {attempt + 1} Failed: {report.summary()}.")
+            logging.debug(f"Error Trace: {report.to_trace()}")
 
             if attempt < max_retries:
-                refinement_prompt = REFINE_PROMPT.format(
-                    error_trace=result,
-                    original_code=current_code
-                )
+                refinement_prompt = self._refinement_prompt(rules, tests, current_code, report)
                 logging.info("Refining code with LLM...")
-                current_code = self.llm.generate(refinement_prompt)
+                usage_before, start = dict(self.llm.usage), time.perf_counter()
+                response = self.llm.generate(refinement_prompt, attempt=self.attempts + 1)
+                self._log_refinement(attempt + 1, refinement_prompt, usage_before, time.perf_counter() - start)
+                current_code = self._apply_refinement(current_code, response)
             else:
                 logging.error("Max retries reached. Synthesis failed.")
-        
-        return ""
\ No newline at end of file
+
+        return ""
+
+    def _synthesize_cascade(
+        self,
+        game_name: str,
+        rules: str,
+        tests: str,
+        info_type: str,
+        perf_floor: Optional[float],
+        root_state: Optional[Dict[str, Any]],
+    ) -> str:
+        """
+        Runs the cascade's tiers in order, each for up to tier.attempts
+        validations. A tier starts from a fresh generation unless an earlier
+        candidate already passes some tests, in which case the best candidate so
+        far is refined; later validations in a tier refine the latest code.
+        Every tier's outcome, latency and cost is recorded for tuning.
+        """
+        logging.info(f"--- Starting Cascade Synthesis for {game_name} ({self.cascade.describe()}) ---")
+        self.attempts = 0
+        self.static_rejections = 0
+        system_prompt = self._build_system_prompt(game_name, rules, tests, info_type)
+        best: Optional[Tuple[str, TestReport]] = None
+        base_llm = self.llm
+
+        try:
+            for tier_index, tier in enumerate(self.cascade.tiers):
+                generator = self.cascade.client(tier.model, tier.temperature)
+                refiner = self.cascade.client(tier.refine_model or tier.model, tier.temperature)
+                usage_before, start = dict(generator.usage), time.perf_counter()
+                logging.info(f"Tier {tier_index}: {tier.model} for up to {tier.attempts} attempts.")
+
+                current = best if best is not None and best[1].pass_rate > 0 else None
+                passed = False
+                validations = 0
+                for _ in range(tier.attempts):
+                    if current is None:
+                        self.llm = generator
+                        code = generator.generate(system_prompt, attempt=self.attempts + 1)
+                    else:
+                        self.llm = refiner
+                        refinement_prompt = self._refinement_prompt(rules, tests, current[0], current[1])
+                        refine_before, refine_start = dict(refiner.usage), time.perf_counter()
+                        response = refiner.generate(refinement_prompt, attempt=self.attempts + 1)
+                        self._log_refinement(self.attempts, refinement_prompt, refine_before, time.perf_counter() - refine_start)
+                        code = self._apply_refinement(current[0], response)
+
+                    report = self._validate(code, tests)
+                    self.attempts += 1
+                    validations += 1
+                    current = (code, report)
+                    if best is None or report.pass_rate >= best[1].pass_rate:
+                        best = current
+                    if report.passed:
+                        passed = True
+                        break
+                    logging.warning(f"Tier {tier_index} attempt {validations} failed: {report.summary()}.")
+
+                self.cascade.record(TierRun(
+                    game=game_name,
+                    tier=tier_index,
+                    model=tier.model,
+                    refine_model=tier.refine_model or tier.model,
+                    success=passed,
+                    validations=validations,
+                    latency=time.perf_counter() - start,
+                    cost_usd=generator.usage["cost_usd"] - usage_before["cost_usd"],
+                    prompt_tokens=generator.usage["prompt_tokens"] - usage_before["prompt_tokens"],
+                    completion_tokens=generator.usage["completion_tokens"] - usage_before["completion_tokens"],
+                ))
+                if passed:
+                    logging.info(f"Success! Tier {tier_index} ({tier.model}) passed all tests.")
+                    # Optimization rounds, if any, use the model that solved the game.
+                    return self._apply_perf_gate(best[0], tests, perf_floor, root_state)
+        finally:
+            self.llm = base_llm
+
+        logging.error("All cascade tiers failed. Synthesis failed.")
+        return ""
+
+    async def asynthesize(
+        self,
+        game_name: str,
+        rules: str,
+        tests: str,
+        info_type: str = "perfect",
+        max_retries = 2,
+        num_candidates = 3,
+        perf_floor: Optional[float] = None,
+        root_state: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Best-of-N synthesis: sends num_candidates initial generations at once and
+        validates each one as soon as it arrives. The first passing candidate wins
+        and the remaining requests are cancelled. If none pass, the candidate with
+        the highest test pass rate goes through the usual refinement loop.
+        """
+        self.root_state = root_state
+        logging.info(f"--- Starting Parallel Synthesis for {game_name} ({num_candidates} candidates) ---")
+        self.attempts = 0
+        self.static_rejections = 0
+        system_prompt = self._build_system_prompt(game_name, rules, tests, info_type)
+
+        async def generate_and_validate(index: int):
+            code = await self.llm.agenerate(system_prompt, sample_index=index, attempt=index + 1)
+            report = await asyncio.to_thread(self._validate, code, tests, index + 1)
+            self.attempts += 1
+            return index, code, report
+
+        tasks = [asyncio.create_task(generate_and_validate(i)) for i in range(num_candidates)]
+        failures = []
+        winner = None
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, code, report = await next_done
+                if report.passed:
+                    logging.info(f"Success! Candidate {index + 1} passed all tests.")
+                    winner = code
+                    break
+                logging.warning(f"Candidate {index + 1} Failed: {report.summary()}.")
+                logging.debug(f"Error Trace: {report.to_trace()}")
+                failures.append((code, report))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if winner is not None:
+            return await asyncio.to_thread(self._apply_perf_gate, winner, tests, perf_floor, root_state)
+
+        # None of the candidates passed: refine the closest one sequentially.
+        current_code, report = max(failures, key=lambda failure: failure[1].pass_rate)
+        for attempt in range(max_retries):
+            refinement_prompt = self._refinement_prompt(rules, tests, current_code, report)
+            logging.info("Refining code with LLM...")
+            usage_before, start = dict(self.llm.usage), time.perf_counter()
+            response = await self.llm.agenerate(refinement_prompt, attempt=self.attempts + 1)
+            self._log_refinement(attempt + 1, refinement_prompt, usage_before, time.perf_counter() - start)
+            current_code = self._apply_refinement(current_code, response)
+
+            logging.info(f"Validating Refinement {attempt + 1}...")
+            report = await asyncio.to_thread(self._validate, current_code, tests)
+            self.attempts += 1
+            if report.passed:
+                logging.info(f"Success! Code passed all tests.")
+                return await asyncio.to_thread(self._apply_perf_gate, current_code, tests, perf_floor, root_state)
+
+            logging.warning(f"Refinement {attempt + 1} Failed: {report.summary()}.")
+            logging.debug(f"Error Trace: {report.to_trace()}")
+
+        logging.error("Max retries reached. Synthesis failed.")
+        return ""
+
+    def optimize(
+        self,
+        code: str,
+        tests: str,
+        root_state: Dict[str, Any],
+        perf_floor: float,
+        max_rounds: int = 2,
+    ) -> str:
+        """
+        Throughput gate for code that already passes the tests. The candidate is
+        profiled on random rollouts; below perf_floor the LLM gets the profile and
+        is asked for a faster version. A rewrite is accepted only if it still
+        passes every test and measures faster. Returns the fastest verified code,
+        or "" if none reaches perf_floor (the code is rejected).
+        """
+        best_code = code
+        best = self.executor.profile(code, root_state)
+        logging.info(f"Throughput: {best['rollouts_per_sec']:.1f} rollouts/s (floor {perf_floor:.1f}).")
+
+        for round_index in range(max_rounds):
+            if best["rollouts_per_sec"] >= perf_floor:
+                break
+
+            logging.info(f"Below throughput floor; optimization round {round_index + 1}...")
+            logging.debug(f"Profile:\n{best['profile']}")
+            optimize_prompt = OPTIMIZE_PROMPT.format(
+                rollouts_per_sec=best["rollouts_per_sec"],
+                floor=perf_floor,
+                profile_report=best["profile"],
+                original_code=best_code
+            )
+            candidate = self.llm.generate(optimize_prompt, attempt=self.attempts + 1)
+
+            report = self._validate(candidate, tests)
+            self.attempts += 1
+            if not report.passed:
+                logging.warning(f"Optimized code rejected: {report.summary()}.")
+                continue
+
+            measured = self.executor.profile(candidate, root_state)
+            if measured["rollouts_per_sec"] <= best["rollouts_per_sec"]:
+                logging.warning(
+                    f"Optimized code rejected: {measured['rollouts_per_sec']:.1f} rollouts/s is not faster."
+                )
+                continue
+
+            logging.info(f"Accepted optimized code: {measured['rollouts_per_sec']:.1f} rollouts/s.")
+            best_code, best = candidate, measured
+
+        if best["rollouts_per_sec"] < perf_floor:
+            logging.error(
+                f"Throughput floor not reached ({best['rollouts_per_sec']:.1f} < {perf_floor:.1f} rollouts/s). Synthesis failed."
+            )
+            return ""
+        return best_code
+
+    def _validate(self, code: str, tests: str, attempt: Optional[int] = None) -> TestReport:
+        """
+        Runs the static check first; code that does not compile, lacks a required
+        function or imports something forbidden goes back to refinement without
+        a round-trip through the (sandboxed) executor. With inplace_api, code that
+        passes the tests is also cross-checked against apply_action, and a
+        mismatch is reported as a failed record so that it is refined too.
+        """
+        start = time.perf_counter()
+        report = static_report(code, self.signatures)
+        if report is not None:
+            self.static_rejections += 1
+            logging.info("Candidate rejected by the static check; skipping execution.")
+            outcome = "static_reject"
+        else:
+            report = self.executor.run_test_suite(code, tests)
+            outcome = "pass" if report.passed else "fail"
+            if report.passed and self.inplace_api and self.root_state is not None:
+                problems = self.executor.check_inplace(code, self.root_state)
+                if problems:
+                    logging.info(f"In-place API disagrees with apply_action on {len(problems)} trajectories.")
+                    report.records.append(TestRecord(
+                        "inplace_cross_check", "fail", 0.0,
+                        "apply_action_inplace/undo_action disagree with apply_action on random trajectories:\n"
+                        + "\n".join(problems[:3]),
+                    ))
+                    outcome = "inplace_mismatch"
+        telemetry.record(
+            "validation", outcome=outcome, latency=time.perf_counter() - start,
+            attempt=attempt if attempt is not None else self.attempts + 1,
+            passed=sum(r.status == "pass" for r in report.records), total=len(report.records),
+            code_sha=telemetry.text_hash(code),
+        )
+        return report
+
+    def _apply_perf_gate(
+        self,
+        code: str,
+        tests: str,
+        perf_floor: Optional[float],
+        root_state: Optional[Dict[str, Any]],
+    ) -> str:
+        if perf_floor is None or root_state is None:
+            return code
+        return self.optimize(code, tests, root_state, perf_floor)
+
+    def _refinement_prompt(self, rules: str, tests: str, current_code: str, report: TestReport) -> str:
+        # A function-level patch can only be merged into code that parses; otherwise ask for the whole module.
+        if self.compact_refinement and parses(current_code):
+            return build_compact_prompt(rules, tests, current_code, report)
+        return REFINE_PROMPT.format(
+            error_trace=report.to_trace(),
+            original_code=current_code
+        )
+
+    def _apply_refinement(self, current_code: str, response: str) -> str:
+        if self.compact_refinement and response and parses(current_code):
+            return merge_patch(current_code, response)
+        return response
+
+    def _log_refinement(self, retry: int, prompt: str, usage_before: Dict[str, Any], latency: float):
+        """Per-retry prompt size and latency, so compact vs. full refinement can be compared."""
+        prompt_tokens = self.llm.usage.get("prompt_tokens", 0) - usage_before.get("prompt_tokens", 0)
+        logging.info(
+            f"Refinement {retry}: {len(prompt)} prompt chars (~{estimate_tokens(prompt)} tokens est., "
+            f"{prompt_tokens} billed), {latency:.2f}s."
+        )
+
+    def prompt_template(self, info_type: str) -> str:
+        info_key = info_type.strip().lower()
+        if info_key not in self.PROMPT_MAP:
+            raise ValueError(
+                f"Unsupported info_type '{info_type}'. Expected one of {list(self.PROMPT_MAP.keys())}."
+            )
+        template = self.PROMPT_MAP[info_key]
+        if self.inplace_api:
+            template = template.replace("\nYour code should satisfy", INPLACE_API_PROMPT + "\nYour code should satisfy", 1)
+        return template
+
+    def _build_system_prompt(self, game_name: str, rules: str, tests: str, info_type: str) -> str:
+        system_prompt_template = self.prompt_template(info_type)
+        logging.info(f"Using {info_type.strip().lower()} information prompt template.")
+
+        self.signatures = dict(required_signatures(system_prompt_template))
+        if self.inplace_api:
+            self.signatures.update(required_signatures(INPLACE_API_PROMPT))
+        return system_prompt_template.format(
+            game_name=game_name,
+            game_desc=rules,
+            test_code=tests
+        )
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from cwm import CWM, TERMINAL_PLAYER
+from game_tree import GameTreeWalker
+
+
+class TransitionTable:
+    """
+    A compiled, array-only view of a small game.
+
+    States are integer ids (0 is the root) stored in CSR form: the legal
+    actions of state s are edges offsets[s]:offsets[s + 1], each with an
+    action id and a child state id. player[s] is the player to move (-1 chance,
+    -4 terminal) and rewards[s] the CWM rewards in that state. Arrays loaded
+    from disk are memory-mapped, so separate processes share one copy.
+    """
+
+    ARRAYS = ("offsets", "children", "actions", "player", "rewards")
+
+    def __init__(self, offsets, children, actions, player, rewards, action_names: List[str], meta: Dict[str, Any]):
+        self.offsets = offsets
+        self.children = children
+        self.actions = actions
+        self.player = player
+        self.rewards = rewards
+        self.action_names = action_names
+        self.action_ids = {name: i for i, name in enumerate(action_names)}
+        self.meta = meta
+
+    @property
+    def num_states(self) -> int:
+        return len(self.player)
+
+    def legal_actions(self, state_id: int) -> np.ndarray:
+        return self.actions[self.offsets[state_id]:self.offsets[state_id + 1]]
+
+    def successors(self, state_id: int) -> np.ndarray:
+        return self.children[self.offsets[state_id]:self.offsets[state_id + 1]]
+
+    def child(self, state_id: int, action_id: int) -> int:
+        start, end = self.offsets[state_id], self.offsets[state_id + 1]
+        index = np.nonzero(self.actions[start:end] == action_id)[0]
+        if not len(index):
+            raise ValueError(f"Action {self.action_names[action_id]!r} is not legal in state {state_id}.")
+        return int(self.children[start + index[0]])
+
+    def is_terminal(self, state_id: int) -> bool:
+        return self.player[state_id] == TERMINAL_PLAYER
+
+    def random_rollouts(self, num_rollouts: int, seed: int = 0, start: int = 0) -> np.ndarray:
+        """
+        Plays num_rollouts uniformly random games at once on the integer arrays
+        and returns the terminal rewards, shape (num_rollouts, num_players).
+        """
+        rng = np.random.default_rng(seed)
+        states = np.full(num_rollouts, start, dtype=np.int64)
+        offsets = np.asarray(self.offsets)
+        while True:
+            counts = offsets[states + 1] - offsets[states]
+            active = counts > 0
+            if not active.any():
+                break
+            picks = (rng.random(active.sum()) * counts[active]).astype(np.int64)
+            states[active] = self.children[offsets[states[active]] + picks]
+        return np.asarray(self.rewards[states])
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), np.asarray(getattr(self, name)))
+        with open(os.path.join(directory, "actions.json"), "w") as f:
+            json.dump(self.action_names, f)
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump(self.meta, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "TransitionTable":
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode) for name in cls.ARRAYS}
+        with open(os.path.join(directory, "actions.json"), "r") as f:
+            action_names = json.load(f)
+        with open(os.path.join(directory, "meta.json"), "r") as f:
+            meta = json.load(f)
+        return cls(action_names=action_names, meta=meta, **arrays)
+
+
+def tabulate(
+    cwm: CWM,
+    root_state: Dict[str, Any],
+    num_players: int = 2,
+    max_states: int = 2_000_000,
+    game_name: str = "",
+) -> TransitionTable:
+    """Walks the verified CWM once and compiles its reachable state graph into arrays."""
+    start = time.perf_counter()
+    ids: Dict[Hashable, int] = {}
+    records = []
+    action_ids: Dict[str, int] = {}
+
+    def visit(key, state, player, actions, child_keys):
+        ids[key] = len(records)
+        rewards = cwm.get_rewards(state)
+        records.append((player, [action_ids.setdefault(a, len(action_ids)) for a in actions], child_keys, rewards))
+
+    # One node of headroom, so that a game with exactly max_states states is not mistaken for a truncated walk.
+    stats = GameTreeWalker(cwm).walk(root_state, max_nodes=max_states + 1, visit=visit)
+    if stats.nodes > max_states:
+        raise ValueError(f"{game_name or 'Game'} has more than {max_states} states; too large to tabulate.")
+
+    num_states = len(records)
+    num_edges = sum(len(r[1]) for r in records)
+    offsets = np.zeros(num_states + 1, dtype=np.int64)
+    children = np.empty(num_edges, dtype=np.int32)
+    actions = np.empty(num_edges, dtype=np.int32)
+    player = np.empty(num_states, dtype=np.int8)
+    rewards = np.zeros((num_states, num_players), dtype=np.float32)
+
+    edge = 0
+    for s, (p, action_list, child_keys, state_rewards) in enumerate(records):
+        player[s] = p
+        rewards[s] = state_rewards
+        for action_id, child_key in zip(action_list, child_keys):
+            actions[edge] = action_id
+            children[edge] = ids[child_key]
+            edge += 1
+        offsets[s + 1] = edge
+
+    action_names = [None] * len(action_ids)
+    for name, i in action_ids.items():
+        action_names[i] = name
+
+    meta = {
+        "game": game_name,
+        "num_states": num_states,
+        "num_edges": num_edges,
+        "num_players": num_players,
+        "cwm_sha256": hashlib.sha256(cwm.source.encode("utf-8")).hexdigest(),
+        "build_seconds": round(time.perf_counter() - start, 3),
+    }
+    logging.info(f"Tabulated {game_name}: {num_states} states, {num_edges} edges in {meta['build_seconds']}s.")
+    return TransitionTable(offsets, children, actions, player, rewards, action_names, meta)
+
+
+def table_dir(game_name: str) -> str:
+    return f"results/tables/{game_name}"
+
+
+def tabulate_game(game_name: str, cwm: Optional[CWM] = None) -> TransitionTable:
+    """Tabulates a registered game from its verified CWM and writes the table to results/tables/."""
+    from cwm import load_cwm
+    from games import GAMES
+
+    spec = GAMES[game_name]
+    cwm = cwm or load_cwm(game_name)
+    table = tabulate(cwm, spec.initial_state(), spec.num_players, game_name=game_name)
+    table.save(table_dir(game_name))
+    return table
+
+
+if __name__ == "__main__":
+    from games import GAMES
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    for game_name, spec in GAMES.items():
+        if not spec.tabulate:
+            continue
+        tabulate_game(game_name)
+        table = TransitionTable.load(table_dir(game_name))
+        start = time.perf_counter()
+        rewards = table.random_rollouts(100_000, seed=0)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{game_name}: {table.num_states} states, 100000 rollouts in {elapsed:.3f}s, "
+            f"mean rewards {rewards.mean(axis=0)}"
+        )
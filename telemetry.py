@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import hashlib
+import logging
+import logging.handlers
+from typing import Any, Dict, List, Optional, Sequence
+
+from metrics import percentile
+
+TELEMETRY_DIR = "logs/telemetry"
+
+# Records travel through a queue to a listener thread, so callers never wait on file I/O.
+_logger = logging.getLogger("cwm.telemetry")
+_logger.propagate = False
+_logger.setLevel(logging.INFO)
+_listeners: List[logging.handlers.QueueListener] = []
+_run_fields: Dict[str, Any] = {}
+_sent_texts = set()  # Hashes of texts already handed to the listener this process
+_run_path: Optional[str] = None
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class JsonlHandler(logging.Handler):
+    """
+    Runs on the listener thread: appends each record's fields as one JSON line
+    and writes every new prompt text once to <directory>/prompts/<hash>.txt.
+    """
+
+    def __init__(self, path: str, prompt_dir: str):
+        super().__init__()
+        os.makedirs(prompt_dir, exist_ok=True)
+        self.prompt_dir = prompt_dir
+        self.stored = {name[:-4] for name in os.listdir(prompt_dir)}
+        self.file = open(path, "a", encoding="utf-8")
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            for sha, text in getattr(record, "texts", {}).items():
+                if sha not in self.stored:
+                    with open(os.path.join(self.prompt_dir, f"{sha}.txt"), "w", encoding="utf-8") as f:
+                        f.write(text)
+                    self.stored.add(sha)
+            self.file.write(json.dumps(record.fields, default=str) + "\n")
+            self.file.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def queue_logging(target: logging.Logger, handlers: Sequence[logging.Handler]) -> logging.handlers.QueueListener:
+    """Routes target through a QueueHandler to handlers on a listener thread (stopped at exit)."""
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    target.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener.start()
+    _listeners.append(listener)
+    return listener
+
+
+def start(run_id: Optional[str] = None, directory: str = TELEMETRY_DIR, **fields: Any) -> str:
+    """Starts writing telemetry for this run to <directory>/<run_id>.jsonl; fields are added to every record."""
+    global _run_path
+    if _run_path is not None:
+        return _run_path
+    run_id = run_id or time.strftime("%Y%m%d_%H%M%S")
+    os.makedirs(directory, exist_ok=True)
+    _run_path = os.path.join(directory, f"{run_id}.jsonl")
+    _run_fields.update(run=run_id, **fields)
+    queue_logging(_logger, [JsonlHandler(_run_path, os.path.join(directory, "prompts"))])
+    return _run_path
+
+
+def stop():
+    """Flushes queued records and closes the handlers."""
+    global _run_path
+    while _listeners:
+        listener = _listeners.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+    _run_path = None
+
+
+atexit.register(stop)
+
+
+def record(event: str, texts: Sequence[str] = (), **fields: Any):
+    """Queues one record; texts (prompts) are stored by hash and only sent to the listener once."""
+    if not _logger.handlers:
+        return
+    new_texts = {}
+    for text in texts:
+        sha = text_hash(text)
+        if sha not in _sent_texts:
+            _sent_texts.add(sha)
+            new_texts[sha] = text
+    _logger.info(event, extra={"fields": {"event": event, "time": time.time(), **_run_fields, **fields}, "texts": new_texts})
+
+
+def load(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per event type: count, p50/p95 latency, tokens, cost and outcome counts."""
+    summary: Dict[str, Dict[str, Any]] = {}
+    for event in sorted({r["event"] for r in records}):
+        rows = [r for r in records if r["event"] == event]
+        latencies = [r["latency"] for r in rows if r.get("latency") is not None]
+        outcomes: Dict[str, int] = {}
+        for r in rows:
+            outcomes[r.get("outcome", "")] = outcomes.get(r.get("outcome", ""), 0) + 1
+        summary[event] = {
+            "count": len(rows),
+            "p50_latency": percentile(latencies, 50),
+            "p95_latency": percentile(latencies, 95),
+            "prompt_tokens": sum(r.get("prompt_tokens", 0) for r in rows),
+            "completion_tokens": sum(r.get("completion_tokens", 0) for r in rows),
+            "cost_usd": sum(r.get("cost_usd", 0.0) for r in rows),
+            "outcomes": outcomes,
+        }
+    return summary
+
+
+def format_summary(summary: Dict[str, Dict[str, Any]]) -> str:
+    header = f"{'event':<12}{'count':>7}{'p50 s':>9}{'p95 s':>9}{'tokens in/out':>18}{'cost $':>10}  outcomes"
+    lines = [header, "-" * len(header)]
+    for event, s in summary.items():
+        tokens = f"{s['prompt_tokens']}/{s['completion_tokens']}"
+        outcomes = ", ".join(f"{k}={v}" for k, v in sorted(s["outcomes"].items()))
+        lines.append(
+            f"{event:<12}{s['count']:>7}{s['p50_latency']:>9.2f}{s['p95_latency']:>9.2f}"
+            f"{tokens:>18}{s['cost_usd']:>10.4f}  {outcomes}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # Summarizes the given run file, or the most recent one.
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+    else:
+        runs = sorted(f for f in os.listdir(TELEMETRY_DIR) if f.endswith(".jsonl"))
+        path = os.path.join(TELEMETRY_DIR, runs[-1])
+    print(f"{path}:")
+    print(format_summary(summarize(load(path))))
@@ -0,0 +1,363 @@
+import re
+import time
+import pprint
+import random
+import logging
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+from cwm import CWM, CHANCE_PLAYER, TERMINAL_PLAYER
+from game_tree import canonical_key
+
+HEADER = '''import io
+import unittest
+from typing import Any
+
+# NOTE: The synthesized code is injected before this runs.
+# Generated by testgen.py from {source}: {num_tests} positions covering {num_features} rule branches.
+
+class TestTransition(unittest.TestCase):
+'''
+
+FOOTER = '''
+# Run the tests
+suite = unittest.TestLoader().loadTestsFromTestCase(TestTransition)
+stream = io.StringIO()
+runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+result = runner.run(suite)
+
+if not result.wasSuccessful():
+    error_message = stream.getvalue()
+    raise Exception(f"Unit tests failed:\\n{error_message}")
+'''
+
+
+class CWMReference:
+    """A previously verified CWM as the reference model; positions are its state dicts."""
+
+    source = "verified CWM"
+
+    def __init__(self, cwm: CWM, root_state: Dict[str, Any]):
+        self.cwm = cwm
+        self.root_state = root_state
+
+    def root(self):
+        return self.root_state
+
+    def player(self, pos) -> int:
+        return self.cwm.get_current_player(pos)
+
+    def legal(self, pos) -> List[str]:
+        return list(self.cwm.get_legal_actions(pos))
+
+    def rewards(self, pos) -> List[float]:
+        return [float(r) for r in self.cwm.get_rewards(pos)]
+
+    def apply(self, pos, action: str):
+        return self.cwm.apply_action(pos, action)
+
+    def key(self, pos) -> Hashable:
+        return canonical_key(pos)
+
+    def literal(self, pos) -> Optional[Dict[str, Any]]:
+        return pos
+
+
+class SpielReference:
+    """
+    An OpenSpiel game as the reference model, through the difftest adapters.
+    Its states have no CWM-format literal, so tests replay the action history
+    from the game's initial state instead.
+    """
+
+    source = "OpenSpiel"
+
+    def __init__(self, game_name: str):
+        import pyspiel
+        from difftest import ADAPTERS
+
+        self.adapter = ADAPTERS[game_name]
+        self.game = pyspiel.load_game(self.adapter.game_string)
+
+    def root(self):
+        return self.game.new_initial_state()
+
+    def player(self, pos) -> int:
+        return pos.current_player()
+
+    def _mapped(self, pos) -> Dict[str, int]:
+        return {self.adapter.action(pos, a): a for a in pos.legal_actions()}
+
+    def legal(self, pos) -> List[str]:
+        return list(self._mapped(pos))
+
+    def rewards(self, pos) -> List[float]:
+        return list(pos.returns() if pos.is_terminal() else pos.rewards())
+
+    def apply(self, pos, action: str):
+        child = pos.clone()
+        child.apply_action(self._mapped(pos)[action])
+        return child
+
+    def key(self, pos) -> Hashable:
+        return (str(pos), pos.current_player())
+
+    def literal(self, pos) -> Optional[Dict[str, Any]]:
+        return None
+
+
+@dataclass
+class Position:
+    actions: List[str]  # Actions from the root that reach this position
+    state: Optional[Dict[str, Any]]
+    player: int
+    legal: List[str]
+    rewards: List[float]
+    action: Optional[str] = None  # The transition checked by the test
+    next_state: Optional[Dict[str, Any]] = None
+    next_player: Optional[int] = None
+    next_rewards: Optional[List[float]] = None
+    features: FrozenSet[Hashable] = field(default_factory=frozenset)
+
+
+def _kind(player: int) -> str:
+    if player == TERMINAL_PLAYER:
+        return "terminal"
+    if player == CHANCE_PLAYER:
+        return "chance"
+    return f"player_{player}"
+
+
+def _shape(action: str) -> str:
+    """The action with its coordinates blanked out: 'x(1,2)' -> 'x(#,#)'."""
+    return re.sub(r"\d+", "#", action)
+
+
+def _delta(parent: Dict[str, Any], child: Dict[str, Any]) -> Tuple:
+    """Which fields changed, and how the multiset of values in list fields changed (e.g. a capture)."""
+    changes = []
+    for key in sorted(set(parent) | set(child), key=str):
+        a, b = parent.get(key), child.get(key)
+        if a == b:
+            continue
+        if isinstance(a, list) and isinstance(b, list):
+            diff = Counter(map(repr, b))
+            diff.subtract(Counter(map(repr, a)))
+            changes.append((key, len(b) - len(a), tuple(sorted(v for v, n in diff.items() if n))))
+        else:
+            changes.append((key,))
+    return tuple(changes)
+
+
+def _features(position: Position) -> FrozenSet[Hashable]:
+    """The rule branches a position exercises; the covering set picks positions by these."""
+    features = {("kind", _kind(position.player)), ("num_legal", len(position.legal))}
+    if position.player == TERMINAL_PLAYER:
+        features.add(("terminal_rewards", tuple(position.rewards)))
+    if position.action is not None:
+        edge = (_shape(position.action), _kind(position.player), _kind(position.next_player))
+        features.add(("edge",) + edge)
+        if position.state is not None and position.next_state is not None:
+            features.add(("delta", _shape(position.action), _delta(position.state, position.next_state)))
+        if position.next_player == TERMINAL_PLAYER:
+            features.add(("ending", _shape(position.action), tuple(position.next_rewards)))
+    return frozenset(features)
+
+
+def _choose(reference, pos, legal: List[str], rng: random.Random, heuristic: bool) -> str:
+    """Uniform random, or (heuristic) a move that wins immediately for the mover if there is one."""
+    player = reference.player(pos)
+    if heuristic and player >= 0:
+        winning = [a for a in legal if reference.rewards(reference.apply(pos, a))[player] > 0]
+        if winning:
+            return rng.choice(winning)
+    return rng.choice(legal)
+
+
+def play_trajectory(reference, seed: int, heuristic: bool = False, max_steps: int = 500) -> List[Tuple[Hashable, Position]]:
+    rng = random.Random(seed)
+    pos = reference.root()
+    actions: List[str] = []
+    positions = []
+    for _ in range(max_steps):
+        player = reference.player(pos)
+        legal = reference.legal(pos) if player != TERMINAL_PLAYER else []
+        position = Position(list(actions), reference.literal(pos), player, legal, reference.rewards(pos))
+        key = reference.key(pos)
+        if not legal:
+            position.features = _features(position)
+            positions.append((key, position))
+            break
+        action = _choose(reference, pos, legal, rng, heuristic)
+        child = reference.apply(pos, action)
+        position.action = action
+        position.next_state = reference.literal(child)
+        position.next_player = reference.player(child)
+        position.next_rewards = reference.rewards(child)
+        position.features = _features(position)
+        positions.append((key, position))
+        actions.append(action)
+        pos = child
+    return positions
+
+
+# Worker processes build the reference model once.
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(kind: str, game_name: str, source: Optional[str], root_state: Dict[str, Any]):
+    if kind == "spiel":
+        _WORKER["reference"] = SpielReference(game_name)
+    else:
+        _WORKER["reference"] = CWMReference(CWM.from_code(source, "<testgen_worker>"), root_state)
+
+
+def _run_shard(seeds: List[int], max_steps: int) -> Dict[Hashable, Position]:
+    unique: Dict[Hashable, Position] = {}
+    for seed in seeds:
+        # Odd seeds play the win-seeking heuristic policy, so endings are well represented.
+        for key, position in play_trajectory(_WORKER["reference"], seed, seed % 2 == 1, max_steps):
+            unique.setdefault(key, position)
+    return unique
+
+
+def mine_positions(
+    game_name: str,
+    root_state: Dict[str, Any],
+    cwm: Optional[CWM] = None,
+    num_trajectories: int = 2000,
+    num_workers: Optional[int] = None,
+    shard_size: int = 100,
+    max_steps: int = 500,
+    seed: int = 0,
+) -> Dict[Hashable, Position]:
+    """
+    Plays seeded random and heuristic trajectories through the reference model
+    (cwm if given, otherwise the OpenSpiel game) across a process pool and
+    returns the distinct positions reached.
+    """
+    kind = "cwm" if cwm is not None else "spiel"
+    seeds = list(range(seed, seed + num_trajectories))
+    shards = [seeds[i:i + shard_size] for i in range(0, len(seeds), shard_size)]
+    unique: Dict[Hashable, Position] = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(kind, game_name, cwm.source if cwm is not None else None, root_state),
+    ) as pool:
+        for shard in pool.map(_run_shard, shards, [max_steps] * len(shards)):
+            for key, position in shard.items():
+                unique.setdefault(key, position)
+    logging.info(
+        f"Mined {len(unique)} distinct positions from {num_trajectories} trajectories "
+        f"in {time.perf_counter() - start:.2f}s."
+    )
+    return unique
+
+
+def select_covering(positions: List[Position], max_tests: int = 20) -> List[Position]:
+    """Greedy set cover: repeatedly takes the position adding the most uncovered features, shortest first on ties."""
+    covered = set()
+    chosen = []
+    candidates = sorted(positions, key=lambda p: len(p.actions))
+    while len(chosen) < max_tests:
+        best = max(candidates, key=lambda p: len(p.features - covered), default=None)
+        if best is None or not best.features - covered:
+            break
+        chosen.append(best)
+        covered |= best.features
+        candidates.remove(best)
+    return chosen
+
+
+def _literal(value: Any, indent: int) -> str:
+    text = pprint.pformat(value, width=100, compact=True, sort_dicts=False)
+    return text.replace("\n", "\n" + " " * indent)
+
+
+def _render_test(index: int, position: Position, root_state: Dict[str, Any]) -> str:
+    lines = [f"    def test_position_{index:03d}(self):"]
+    where = f"after {len(position.actions)} moves" if position.actions else "at the start"
+    if position.state is not None:
+        lines.append(f"        state = {_literal(position.state, 16)}")
+    else:
+        lines.append(f"        state = {_literal(root_state, 16)}")
+        if position.actions:
+            lines.append(f"        for action in {position.actions!r}:")
+            lines.append("            state = apply_action(state, action)")
+    lines.append("")
+    lines.append(f"        curr = get_current_player(state)")
+    lines.append(f"        self.assertEqual(curr, {position.player}, f\"Player to move {where} should be {position.player}, got {{curr}}\")")
+    if position.legal:
+        lines.append(f"        legal = set(get_legal_actions(state))")
+        expected = "{" + ", ".join(repr(a) for a in sorted(position.legal)) + "}"
+        lines.append(f"        self.assertSetEqual(legal, {expected}, \"Legal actions {where} are wrong\")")
+    rewards = position.rewards
+    lines.append(f"        self.assertEqual(get_rewards(state), {rewards!r}, \"Rewards {where} should be {rewards}\")")
+
+    if position.action is not None:
+        lines.append("")
+        lines.append(f"        next_state = apply_action(state, {position.action!r})")
+        if position.next_state is not None:
+            for key, value in position.next_state.items():
+                if position.state is None or position.state.get(key) != value:
+                    lines.append(f"        expected = {_literal(value, 19)}")
+                    lines.append(
+                        f"        self.assertEqual(next_state[{key!r}], expected, \"{key} is wrong after {position.action}\")"
+                    )
+        lines.append(
+            f"        self.assertEqual(get_current_player(next_state), {position.next_player}, "
+            f"\"Player to move after {position.action} should be {position.next_player}\")"
+        )
+        lines.append(
+            f"        self.assertEqual(get_rewards(next_state), {position.next_rewards!r}, "
+            f"\"Rewards after {position.action} should be {position.next_rewards}\")"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def render_suite(positions: List[Position], root_state: Dict[str, Any], source: str) -> str:
+    features = set().union(*(p.features for p in positions)) if positions else set()
+    body = "\n".join(_render_test(i, p, root_state) for i, p in enumerate(positions))
+    return HEADER.format(source=source, num_tests=len(positions), num_features=len(features)) + body + FOOTER
+
+
+def generate_tests(
+    game_name: str,
+    use_openspiel: bool = False,
+    num_trajectories: int = 2000,
+    max_tests: int = 20,
+    output_path: Optional[str] = None,
+) -> str:
+    """
+    Mines trajectories from the verified CWM (or OpenSpiel) of a registered game
+    and writes a compact TestTransition suite, data/<game>_generated_tests.py
+    by default. Returns the test code.
+    """
+    from cwm import load_cwm
+    from games import GAMES
+
+    root_state = GAMES[game_name].initial_state()
+    cwm = None if use_openspiel else load_cwm(game_name)
+    positions = mine_positions(game_name, root_state, cwm, num_trajectories)
+    chosen = select_covering(list(positions.values()), max_tests)
+    source = SpielReference.source if use_openspiel else CWMReference.source
+    test_code = render_suite(chosen, root_state, f"{source} of {game_name}")
+
+    output_path = output_path or f"data/{game_name}_generated_tests.py"
+    with open(output_path, "w") as f:
+        f.write(test_code)
+    logging.info(f"Wrote {len(chosen)} tests to {output_path}.")
+    return test_code
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    for game_name in ("tic_tac_toe", "isolation", "breakthrough"):
+        generate_tests(game_name)
+    generate_tests("kuhn_poker", use_openspiel=True)